@@ -107,7 +107,8 @@ class AccountVerificationView(APIView):
             # Changing the user is_verified to True value and save it
             user = request.user
             user.is_verified = True
-            user.save()
+            # Saving only the changed column, request.user may be a cached copy of the row
+            user.save(update_fields=['is_verified', 'updated_at'])
             # If the serializer is valid, return a success response
             return Response({'message': 'Account verified successfully'}, status=status.HTTP_200_OK)
         else:
@@ -0,0 +1,43 @@
+from django.utils.translation import gettext_lazy as _
+
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from Users import cache
+
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWT authentication that resolves the user of the token from the cache.
+
+    The user is cached for USERS_AUTH_CACHE_TIMEOUT seconds under its id and its auth version,
+    which the User signals bump on every save and delete, so a deactivated or changed user is
+    loaded from the database again and an authenticated request usually costs no user query.
+    The versions are kept in the cache shared by every process, and without one the users are
+    not cached at all. The cached user becomes request.user, so the views that change it must
+    save only the changed columns.
+    """
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None:
+            # Letting the parent class reject the token
+            return super().get_user(validated_token)
+
+        version, user = cache.get_auth_user(user_id)
+        if user is None:
+            # Loading and checking the user like the parent class, and caching it once it passes the checks
+            user = super().get_user(validated_token)
+            cache.set_auth_user(user_id, version, user)
+            return user
+
+        # Checking the cached user like the parent class does
+        if api_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        if api_settings.CHECK_REVOKE_TOKEN:
+            if validated_token.get(api_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password):
+                raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+        return user
@@ -0,0 +1,195 @@
+import hashlib
+import logging
+import math
+import threading
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from Server.caches import get_shared_cache
+
+
+logger = logging.getLogger(__name__)
+
+# Shared cache key of the version of the blacklist, moved by every blacklisted token
+VERSION_KEY = 'auth:blacklist:version'
+
+# The number of the last blacklisted tokens that every sync reads again, because the
+# transactions that insert them may commit out of the order of their ids
+SYNC_OVERLAP = 1000
+
+# The number of rows read by a single fetch of the rebuild
+REBUILD_CHUNK_SIZE = 10000
+
+
+
+class BloomFilter:
+    """
+    A fixed size Bloom filter of strings.
+    A value that was added is always found, and a value that was not added is found with
+    a probability of about error_rate while the filter holds at most capacity values.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        # The optimal number of bits and of hash functions for the capacity and the error rate
+        self.size = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, value):
+        # Deriving every hash function from two halves of a single digest
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        second = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + index * second) % self.size for index in range(self.hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(value))
+
+
+
+class BlacklistFilter:
+    """
+    The Bloom filter of the blacklisted JTIs of this process.
+
+    The filter is built from the blacklist when the server process starts, and every token
+    that this process blacklists is added at once. Every blacklisted token moves a version in
+    the shared cache once its transaction commits, and a check that sees a moved version first
+    reads the new tokens with a range scan on the primary key from the last read id, so a
+    token blacklisted by any process is found by the next check of every other process.
+    A token that is not in the filter is not blacklisted, so only the possible hits need SQL.
+
+    The versions need a cache that every process shares. Without one the filter is off and
+    every check is confirmed with SQL, because a process could not see the tokens that the
+    other processes blacklist.
+    """
+
+    def __init__(self, capacity=None, error_rate=None, sync_interval=None, shared_cache=None):
+        self.min_capacity = capacity or settings.AUTH_BLACKLIST_BLOOM_CAPACITY
+        self.error_rate = error_rate or settings.AUTH_BLACKLIST_BLOOM_ERROR_RATE
+        self.sync_interval = sync_interval if sync_interval is not None else settings.AUTH_BLACKLIST_BLOOM_SYNC_INTERVAL
+        self.shared_cache = shared_cache or get_shared_cache()
+        self._lock = threading.Lock()
+        self._build_lock = threading.Lock()
+        self._filter = None
+        self._count = 0
+        self._last_id = 0
+        self._version = None
+        self._synced_at = 0.0
+
+    @property
+    def enabled(self):
+        return self.shared_cache is not None
+
+    def rebuild(self):
+        """
+        Build the filter from every blacklisted token, sized for twice their number.
+        """
+        with self._lock:
+            self._version = self.shared_cache.get(VERSION_KEY)
+            count = BlacklistedToken.objects.count()
+            bloom = BloomFilter(max(self.min_capacity, 2 * count), self.error_rate)
+            last_id = 0
+            added = 0
+            for blacklisted_id, jti in BlacklistedToken.objects.order_by('id').values_list(
+                'id', 'token__jti'
+            ).iterator(chunk_size=REBUILD_CHUNK_SIZE):
+                bloom.add(jti)
+                last_id = blacklisted_id
+                added += 1
+            self._filter, self._count, self._last_id = bloom, added, last_id
+            self._synced_at = time.monotonic()
+
+    def build(self):
+        """
+        Build the filter unless it is built already, waiting for a build in another thread.
+        """
+        with self._build_lock:
+            if self._filter is None:
+                self.rebuild()
+
+    def sync(self):
+        """
+        Add the tokens that were blacklisted since the last sync.
+        """
+        with self._lock:
+            self._version = self.shared_cache.get(VERSION_KEY)
+            rows = BlacklistedToken.objects.filter(
+                id__gt=max(0, self._last_id - SYNC_OVERLAP)
+            ).order_by('id').values_list('id', 'token__jti')
+            last_id = self._last_id
+            for blacklisted_id, jti in rows.iterator(chunk_size=REBUILD_CHUNK_SIZE):
+                # Adding every token of the overlap, a lower id may have committed since the last sync
+                if jti not in self._filter:
+                    self._filter.add(jti)
+                    self._count += 1
+                last_id = max(last_id, blacklisted_id)
+            self._last_id = last_id
+            self._synced_at = time.monotonic()
+            full = self._count > self._filter.capacity
+        if full:
+            # The error rate grows past the capacity, so building a bigger filter
+            self.rebuild()
+
+    def add(self, jti):
+        """
+        Add a token that this process has blacklisted, and move the shared version once the
+        blacklist row is committed, so the other processes read it on their next check.
+        """
+        if not self.enabled:
+            return
+        if self._filter is not None:
+            with self._lock:
+                self._filter.add(jti)
+        transaction.on_commit(self._bump_version)
+
+    def _bump_version(self):
+        try:
+            self.shared_cache.incr(VERSION_KEY)
+        except ValueError:
+            self.shared_cache.add(VERSION_KEY, 1, timeout=None)
+
+    def might_contain(self, jti):
+        """
+        Return False if the token is surely not blacklisted, or True if it may be.
+        """
+        if not self.enabled:
+            return True
+        if self._filter is None:
+            self.build()
+        elif (
+            self.shared_cache.get(VERSION_KEY) != self._version
+            or time.monotonic() - self._synced_at >= self.sync_interval
+        ):
+            self.sync()
+        return jti in self._filter
+
+
+
+@lru_cache(maxsize=None)
+def get_blacklist_filter():
+    return BlacklistFilter()
+
+
+def preload_blacklist_filter():
+    """
+    Build the filter of the process when the server starts, before the first request.
+    A database that is not migrated yet leaves the filter to be built by the first check.
+    """
+    blacklist_filter = get_blacklist_filter()
+    if not blacklist_filter.enabled:
+        logger.warning('The token blacklist filter is off, SHARED_CACHE_ALIAS is not shared by the processes')
+        return
+    try:
+        blacklist_filter.build()
+    except DatabaseError:
+        logger.exception('The token blacklist filter could not be built at startup')
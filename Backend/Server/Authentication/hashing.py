@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, make_password
+
+
+class HashingPoolFull(Exception):
+    """
+    Raised when the password hashing pool has no room for another job.
+    """
+
+
+
+class PasswordHashingPool:
+    """
+    A bounded pool of threads that run the password hashing of the async login views.
+
+    The hashers spend their time in hashlib, which releases the GIL, so the hashing runs in
+    parallel to the event loop and to the thread that runs the sync views. At most
+    workers + queue_depth jobs are accepted at a time, and a job beyond that limit is
+    rejected at once instead of waiting, so a burst of logins can not pile up without bound.
+    """
+
+    def __init__(self, workers, queue_depth):
+        self.workers = workers
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password-hashing')
+        self.slots = threading.BoundedSemaphore(workers + queue_depth)
+
+    def submit(self, fn, *args):
+        """
+        Submit a hashing job to the pool.
+
+        Args:
+            fn (callable): The hashing function.
+            args: The arguments of the function.
+
+        Returns:
+            Future: The future of the job.
+
+        Raises:
+            HashingPoolFull: If the pool and its queue are full.
+        """
+        if not self.slots.acquire(blocking=False):
+            raise HashingPoolFull
+        return self._start(fn, *args)
+
+    def _start(self, fn, *args):
+        # Running a job whose slot is already taken, and freeing the slot when it is done
+        try:
+            future = self.executor.submit(fn, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return future
+
+    async def run(self, fn, *args):
+        """
+        Run a hashing job on the pool without blocking the event loop.
+        """
+        return await asyncio.wrap_future(self.submit(fn, *args))
+
+    async def check_password(self, password, encoded):
+        """
+        Check a raw password against an encoded one on the pool.
+        The hash is not upgraded to the current hasher, so the job never touches the database.
+        """
+        return await self.run(check_password, password, encoded)
+
+    async def make_password(self, password):
+        return await self.run(make_password, password)
+
+    def make_passwords(self, passwords):
+        """
+        Hash many passwords on the pool for a sync caller, such as the bulk user provisioning.
+
+        At most one job per worker is in the pool at a time, and the caller waits for a free
+        slot instead of being rejected, so a bulk job never takes the queue of the logins.
+
+        Args:
+            passwords (iterable): The raw passwords.
+
+        Yields:
+            str: The encoded passwords, in the order of the raw ones.
+        """
+        pending = deque()
+        for password in passwords:
+            if len(pending) >= self.workers:
+                yield pending.popleft().result()
+            self.slots.acquire()
+            pending.append(self._start(make_password, password))
+        while pending:
+            yield pending.popleft().result()
+
+
+
+@lru_cache(maxsize=None)
+def get_hashing_pool():
+    return PasswordHashingPool(settings.AUTH_HASHING_WORKERS, settings.AUTH_HASHING_QUEUE_DEPTH)
@@ -0,0 +1,38 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Authentication.pruning import prune_expired_tokens
+
+
+
+class Command(BaseCommand):
+    help = 'Delete the expired outstanding refresh tokens and their blacklist entries.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of tokens deleted by a single transaction.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Keep running and prune every INTERVAL seconds.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Running a single prune and reporting it
+            result = prune_expired_tokens(batch_size=options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    'Pruned {outstanding} outstanding and {blacklisted} blacklisted tokens '
+                    'in {batches} batches in {elapsed:.3f}s'.format(**result)
+                )
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,19 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Authentication', '0005_delete_onetimepassword'),
+        ('token_blacklist', '0012_alter_outstandingtoken_user'),
+    ]
+
+    # The outstanding tokens belong to the token_blacklist app, so the index of the
+    # expired token pruning is created on its table from here
+    operations = [
+        migrations.RunSQL(
+            sql='CREATE INDEX IF NOT EXISTS token_outstanding_expires_idx '
+                'ON token_blacklist_outstandingtoken (expires_at)',
+            reverse_sql='DROP INDEX IF EXISTS token_outstanding_expires_idx',
+        ),
+    ]
@@ -0,0 +1,71 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+
+
+logger = logging.getLogger(__name__)
+
+
+
+def prune_expired_tokens(batch_size=None, now=None):
+    """
+    Delete the outstanding refresh tokens that have expired, with their blacklist entries.
+
+    An expired token is rejected by its signature check before the blacklist is read, so
+    neither of its rows is needed anymore. The expired tokens are read through the
+    expires_at index, and every batch is deleted in its own short transaction, so the
+    tables are never locked for long and an interrupted run is resumed by running it again.
+    The Bloom filters of the blacklist keep the pruned JTIs until they are rebuilt, which
+    only costs a confirming query for a token that has expired anyway.
+
+    Args:
+        batch_size (int, optional): The maximum number of tokens deleted by a single
+            transaction. Defaults to AUTH_TOKEN_PRUNE_BATCH_SIZE.
+        now (datetime, optional): The time that the expiry is checked against. Defaults
+            to the current time.
+
+    Returns:
+        dict: The number of pruned outstanding and blacklisted tokens, the number of
+            batches and the elapsed seconds.
+    """
+    batch_size = batch_size or settings.AUTH_TOKEN_PRUNE_BATCH_SIZE
+    now = now or timezone.now()
+    started = time.monotonic()
+
+    # The expired tokens, read through the expires_at index
+    expired = OutstandingToken.objects.filter(expires_at__lt=now)
+
+    outstanding = 0
+    blacklisted = 0
+    batches = 0
+    while True:
+        ids = list(expired.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            # Deleting the blacklist entries first, they reference the outstanding tokens
+            blacklisted += BlacklistedToken.objects.filter(token_id__in=ids).delete()[0]
+            # The blacklist entries are gone, so deleting the tokens without collecting their relations
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM {} WHERE id IN ({})'.format(
+                        connection.ops.quote_name(OutstandingToken._meta.db_table), ', '.join(['%s'] * len(ids))
+                    ),
+                    ids,
+                )
+                outstanding += cursor.rowcount
+        batches += 1
+        if len(ids) < batch_size:
+            break
+
+    elapsed = time.monotonic() - started
+    logger.info(
+        'Pruned %d outstanding and %d blacklisted tokens in %d batches in %.3fs',
+        outstanding, blacklisted, batches, elapsed,
+    )
+    return {'outstanding': outstanding, 'blacklisted': blacklisted, 'batches': batches, 'elapsed': elapsed}
@@ -1,14 +1,17 @@
 from rest_framework import serializers
 from rest_framework import validators
 
+from rest_framework_simplejwt import serializers as jwt_serializers
 from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
-from rest_framework_simplejwt.tokens import RefreshToken
 
 from Users.models import User
 
+from .tokens import RefreshToken
+
 
 class TokenObtainSerializer(TokenObtainPairSerializer):
     # Custom Token Obtain Serializer that inherits from TokenObtainPairSerializer
+    token_class = RefreshToken
     
     @classmethod
     def get_token(cls, user):
@@ -30,10 +33,15 @@ class TokenObtainSerializer(TokenObtainPairSerializer):
         return token
     
 
-# Define the LoginSerializer class
-class LoginSerializer(serializers.Serializer):
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    # Custom Token Refresh Serializer that checks the blacklist through the Bloom filter
+    token_class = RefreshToken
+
+
+# Define the LoginFieldsSerializer class
+class LoginFieldsSerializer(serializers.Serializer):
     """
-    Serializer to validate email and password.
+    Serializer to validate the shape of the email and the password, without touching the database.
     """
     # Define the email field
     email = serializers.CharField(max_length=255)
@@ -41,15 +49,6 @@ class LoginSerializer(serializers.Serializer):
     # Define the password field
     password = serializers.CharField(max_length=255, write_only=True)
 
-    # Validate the email field
-    def validate_email(self, value):
-        # Check if the email exists in the database
-        if not User.objects.filter(email=value).exists():
-            # Raise a validation error if the email does not exist
-            raise serializers.ValidationError('email does not exist')
-        # Return the validated email
-        return value
-
     # Validate the password field
     def validate_password(self, value):
         # Check if the password is at least 8 characters long
@@ -59,6 +58,13 @@ class LoginSerializer(serializers.Serializer):
         # Return the validated password
         return value
 
+
+# Define the LoginSerializer class
+class LoginSerializer(LoginFieldsSerializer):
+    """
+    Serializer to validate email and password.
+    """
+
     # Validate the entire serializer
     def validate(self, data):
         # Get the email and password from the data
@@ -70,14 +76,20 @@ class LoginSerializer(serializers.Serializer):
             # Raise a validation error if either email or password is missing
             raise serializers.ValidationError('Both email and password are required')
         
-        # Get the user object from the database
-        user = User.objects.get(email=email)
+        try:
+            # Get the user object from the database, with the only query of the login
+            user = User.objects.filter_by_email(email).get()
+        except User.DoesNotExist:
+            # Raise a validation error if the email does not exist
+            raise serializers.ValidationError({'email': ['email does not exist']})
         
         # Check if the password is correct
         if not user.check_password(password):
             # Raise a validation error if the password is incorrect
             raise serializers.ValidationError('Invalid password')
         
+        # Pass the user on to the token issuance
+        data['user'] = user
         # Return the validated data
         return data
     
@@ -144,7 +156,7 @@ class UserRegisterSerializer(serializers.Serializer):
     # Define the email field with validation to ensure uniqueness
     email = serializers.EmailField(
         validators=[
-            validators.UniqueValidator(queryset=User.objects.all())  # Ensure email is unique in User model
+            validators.UniqueValidator(queryset=User.objects.all(), lookup='iexact')  # Ensure email is unique in User model, ignoring the case
         ],
         required=True,  # Email is required
         help_text="Enter a unique email address"  # Help text for the email field
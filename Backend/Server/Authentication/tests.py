@@ -1,3 +1,360 @@
-from django.test import TestCase
+import io
+import json
+import threading
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync, iscoroutinefunction
+from django.core.cache import caches
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient, APIRequestFactory
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken, BlacklistedToken
+
+from Users.models import User
+
+from .blacklist import BlacklistFilter, BloomFilter, get_blacklist_filter, preload_blacklist_filter
+from .hashing import HashingPoolFull, PasswordHashingPool
+from .pruning import prune_expired_tokens
+from .tokens import RefreshToken
+from .views import LoginAPIView, AsyncLoginAPIView, TokenObtainView, AsyncTokenObtainView
+
+
+class LoginQueryCountTests(TestCase):
+    """
+    A login fetches the user once, through the case-insensitive email index,
+    and then only inserts the outstanding refresh token.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bob', 'bob@example.com', 'Bob', 'pass12345')
+
+    def setUp(self):
+        self.factory = APIRequestFactory()
+        self.credentials = {'email': 'Bob@Example.com', 'password': 'pass12345'}
+
+    def test_sync_login_queries(self):
+        request = self.factory.post('/auth/login/', self.credentials, format='json')
+        with self.assertNumQueries(2):
+            response = LoginAPIView.as_view()(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('access', response.data)
+
+    def test_unknown_email_queries(self):
+        with self.assertNumQueries(1):
+            response = APIClient().post(
+                '/auth/login/', {'email': 'nobody@example.com', 'password': 'pass12345'}, format='json'
+            )
+        self.assertEqual(response.status_code, 400)
+
+    def test_email_lookup_uses_lower_index(self):
+        queryset = User.objects.filter_by_email('Bob@Example.com')
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('users_email_lower_uniq', plan)
+        self.assertEqual(queryset.get(), self.user)
+
+
+
+@override_settings(SHARED_CACHE_SINGLE_PROCESS=True)
+class BlacklistFilterTests(TestCase):
+    """
+    A refresh token that has not been blacklisted is accepted without a blacklist query,
+    and a token blacklisted by any process is rejected by the next check of every process.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bob', 'bob@example.com', 'Bob', 'pass12345')
+
+    def setUp(self):
+        caches['shared'].clear()
+        get_blacklist_filter.cache_clear()
+        self.addCleanup(get_blacklist_filter.cache_clear)
+        self.client = APIClient()
+
+    def test_bloom_filter_error_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for index in range(1000):
+            bloom.add(str(index))
+        self.assertTrue(all(str(index) in bloom for index in range(1000)))
+        false_positives = sum(str(index) in bloom for index in range(1000, 11000))
+        self.assertLess(false_positives, 300)
+
+    def test_refresh_skips_blacklist_check(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        preload_blacklist_filter()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(response.status_code, 200)
+        # The only blacklist queries are the ones that blacklist the rotated token
+        checks = [
+            query['sql'] for query in queries.captured_queries
+            if query['sql'].startswith('SELECT') and 'token_blacklist_blacklistedtoken' in query['sql']
+        ]
+        self.assertEqual(len(checks), 1)
+
+    def test_rotated_token_is_rejected(self):
+        refresh = str(RefreshToken.for_user(self.user))
+        first = self.client.post('/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(first.status_code, 200)
+        reused = self.client.post('/auth/token/refresh/', {'refresh': refresh}, format='json')
+        self.assertEqual(reused.status_code, 401)
+        rotated = self.client.post('/auth/token/refresh/', {'refresh': first.data['refresh']}, format='json')
+        self.assertEqual(rotated.status_code, 200)
+
+    def test_token_blacklisted_by_another_process_is_seen_at_once(self):
+        # Two processes that share only the database and the shared cache
+        this_process = get_blacklist_filter()
+        other_process = BlacklistFilter(sync_interval=3600)
+        token = RefreshToken.for_user(self.user)
+        self.assertFalse(other_process.might_contain(token['jti']))
+        with self.captureOnCommitCallbacks(execute=True):
+            token.blacklist()
+        self.assertTrue(this_process.might_contain(token['jti']))
+        # The sync interval has not passed, the moved version makes the other process read the blacklist
+        self.assertTrue(other_process.might_contain(token['jti']))
+
+    def test_token_committed_out_of_id_order_is_seen(self):
+        late, early = (RefreshToken.for_user(self.user) for _ in range(2))
+        blacklist_filter = BlacklistFilter(sync_interval=3600)
+        BlacklistedToken.objects.create(id=5, token=OutstandingToken.objects.get(jti=early['jti']))
+        blacklist_filter.build()
+        # A transaction that took the lower id commits after the filter has read the higher one
+        BlacklistedToken.objects.create(id=4, token=OutstandingToken.objects.get(jti=late['jti']))
+        blacklist_filter._bump_version()
+        self.assertTrue(blacklist_filter.might_contain(late['jti']))
+        self.assertTrue(blacklist_filter.might_contain(early['jti']))
+        self.assertEqual((blacklist_filter._last_id, blacklist_filter._count), (5, 2))
+
+    def test_filter_is_off_without_a_shared_cache(self):
+        token = RefreshToken.for_user(self.user)
+        with self.settings(SHARED_CACHE_SINGLE_PROCESS=False):
+            blacklist_filter = BlacklistFilter()
+        self.assertFalse(blacklist_filter.enabled)
+        # Every check is confirmed with SQL
+        self.assertTrue(blacklist_filter.might_contain(token['jti']))
+        with self.settings(SHARED_CACHE_SINGLE_PROCESS=False):
+            get_blacklist_filter.cache_clear()
+            token.blacklist()
+            with self.assertRaises(TokenError):
+                RefreshToken(str(token))
+
+    def test_full_filter_is_rebuilt_bigger(self):
+        blacklist_filter = BlacklistFilter(capacity=4, sync_interval=0)
+        blacklist_filter.build()
+        self.assertEqual(blacklist_filter._filter.capacity, 4)
+        tokens = [RefreshToken.for_user(self.user) for _ in range(6)]
+        for token in tokens:
+            super(RefreshToken, token).blacklist()
+        self.assertTrue(all(blacklist_filter.might_contain(token['jti']) for token in tokens))
+        self.assertEqual(blacklist_filter._filter.capacity, 12)
+
+    def test_preload_builds_the_filter(self):
+        token = RefreshToken.for_user(self.user)
+        super(RefreshToken, token).blacklist()
+        preload_blacklist_filter()
+        blacklist_filter = get_blacklist_filter()
+        self.assertIsNotNone(blacklist_filter._filter)
+        with self.assertNumQueries(0):
+            self.assertTrue(blacklist_filter.might_contain(token['jti']))
+            self.assertFalse(blacklist_filter.might_contain('never-blacklisted'))
+
+
+class PruneExpiredTokensTests(TestCase):
+    """
+    The pruning deletes the expired tokens and their blacklist entries in batches,
+    through the expires_at index, and keeps the live tokens.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bob', 'bob@example.com', 'Bob', 'pass12345')
+
+    def test_prunes_expired_tokens_in_batches(self):
+        now = timezone.now()
+        tokens = OutstandingToken.objects.bulk_create([
+            OutstandingToken(
+                user=self.user, jti='jti-{}'.format(index), token='token-{}'.format(index),
+                expires_at=now + timedelta(days=-1 if index < 5 else 1),
+            )
+            for index in range(8)
+        ])
+        BlacklistedToken.objects.bulk_create([BlacklistedToken(token=token) for token in tokens[::2]])
+
+        result = prune_expired_tokens(batch_size=2, now=now)
+        self.assertEqual(result['outstanding'], 5)
+        self.assertEqual(result['blacklisted'], 3)
+        self.assertEqual(result['batches'], 3)
+        self.assertEqual(
+            sorted(OutstandingToken.objects.values_list('jti', flat=True)), ['jti-5', 'jti-6', 'jti-7']
+        )
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+    def test_expired_lookup_uses_index(self):
+        queryset = OutstandingToken.objects.filter(expires_at__lt=timezone.now()).values_list('id', flat=True)[:10]
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + sql, params)
+            plan = ' '.join(str(row[-1]) for row in cursor.fetchall())
+        self.assertIn('token_outstanding_expires_idx', plan)
+
+    def test_command_keeps_pruning_every_interval(self):
+        stdout = io.StringIO()
+        # Stopping the loop on its second sleep, like a stopped scheduler would
+        with mock.patch(
+            'Authentication.management.commands.prune_tokens.time.sleep', side_effect=[None, KeyboardInterrupt]
+        ) as sleep:
+            with self.assertRaises(KeyboardInterrupt):
+                call_command('prune_tokens', interval=30, stdout=stdout)
+        sleep.assert_called_with(30)
+        self.assertEqual(stdout.getvalue().count('Pruned'), 2)
+
+        stdout = io.StringIO()
+        call_command('prune_tokens', stdout=stdout)
+        self.assertEqual(stdout.getvalue().count('Pruned'), 1)
+
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    """
+    The user of a JWT is cached under an auth version in the shared cache, so a change
+    made by any process is seen by the next request of every process.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bob', 'bob@example.com', 'Bob', 'pass12345')
+
+    def setUp(self):
+        caches['default'].clear()
+        caches['shared'].clear()
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def count_user_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/tasks/user-tasks/stats/')
+        user_queries = [query for query in queries.captured_queries if 'FROM "Users_user"' in query['sql']]
+        return response.status_code, len(user_queries)
+
+    @override_settings(SHARED_CACHE_SINGLE_PROCESS=True)
+    def test_cached_user_is_invalidated_by_a_save(self):
+        self.assertEqual(self.count_user_queries(), (200, 1))
+        self.assertEqual(self.count_user_queries(), (200, 0))
+        # Deactivating the user through another copy of the row, as another process would
+        user = User.objects.get(pk=self.user.pk)
+        user.is_active = False
+        user.save()
+        self.assertEqual(self.count_user_queries()[0], 401)
+
+    def test_users_are_not_cached_without_a_shared_cache(self):
+        self.assertEqual(self.count_user_queries(), (200, 1))
+        self.assertEqual(self.count_user_queries(), (200, 1))
+
+
+
+class AsyncLoginTests(TransactionTestCase):
+    """
+    The async login views answer like the sync views, run their sync work off the thread of
+    the sync views and reject the logins that the hashing pool has no room for.
+    A TransactionTestCase, because the worker threads read the rows with their own connections.
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user('bob', 'bob@example.com', 'Bob', 'pass12345')
+        self.inactive = User.objects.create_user('eve', 'eve@example.com', 'Eve', 'pass12345')
+        User.objects.filter(pk=self.inactive.pk).update(is_active=False)
+        self.factory = APIRequestFactory()
+
+    def post(self, view, data):
+        request = self.factory.post('/auth/token/', data, format='json')
+        response = async_to_sync(view)(request) if iscoroutinefunction(view) else view(request)
+        if hasattr(response, 'render'):
+            response.render()
+        return response.status_code, json.loads(response.content)
+
+    def test_async_login_only_looks_the_user_up_on_the_sync_thread(self):
+        request = self.factory.post('/auth/login/', {'email': 'Bob@Example.com', 'password': 'pass12345'}, format='json')
+        # The refresh token is inserted by a worker thread with its own connection
+        with self.assertNumQueries(1):
+            response = async_to_sync(AsyncLoginAPIView.as_view())(request)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(OutstandingToken.objects.filter(user=self.user).exists())
+
+    def test_async_token_view_answers_like_simplejwt(self):
+        cases = [
+            {'email': 'bob@example.com', 'password': 'pass12345'},
+            {'email': 'Bob@Example.com', 'password': 'pass12345'},
+            {'email': 'bob@example.com', 'password': 'wrong'},
+            {'email': 'nobody@example.com', 'password': 'pass12345'},
+            {'email': 'eve@example.com', 'password': 'pass12345'},
+            {'email': 'bob@example.com'},
+            {},
+        ]
+        for data in cases:
+            with self.subTest(data=data):
+                sync_status, sync_body = self.post(TokenObtainView.as_view(), data)
+                async_status, async_body = self.post(AsyncTokenObtainView.as_view(), data)
+                self.assertEqual(async_status, sync_status)
+                if sync_status == 200:
+                    self.assertEqual(set(async_body), set(sync_body))
+                    self.assertEqual(
+                        AccessToken(async_body['access'])['user_id'], AccessToken(sync_body['access'])['user_id']
+                    )
+                else:
+                    self.assertEqual(async_body, sync_body)
+        # Both views update the last login
+        self.user.refresh_from_db()
+        self.assertIsNotNone(self.user.last_login)
+
+    def test_full_hashing_pool_answers_503(self):
+        with mock.patch.object(PasswordHashingPool, 'submit', side_effect=HashingPoolFull):
+            for view in (AsyncLoginAPIView.as_view(), AsyncTokenObtainView.as_view()):
+                with self.subTest(view=view):
+                    request = self.factory.post(
+                        '/auth/login/', {'email': 'bob@example.com', 'password': 'pass12345'}, format='json'
+                    )
+                    response = async_to_sync(view)(request)
+                    self.assertEqual(response.status_code, 503)
+                    self.assertEqual(response['Retry-After'], '1')
+
+
+
+class PasswordHashingPoolTests(SimpleTestCase):
+    """
+    The pool accepts workers + queue_depth jobs at a time and rejects the next ones at once.
+    """
+
+    def test_pool_rejects_jobs_past_its_queue(self):
+        pool = PasswordHashingPool(workers=4, queue_depth=32)
+        self.addCleanup(pool.executor.shutdown)
+        release = threading.Event()
+        futures = [pool.submit(release.wait) for _ in range(36)]
+        with self.assertRaises(HashingPoolFull):
+            pool.submit(release.wait)
+
+        # The slots are freed when the jobs are done
+        release.set()
+        for future in futures:
+            future.result(timeout=5)
+        self.assertTrue(pool.submit(lambda: True).result(timeout=5))
+
+    def test_bulk_hashing_leaves_the_queue_to_the_logins(self):
+        pool = PasswordHashingPool(workers=2, queue_depth=2)
+        self.addCleanup(pool.executor.shutdown)
+        with mock.patch('Authentication.hashing.make_password', side_effect=lambda password: f'hashed:{password}'):
+            hashes = pool.make_passwords(f'password{i}' for i in range(5))
+            self.assertEqual(next(hashes), 'hashed:password0')
+            # The bulk job holds at most one slot per worker, the other slots are free for the logins
+            self.assertLessEqual(pool.slots._value, 4)
+            self.assertGreaterEqual(pool.slots._value, 2)
+            self.assertEqual(list(hashes), [f'hashed:password{i}' for i in range(1, 5)])
@@ -0,0 +1,25 @@
+from rest_framework_simplejwt import tokens
+from rest_framework_simplejwt.settings import api_settings
+
+from .blacklist import get_blacklist_filter
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    Refresh token that checks the blacklist through the Bloom filter of the process.
+
+    A token that the filter does not contain has never been blacklisted, so it is accepted
+    without a query, and only the possible hits are confirmed against the blacklist table.
+    """
+
+    def check_blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        # Only a possible hit of the filter has to be confirmed with SQL
+        if get_blacklist_filter().might_contain(jti):
+            super().check_blacklist()
+
+    def blacklist(self):
+        blacklisted = super().blacklist()
+        # Adding the token to the filter so its next use is confirmed against the table
+        get_blacklist_filter().add(self.payload[api_settings.JTI_CLAIM])
+        return blacklisted
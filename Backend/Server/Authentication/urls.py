@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
 from . import views
@@ -7,13 +8,22 @@ from . import views
 app_name = "authentication"
 
 
+# The async views check the passwords off the event loop when the server runs under ASGI
+if settings.AUTH_ASYNC_LOGIN:
+    token_obtain_view = views.AsyncTokenObtainView.as_view()
+    login_view = views.AsyncLoginAPIView.as_view()
+else:
+    token_obtain_view = views.TokenObtainView.as_view()
+    login_view = views.LoginAPIView.as_view()
+
+
 urlpatterns = [
     # Tokens 
-    path('token/', views.TokenObtainView.as_view(), name="token_obtain"),
+    path('token/', token_obtain_view, name="token_obtain"),
     path('token/refresh/', TokenRefreshView.as_view(), name="token_refresh"),
 
     # Login
-    path('login/', views.LoginAPIView.as_view(), name="login"),
+    path('login/', login_view, name="login"),
     # Logout
     path('logout/', views.LogoutAPIView.as_view(), name='logout'),
     path('register/', views.UserRegisterView.as_view(), name='register'),
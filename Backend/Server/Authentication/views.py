@@ -1,17 +1,29 @@
-from django.contrib.auth import authenticate, login
+import json
+
+from asgiref.sync import sync_to_async
 
+from django.contrib.auth import authenticate, login
+from django.contrib.auth.models import update_last_login
+from django.db import close_old_connections
+from django.http import JsonResponse
+from django.utils.decorators import method_decorator
+from django.views import View
+from django.views.decorators.csrf import csrf_exempt
 
 from rest_framework.views import APIView, Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
 
 from rest_framework_simplejwt.views import TokenObtainPairView
-from rest_framework_simplejwt.tokens import RefreshToken
-from rest_framework.exceptions import ValidationError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework.exceptions import ValidationError, AuthenticationFailed
 
 from Users.models import User
 
-from .serializers import TokenObtainSerializer, LoginSerializer, LogoutSerializer, UserRegisterSerializer
+from .serializers import TokenObtainSerializer, LoginSerializer, LoginFieldsSerializer, LogoutSerializer, UserRegisterSerializer
+from .hashing import get_hashing_pool, HashingPoolFull
+from .authentication import CachedJWTAuthentication
+from .tokens import RefreshToken
 
 
 
@@ -42,11 +54,8 @@ class LoginAPIView(APIView):
         else:
             # Check if the serializer is valid
             if serializer.is_valid():
-                # Extract the email from the validated data
-                email = serializer.validated_data['email']
-                
-                # Retrieve the user instance from the database
-                user = User.objects.get(email=email)
+                # Get the user that the serializer has fetched
+                user = serializer.validated_data['user']
 
                 # Check if the user is active
                 if not user.is_active:
@@ -143,4 +152,167 @@ class UserRegisterView(APIView):
             # Return a response with a validation error message
             return Response({'error': 'Validation error'}, status=status.HTTP_400_BAD_REQUEST)
         # Call the parent class's handle_exception method for other exceptions
-        return super().handle_exception(exc)
\ No newline at end of file
+        return super().handle_exception(exc)
+
+
+
+def parse_request_data(request):
+    """
+    Read the JSON or form body of a plain Django request.
+
+    :param request: The incoming request object
+    :return: The data as a dict, or None if the body is not valid
+    """
+    if request.content_type == 'application/json':
+        try:
+            data = json.loads(request.body or b'{}')
+        except ValueError:
+            return None
+        return data if isinstance(data, dict) else None
+    return request.POST.dict()
+
+
+def in_worker_thread(fn):
+    """
+    Wrap a sync function for the async views, to run on a thread of the asgiref pool instead
+    of the single thread of the sync views, so the logins never queue behind the other endpoints.
+    The database connection of the thread is closed after the call like at the end of a request.
+
+    :param fn: The sync function
+    :return: The async function
+    """
+    def call(*args, **kwargs):
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            close_old_connections()
+    return sync_to_async(call, thread_sensitive=False)
+
+
+async def get_jwt_user(request):
+    """
+    Authenticate the JWT of a plain Django request, like the DRF views do.
+
+    :param request: The incoming request object
+    :return: The authenticated user, or None if the request has no token
+    :raises AuthenticationFailed: If the token is not valid
+    """
+    result = await in_worker_thread(CachedJWTAuthentication().authenticate)(request)
+    return result[0] if result else None
+
+
+def hashing_pool_full_response():
+    # The login is rejected at once instead of waiting for a hashing thread
+    response = JsonResponse({'error': 'Too many logins at the moment, try again later'}, status=503)
+    response['Retry-After'] = '1'
+    return response
+
+
+# Define an async view for handling user login
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncLoginAPIView(View):
+    """
+    Async login view with the same requests and responses as LoginAPIView.
+
+    The password is checked on the bounded hashing pool, so under ASGI a burst of logins
+    never blocks the event loop or the thread that runs the sync views of the other endpoints.
+    """
+    http_method_names = ['post']
+
+    # Define the POST method to handle login requests
+    async def post(self, request):
+        """
+        Handle POST requests to the login view.
+        
+        :param request: The incoming request object
+        :return: A response object with the refresh and access tokens
+        """
+        try:
+            if await get_jwt_user(request) is not None:
+                return JsonResponse({"message": "You are already authenticated"}, status=400)
+        except AuthenticationFailed as exc:
+            return JsonResponse({'detail': str(exc.detail)}, status=exc.status_code)
+
+        data = parse_request_data(request)
+        if data is None:
+            return JsonResponse({'error': 'Validation error'}, status=400)
+
+        # Validate the shape of the data, which needs no database query
+        serializer = LoginFieldsSerializer(data=data)
+        if not serializer.is_valid():
+            return JsonResponse(serializer.errors, status=400)
+        email = serializer.validated_data['email']
+        password = serializer.validated_data['password']
+
+        # Retrieve the user instance from the database
+        try:
+            user = await User.objects.filter_by_email(email).aget()
+        except User.DoesNotExist:
+            return JsonResponse({'email': ['email does not exist']}, status=400)
+
+        # Check the password on the hashing pool
+        try:
+            valid = await get_hashing_pool().check_password(password, user.password)
+        except HashingPoolFull:
+            return hashing_pool_full_response()
+        if not valid:
+            return JsonResponse({'non_field_errors': ['Invalid password']}, status=400)
+
+        # Check if the user is active
+        if not user.is_active:
+            return JsonResponse({'error': 'User  is not active'}, status=401)
+
+        # Create a refresh token for the user
+        refresh = await in_worker_thread(RefreshToken.for_user)(user)
+
+        # Return a response with the refresh and access tokens
+        return JsonResponse({'refresh': str(refresh), 'access': str(refresh.access_token)}, status=200)
+
+
+# Define an async view for obtaining a token pair
+@method_decorator(csrf_exempt, name='dispatch')
+class AsyncTokenObtainView(View):
+    """
+    Async token view with the same requests and responses as TokenObtainView.
+
+    The password is checked on the bounded hashing pool instead of through authenticate().
+    """
+    http_method_names = ['post']
+
+    async def post(self, request):
+        data = parse_request_data(request)
+        if data is None:
+            return JsonResponse({'detail': 'JSON parse error'}, status=400)
+
+        # Validate the fields of the serializer, the credentials are checked below
+        serializer = TokenObtainSerializer(data=data)
+        try:
+            attrs = serializer.to_internal_value(data)
+        except ValidationError as exc:
+            return JsonResponse(exc.detail, status=400)
+        password = attrs['password']
+
+        # The same lookup as the model backend, through the case-insensitive unique email index
+        try:
+            user = await User.objects.filter_by_email(attrs[TokenObtainSerializer.username_field]).aget()
+        except User.DoesNotExist:
+            user = None
+        try:
+            if user is None:
+                # Hashing the password anyway, like the model backend, so a missing user takes as long
+                await get_hashing_pool().make_password(password)
+                valid = False
+            else:
+                valid = await get_hashing_pool().check_password(password, user.password)
+        except HashingPoolFull:
+            return hashing_pool_full_response()
+
+        if not valid or not api_settings.USER_AUTHENTICATION_RULE(user):
+            return JsonResponse({'detail': str(serializer.error_messages['no_active_account'])}, status=401)
+
+        # Create the token pair with the custom claims and update the last login
+        refresh = await in_worker_thread(TokenObtainSerializer.get_token)(user)
+        if api_settings.UPDATE_LAST_LOGIN:
+            await in_worker_thread(update_last_login)(None, user)
+
+        return JsonResponse({'refresh': str(refresh), 'access': str(refresh.access_token)}, status=200)
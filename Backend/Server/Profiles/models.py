@@ -50,6 +50,9 @@ class Profile(models.Model):
     # X field to store the user's X profile URL
     x_profile = models.URLField(null=True, blank=True)
 
+    # Last update field, used as the validator of conditional requests
+    updated_at = models.DateTimeField(auto_now=True)
+
 
     # Return the user's username as a string representation of the profile
     def __str__(self):
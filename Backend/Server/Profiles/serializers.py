@@ -1,8 +1,9 @@
 # Import necessary modules
 from rest_framework import serializers
 from .models import Profile
+from Server.fieldsets import SparseFieldsetMixin
 
-class ProfileSerializer(serializers.ModelSerializer):
+class ProfileSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the Profile model.
     """
@@ -12,8 +13,16 @@ class ProfileSerializer(serializers.ModelSerializer):
         model = Profile
         fields = "__all__"
         exelude = ["id"]
+        # The user field reads the username of the related user
+        sparse_field_sources = {'user': ['user', 'user__username']}
         
 
+    # The fields that an update can change
+    UPDATABLE_FIELDS = (
+        'image', 'age', 'bio', 'location', 'language', 'linkedin_profile', 'github_profile',
+        'gitlab_profile', 'instagram_profile', 'youtube_profile', 'x_profile',
+    )
+
     def get_user(slef, obj):
         return str(obj.user.username)
     
@@ -22,16 +31,9 @@ class ProfileSerializer(serializers.ModelSerializer):
         """
         Update the profile instance with the validated data.
         """
-        instance.image = validated_data.get('image', instance.image)
-        instance.age = validated_data.get('age', instance.age)
-        instance.bio = validated_data.get('bio', instance.bio)
-        instance.location = validated_data.get('location', instance.location)
-        instance.language = validated_data.get('language', instance.language)
-        instance.linkedin_profile = validated_data.get('linkedin_profile', instance.linkedin_profile)
-        instance.github_profile = validated_data.get('github_profile', instance.github_profile)
-        instance.gitlab_profile = validated_data.get('gitlab_profile', instance.gitlab_profile)
-        instance.instagram_profile = validated_data.get('instagram_profile', instance.instagram_profile)
-        instance.youtube_profile = validated_data.get('youtube_profile', instance.youtube_profile)
-        instance.x_profile = validated_data.get('x_profile', instance.x_profile)
-        instance.save()
+        # Saving only the changed columns, so the other columns of the row are never written back
+        update_fields = [name for name in self.UPDATABLE_FIELDS if name in validated_data]
+        for name in update_fields:
+            setattr(instance, name, validated_data[name])
+        instance.save(update_fields=update_fields + ['updated_at'])
         return instance
\ No newline at end of file
@@ -1,3 +1,49 @@
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
 
-# Create your tests here.
+from Users.models import User
+
+from .models import Profile
+
+
+
+class ProfilesSparseFieldsTests(TestCase):
+    """
+    The ?fields= param trims the output of the profile list and the columns that its query selects.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('admin', 'admin@example.com', 'Admin', 'pass12345')
+        Profile.objects.update_or_create(user=cls.staff, defaults={'bio': 'Not asked for', 'location': 'Berlin'})
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def get_profiles(self, fields):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/profiles/', {'fields': fields})
+        self.assertEqual(response.status_code, 200)
+        select, = [query['sql'] for query in queries if '"Profiles_profile"' in query['sql']]
+        return response, select
+
+    def test_fields_trim_the_output_and_the_columns(self):
+        response, sql = self.get_profiles('location')
+        self.assertEqual(response.data, [{'location': 'Berlin'}])
+        self.assertIn('"Profiles_profile"."location"', sql)
+        self.assertNotIn('"Profiles_profile"."bio"', sql)
+        self.assertNotIn('"Users_user"', sql)
+
+    def test_user_field_reads_the_username_in_the_same_query(self):
+        response, sql = self.get_profiles('user,location')
+        self.assertEqual(response.data, [{'user': 'admin', 'location': 'Berlin'}])
+        self.assertIn('"Users_user"."username"', sql)
+        self.assertNotIn('"Users_user"."password"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/profiles/', {'fields': 'location,secret'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
@@ -1,14 +1,36 @@
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
 
 from .models import Profile
 from .serializers import ProfileSerializer
 
-from Users.models import User
+from Server.fieldsets import get_sparse_fields, only_fields
 
+from Users import cache
+
+
+
+def profile_etag(request, user_username, *args, **kwargs):
+    """
+    Build the ETag of a profile from its updated_at field and the updated_at field of its user.
+    """
+    # Only the staff or the user themselves can validate the profile
+    if not (request.user.is_staff or request.user.username == user_username):
+        return None
+    # Reading only the validators from the database, a cached profile may be stale behind a write
+    validator = Profile.objects.filter(user__username=user_username).values_list(
+        'pk', 'updated_at', 'user__updated_at'
+    ).first()
+    if validator is None:
+        return None
+    pk, updated_at, user_updated_at = validator
+    return f'{pk}-{updated_at.timestamp()}-{user_updated_at.timestamp()}'
 
 
 class ProfileViewSet(viewsets.ModelViewSet):
@@ -32,20 +54,26 @@ class ProfileViewSet(viewsets.ModelViewSet):
         try:
             # Check if the user is staff
             if request.user.is_staff:
-                # Retrieve the queryset
-                queryset = Profile.objects.all()
+                # Get the fields asked for with ?fields=
+                fields = get_sparse_fields(request, self.serializer_class)
+                # Retrieve the queryset with only the columns of those fields
+                queryset = only_fields(Profile.objects.all(), self.serializer_class, fields)
                 # Serialize the queryset
-                serializer = self.serializer_class(queryset, many=True)
+                serializer = self.serializer_class(queryset, many=True, fields=fields)
                 # Return the serialized data
                 return Response(serializer.data)
             else:
                 # Return a 403 Forbidden response if the user is not staff
                 return Response({"error": "You do not have permission to view this content"}, status=status.HTTP_403_FORBIDDEN)
+        except ValidationError as e:
+            # Return a 400 Bad Request response if the fields are not valid
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             # Return a 500 Internal Server Error response if an exception occurs
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # Define the retrieve method for the viewset
+    @method_decorator(condition(etag_func=profile_etag))
     def retrieve(self, request, user_username, *args, **kwargs):
         """
         Handle GET requests to retrieve a single profile.
@@ -53,10 +81,10 @@ class ProfileViewSet(viewsets.ModelViewSet):
         try:
             # Check if the user is staff or the user themselves
             if request.user.is_staff or request.user.username == user_username:
-                # Getting the user instance
-                instance = get_object_or_404(User, username=user_username)
-                # Retrieve the profile instance
-                queryset = get_object_or_404(Profile, user=instance)
+                # Retrieve the profile instance and its user through the lookup cache
+                queryset = cache.get_profile(user_username)
+                if queryset is None:
+                    raise Profile.DoesNotExist
                 # Serialize the profile instance
                 serializer = self.serializer_class(queryset)
                 # Return the serialized data
@@ -76,21 +104,28 @@ class ProfileViewSet(viewsets.ModelViewSet):
         try:
             # Check if the user is staff or the user themselves
             if request.user.username == user_username or request.user.is_staff:
-                # Getting the user instance
-                instance = get_object_or_404(User, username=user_username)
-                # Retrieve the profile instance
-                queryset = get_object_or_404(Profile, user=instance)
-                # Serialize the profile instance
-                serializer = self.serializer_class(queryset, data=request.data, partial=True)
-                # Validate the serializer
-                serializer.is_valid(raise_exception=True)
-                # Update the profile instance
-                serializer.save()
+                with transaction.atomic():
+                    # Retrieve and lock the profile row, the cached copy may be stale and is only read by the GETs
+                    queryset = Profile.objects.select_related('user').select_for_update(of=('self',)).get(
+                        user__username=user_username
+                    )
+                    # Serialize the profile instance
+                    serializer = self.serializer_class(queryset, data=request.data, partial=True)
+                    # Validate the serializer
+                    serializer.is_valid(raise_exception=True)
+                    # Update the profile instance
+                    serializer.save()
                 # Return the serialized data
                 return Response(serializer.data, status.HTTP_202_ACCEPTED)
             else:
                 # Return a 403 Forbidden response if the user is not staff or the user themselves
                 return Response({"error": "You do not have permission to update this content"}, status=status.HTTP_403_FORBIDDEN)
+        except Profile.DoesNotExist:
+            # Return a 404 Not Found response if the profile does not exist
+            return Response({"error": "Profile not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            # Return a 400 Bad Request response if the data is not valid
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             # Return a 500 Internal Server Error response if an exception occurs
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Server.settings')
 
 application = get_asgi_application()
+
+# Building the token blacklist filter of the process before the first request
+from Authentication.blacklist import preload_blacklist_filter  # noqa: E402
+
+preload_blacklist_filter()
@@ -0,0 +1,24 @@
+from django.conf import settings
+from django.core.cache import caches
+
+
+# The cache backends that keep their entries in the memory of a single process
+PROCESS_LOCAL_BACKENDS = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+def get_shared_cache():
+    """
+    Return the cache that every process of the server reads and writes, for the versions
+    that invalidate the in-memory caches of the single processes.
+
+    Returns:
+        BaseCache: The SHARED_CACHE_ALIAS cache, or None if it is local to the process and
+            SHARED_CACHE_SINGLE_PROCESS does not declare that the server runs a single process.
+    """
+    alias = settings.SHARED_CACHE_ALIAS
+    if settings.CACHES[alias]['BACKEND'] in PROCESS_LOCAL_BACKENDS and not settings.SHARED_CACHE_SINGLE_PROCESS:
+        return None
+    return caches[alias]
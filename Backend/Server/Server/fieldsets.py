@@ -0,0 +1,64 @@
+from rest_framework import serializers
+
+
+
+class SparseFieldsetMixin:
+    """
+    Serializer mixin that keeps only the fields named in the `fields` argument.
+
+    A serializer can map its fields to the model columns they read through
+    `Meta.sparse_field_sources`, for the fields that are not plain model fields.
+    """
+
+    def __init__(self, *args, **kwargs):
+        # Pop the fields argument before the parent class sees it
+        fields = kwargs.pop('fields', None)
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            # Drop every field that was not asked for
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+
+
+def get_sparse_fields(request, serializer_class):
+    """
+    Return the readable fields asked for by the `fields` query param, or None for all of them.
+
+    Raises:
+        ValidationError: If a field does not exist or can not be read.
+    """
+    raw = request.query_params.get('fields')
+    if not raw:
+        return None
+    requested = list(dict.fromkeys(name.strip() for name in raw.split(',') if name.strip()))
+    readable = {name for name, field in serializer_class().fields.items() if not field.write_only}
+    unknown = [name for name in requested if name not in readable]
+    if unknown:
+        raise serializers.ValidationError({'fields': [f'Unknown fields: {", ".join(unknown)}.']})
+    return requested
+
+
+def only_fields(queryset, serializer_class, fields, extra=()):
+    """
+    Limit the queryset to the columns that the given serializer fields read.
+
+    Args:
+        queryset (QuerySet): The queryset to limit.
+        serializer_class (type): The serializer that is going to serialize the queryset.
+        fields (list): The serializer fields, None keeps every column.
+        extra (tuple, optional): Columns that are needed by the view itself, such as the ordering.
+
+    Returns:
+        QuerySet: The queryset that only reads the needed columns.
+    """
+    if fields is None:
+        return queryset
+    sources = getattr(serializer_class.Meta, 'sparse_field_sources', {})
+    columns = [column for name in fields for column in sources.get(name, [name])]
+    columns.extend(extra)
+    # Following the relations that are read through a lookup, in the same query
+    related = {column.split('__')[0] for column in columns if '__' in column}
+    if related:
+        # select_related() without any relation would join every foreign key and read all of its columns
+        queryset = queryset.select_related(*related)
+    return queryset.only(*columns)
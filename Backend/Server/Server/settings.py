@@ -133,7 +133,7 @@ AUTH_USER_MODEL = 'Users.User'
 REST_FRAMEWORK = {
     #  Authentications classes
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "Authentication.authentication.CachedJWTAuthentication",
     ),
 }
 
@@ -180,6 +180,9 @@ SIMPLE_JWT = {
     'TOKEN_USER_CLASS': 'rest_framework_simplejwt.models.TokenUser',
     'JTI_CLAIM': 'jti',
     
+    # Refresh serializer, checks the blacklist through the Bloom filter
+    'TOKEN_REFRESH_SERIALIZER': 'Authentication.serializers.TokenRefreshSerializer',
+    
     #  Sliding settings
     'SLIDING_TOKEN_REFRESH_EXP_CLAIM': 'refresh_exp',
     # Token sliding lifetime
@@ -187,4 +190,85 @@ SIMPLE_JWT = {
     'SLIDING_TOKEN_REFRESH_LIFETIME': timedelta(days=1),
 }
 
-CORS_ALLOW_ALL_ORIGINS = True
\ No newline at end of file
+CORS_ALLOW_ALL_ORIGINS = True
+
+# Cache
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'todo-plus',
+        'OPTIONS': {
+            'MAX_ENTRIES': 10000,   # Oldest entries are culled when the cache is full
+        },
+    },
+    # Cache shared by every process of the server, it holds the versions that invalidate the
+    # in-memory caches of the processes and the hit and miss counters. Set SHARED_CACHE_URL to a Redis URL when the
+    # server runs several processes
+    'shared': {
+        'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+        'LOCATION': os.environ['SHARED_CACHE_URL'],
+    } if os.environ.get('SHARED_CACHE_URL') else {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'todo-plus-shared',
+    },
+}
+
+# The alias of the cache shared by every process
+SHARED_CACHE_ALIAS = 'shared'
+# Trust a process-local shared cache, only for a server that runs a single process,
+# otherwise the caches that need the shared versions are turned off
+SHARED_CACHE_SINGLE_PROCESS = False
+
+# Seconds that a cached task list response lives, the lists are only cached with a shared cache
+TASKS_LIST_CACHE_TIMEOUT = 300
+
+# Tasks search backend, use 'Tasks.search.SimpleSearchBackend' on databases without FTS5
+TASKS_SEARCH_BACKEND = 'Tasks.search.SQLiteFTSBackend'
+
+# Tasks delta sync
+TASKS_SYNC_MAX_GAP = timedelta(days=30)     # Tombstones older than this are pruned
+TASKS_TOMBSTONE_PRUNE_BATCH_SIZE = 1000     # Tombstones deleted by a single statement
+TASKS_SYNC_PAGE_SIZE = 500      # Changed tasks and deleted slugs returned by a single sync page
+
+# Tasks expiry sweeper
+TASKS_EXPIRY_BATCH_SIZE = 1000      # Tasks updated by a single statement
+TASKS_EXPIRY_SWEEPER_INTERVAL = None    # Seconds between in-process sweeps, None disables the runner
+
+# Tasks deadline reminders
+TASKS_REMINDER_BACKEND = 'Tasks.reminders.ConsoleReminderBackend'   # Or 'Tasks.reminders.FileReminderBackend'
+TASKS_REMINDER_FILE = BASE_DIR / 'reminders.ndjson'     # Output of the file backend
+TASKS_REMINDER_LEAD_TIME = timedelta(minutes=15)    # Reminders are sent this long before the dead line
+TASKS_REMINDER_BATCH_SIZE = 500     # Reminders claimed by a single statement
+
+# Tasks archive
+TASKS_ARCHIVE_AFTER = timedelta(days=90)    # Finished tasks unchanged for this long are archived
+TASKS_ARCHIVE_BATCH_SIZE = 1000     # Tasks moved by a single transaction
+
+# Seconds that the total count of a filtered staff user list is cached
+USERS_COUNT_CACHE_TIMEOUT = 60
+
+# Seconds that a user or a profile stays in the username lookup cache, only used with a shared cache
+USERS_LOOKUP_CACHE_TIMEOUT = 300
+
+# Bulk user provisioning
+USERS_PROVISION_BATCH_SIZE = 500     # Users inserted by a single transaction
+USERS_PROVISION_WORKERS = None      # Password hashing processes of the provision_users command, None uses every CPU
+USERS_PROVISION_MAX_ITEMS = 200     # Users created by a single API request
+
+# Async login
+# Serve the login and token views with the async views, only useful when the server runs
+# under ASGI (Server/asgi.py), under WSGI every async view runs on an event loop of its own
+AUTH_ASYNC_LOGIN = os.environ.get('AUTH_ASYNC_LOGIN', '').lower() in ('1', 'true', 'yes')
+AUTH_HASHING_WORKERS = 4    # Threads that check the passwords of the async login views
+AUTH_HASHING_QUEUE_DEPTH = 32   # Logins waiting for a thread, more are answered with 503
+
+# Seconds that the user of a JWT authenticated request stays cached
+USERS_AUTH_CACHE_TIMEOUT = 60
+
+# Bloom filter of the blacklisted refresh tokens
+AUTH_BLACKLIST_BLOOM_CAPACITY = 100000    # Minimum number of tokens the filter is sized for
+AUTH_BLACKLIST_BLOOM_ERROR_RATE = 0.001   # Share of the valid tokens that still need a query
+AUTH_BLACKLIST_BLOOM_SYNC_INTERVAL = 5    # Seconds between reads of the tokens blacklisted by other processes
+
+# Number of expired refresh tokens deleted by a single transaction of prune_tokens
+AUTH_TOKEN_PRUNE_BATCH_SIZE = 1000
\ No newline at end of file
@@ -0,0 +1,77 @@
+import codecs
+import csv
+import json
+
+
+# The number of bytes read from the file at a time
+READ_SIZE = 64 * 1024
+
+# The largest JSON object of a file, in characters, a bigger one is rejected instead of buffered
+MAX_OBJECT_SIZE = 1024 * 1024
+
+# A decode error this close to the end of the buffer may be a token cut by the read, such as a
+# partial number or literal, any other error is in the file itself
+INCOMPLETE_TAIL_SIZE = 16
+
+
+
+def iter_csv_rows(fileobj):
+    """
+    Yield the rows of a CSV file as dicts, reading the file a line at a time.
+    """
+    lines = codecs.iterdecode(fileobj, 'utf-8-sig')
+    for row in csv.DictReader(lines):
+        # An empty cell means the column was not given, so the field default is used
+        yield {key: value for key, value in row.items() if key and value not in ('', None)}
+
+
+def iter_json_rows(fileobj):
+    """
+    Yield the objects of a JSON file, reading the file in bounded pieces.
+    The file is either a JSON array of objects or newline delimited JSON objects.
+
+    Raises:
+        ValueError: As soon as an object is malformed, or grows past MAX_OBJECT_SIZE.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder('utf-8-sig')()
+    buffer = ''
+    in_array = None
+    finished = False
+
+    while not finished:
+        data = fileobj.read(READ_SIZE)
+        finished = not data
+        buffer += text_decoder.decode(data or b'', final=finished)
+
+        position = 0
+        while True:
+            # Skipping the whitespace and the separators between the objects
+            while position < len(buffer) and buffer[position] in ' \t\r\n,':
+                position += 1
+            if position >= len(buffer):
+                break
+            if in_array is None:
+                in_array = buffer[position] == '['
+                if in_array:
+                    position += 1
+                    continue
+            if buffer[position] == ']' and in_array:
+                return
+            try:
+                value, end = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError as e:
+                # Only an error at the end of the buffer can be an object that is not complete yet
+                incomplete = e.pos >= len(buffer) - INCOMPLETE_TAIL_SIZE or e.msg.startswith('Unterminated string')
+                if finished or not incomplete:
+                    raise
+                if len(buffer) - position > MAX_OBJECT_SIZE:
+                    raise ValueError(f'An object is larger than {MAX_OBJECT_SIZE} characters') from e
+                # Reading more of the file to complete the object
+                break
+            if end - position > MAX_OBJECT_SIZE:
+                raise ValueError(f'An object is larger than {MAX_OBJECT_SIZE} characters')
+            position = end
+            yield value
+
+        buffer = buffer[position:]
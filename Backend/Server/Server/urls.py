@@ -10,4 +10,5 @@ urlpatterns = [
     path('auth/', include("Authentication.urls", namespace="Authentication")),
     path('profiles/', include("Profiles.urls", namespace="Profiles")),
     path('accounts/', include("Accounts.urls", namespace="Accounts")),
+    path('tasks/', include("Tasks.urls", namespace="Tasks")),
 ] + static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
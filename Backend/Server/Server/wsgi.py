@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Server.settings')
 
 application = get_wsgi_application()
+
+# Building the token blacklist filter of the process before the first request
+from Authentication.blacklist import preload_blacklist_filter  # noqa: E402
+
+preload_blacklist_filter()
@@ -1,6 +1,17 @@
 from django.apps import AppConfig
+from django.conf import settings
 
 
 class TasksConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'Tasks'
+
+    def ready(self):
+        # Connecting the signal receivers
+        from . import signals
+
+        # Starting the in-process expiry sweeper if it is enabled
+        if settings.TASKS_EXPIRY_SWEEPER_INTERVAL:
+            from .sweeper import TasksExpirySweeper
+            TasksExpirySweeper(settings.TASKS_EXPIRY_SWEEPER_INTERVAL).start()
+
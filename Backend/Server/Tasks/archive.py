@@ -0,0 +1,93 @@
+import logging
+import time
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Tasks, TaskChangeSequence, TaskTombstone, TaskSlugAlias, ArchivedTask
+from . import cache
+
+
+logger = logging.getLogger(__name__)
+
+# The columns that are copied from the hot table to the archive
+ARCHIVE_FIELDS = (
+    'id', 'status', 'user_id', 'title', 'slug', 'description', 'created_at',
+    'updated_at', 'dead_line', 'change_seq', 'recurrence_id', 'occurrence_date',
+)
+
+# The statuses of the finished tasks
+FINISHED_STATUSES = (Tasks.TaskStatus.COMPLETED, Tasks.TaskStatus.EXPIRED)
+
+
+
+def archive_finished_tasks(age=None, batch_size=None, now=None):
+    """
+        Move the completed and expired tasks that were finished more than age ago to the archive.
+
+        Every batch is copied and deleted in its own transaction, and the archived rows keep
+        the id of the task, so an interrupted run is resumed by running the job again: the
+        moved tasks are gone from the hot table and a copied batch is never copied twice.
+        The templates of the recurring tasks are kept in the hot table.
+        The hot rows are deleted without the Tasks signals, so the bookkeeping is done here:
+        the tombstones for the delta sync and the cached lists. The task counters count the
+        archived tasks as well, so they do not change.
+        params:
+            - age: The time since the last change of a finished task, defaults to TASKS_ARCHIVE_AFTER.
+            - batch_size: The maximum number of tasks moved by a single transaction.
+            - now: The time that the age is measured from, defaults to the current time.
+        return:
+            - dict: The number of archived tasks, the number of batches and the elapsed seconds.
+    """
+    age = age or settings.TASKS_ARCHIVE_AFTER
+    batch_size = batch_size or settings.TASKS_ARCHIVE_BATCH_SIZE
+    now = now or timezone.now()
+    started = time.monotonic()
+
+    # The finished tasks that are older than the cutoff
+    finished = Tasks.objects.filter(
+        status__in=FINISHED_STATUSES,
+        updated_at__lt=now - age,
+        recurrence_rule__isnull=True,
+    ).order_by('id')
+
+    archived = 0
+    batches = 0
+    last_id = 0
+    while True:
+        with transaction.atomic():
+            # Walking the table once on the primary key, locking the rows of the batch
+            rows = list(finished.filter(id__gt=last_id).select_for_update().values(*ARCHIVE_FIELDS)[:batch_size])
+            if not rows:
+                break
+            ids = [row['id'] for row in rows]
+            ArchivedTask.objects.bulk_create(
+                [ArchivedTask(archived_at=now, **row) for row in rows],
+                ignore_conflicts=True,
+            )
+            TaskSlugAlias.objects.filter(task_id__in=ids).delete()
+            with connection.cursor() as cursor:
+                cursor.execute(
+                    'DELETE FROM {} WHERE id IN ({})'.format(
+                        connection.ops.quote_name(Tasks._meta.db_table), ', '.join(['%s'] * len(ids))
+                    ),
+                    ids,
+                )
+            # The archived tasks leave the synced set, so stamping their tombstones with one sequence number
+            change_seq = TaskChangeSequence.next_value()
+            TaskTombstone.objects.bulk_create([
+                TaskTombstone(user_id=row['user_id'], slug=row['slug'], change_seq=change_seq)
+                for row in rows if row['slug']
+            ])
+        for user_id in {row['user_id'] for row in rows}:
+            cache.bump_version(user_id)
+        archived += len(rows)
+        batches += 1
+        last_id = ids[-1]
+        if len(rows) < batch_size:
+            break
+
+    elapsed = time.monotonic() - started
+    logger.info('Archived %d tasks in %d batches in %.3fs', archived, batches, elapsed)
+    return {'archived': archived, 'batches': batches, 'elapsed': elapsed}
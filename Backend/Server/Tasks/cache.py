@@ -0,0 +1,121 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+
+from Server.caches import get_shared_cache
+
+
+# Cache keys used by the task list cache
+VERSION_KEY = 'tasks:version:{user_id}'
+LIST_KEY = 'tasks:list:{user_id}:{version}:{params}'
+HITS_KEY = 'tasks:list:hits'
+MISSES_KEY = 'tasks:list:misses'
+
+
+
+def get_version(user_id):
+    """
+        Return the current version of the user tasks from the cache shared by every process,
+        so a write in any process invalidates the cached lists of every other one.
+        A missing version is initialized with the current time, so a version that was
+        evicted never falls back to a value that older cache entries were stored under.
+        return:
+            - int: The version, or None if there is no shared cache and the lists are not cached.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return None
+    key = VERSION_KEY.format(user_id=user_id)
+    version = shared_cache.get(key)
+    if version is None:
+        shared_cache.add(key, time.time_ns(), timeout=None)
+        version = shared_cache.get(key)
+    return version
+
+
+def bump_version(user_id):
+    """
+        Invalidate every cached task list of the user by moving to a new version.
+        The old entries are never read again and age out of the cache by themselves.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return
+    key = VERSION_KEY.format(user_id=user_id)
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        shared_cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_params_digest(query_params):
+    """
+        Return a short digest of the query params that does not depend on their order.
+    """
+    params = urlencode(sorted(query_params.lists()), doseq=True)
+    return hashlib.md5(params.encode(), usedforsecurity=False).hexdigest()
+
+
+def get_list_key(user_id, query_params):
+    """
+        Return the cache key of a task list response for the given user and query params,
+        or None if there is no shared cache, because a write in another process could not
+        invalidate the cached lists of this one.
+    """
+    version = get_version(user_id)
+    if version is None:
+        return None
+    return LIST_KEY.format(
+        user_id=user_id,
+        version=version,
+        params=get_params_digest(query_params),
+    )
+
+
+def get_list(key):
+    """
+        Return the cached task list response, or None, and count the hit or the miss.
+    """
+    if key is None:
+        return None
+    data = cache.get(key)
+    _count(HITS_KEY if data is not None else MISSES_KEY)
+    return data
+
+
+def set_list(key, data):
+    if key is not None:
+        cache.set(key, data, timeout=settings.TASKS_LIST_CACHE_TIMEOUT)
+
+
+def get_stats():
+    """
+        Return the hit and miss counters of the task list cache, summed over every process
+        in the shared cache, so they can be read from outside the server.
+        return:
+            - dict: Whether the cache is on, the hits, the misses and the hit ratio.
+    """
+    shared_cache = get_shared_cache()
+    hits = shared_cache.get(HITS_KEY, 0) if shared_cache is not None else 0
+    misses = shared_cache.get(MISSES_KEY, 0) if shared_cache is not None else 0
+    total = hits + misses
+    return {
+        'enabled': shared_cache is not None,
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def _count(key):
+    # The counters are only kept while the lists are cached, so there is always a shared cache
+    shared_cache = get_shared_cache()
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        # The counter is missing, so starting it from one
+        if not shared_cache.add(key, 1, timeout=None):
+            shared_cache.incr(key)
@@ -0,0 +1,98 @@
+import csv
+import re
+
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.core.serializers.json import DjangoJSONEncoder
+
+
+# The columns of an exported task, read with values_list so no model instances are built
+EXPORT_FIELDS = ['slug', 'title', 'description', 'status', 'created_at', 'updated_at', 'dead_line']
+
+# The number of rows fetched from the database cursor at a time
+EXPORT_CHUNK_SIZE = 2000
+
+# The number of rows joined into a single chunk of the response
+ROWS_PER_WRITE = 200
+
+# The supported export formats and their content types
+EXPORT_CONTENT_TYPES = {
+    'ndjson': 'application/x-ndjson',
+    'csv': 'text/csv; charset=utf-8',
+}
+
+ACCEPTS_GZIP_RE = re.compile(r'\bgzip\b')
+
+
+
+class Echo:
+    """
+        A file-like object that returns what is written to it, so csv.writer can feed a stream.
+    """
+
+    def write(self, value):
+        return value
+
+
+
+def _grouped(lines):
+    # Joining the lines into bigger chunks, so the response is not written a row at a time
+    chunk = []
+    for line in lines:
+        chunk.append(line)
+        if len(chunk) >= ROWS_PER_WRITE:
+            yield ''.join(chunk).encode()
+            chunk = []
+    if chunk:
+        yield ''.join(chunk).encode()
+
+
+def ndjson_stream(rows):
+    """
+        Stream the rows as newline delimited JSON objects.
+    """
+    encoder = DjangoJSONEncoder()
+    return _grouped(
+        encoder.encode(dict(zip(EXPORT_FIELDS, row))) + '\n' for row in rows
+    )
+
+
+def csv_stream(rows):
+    """
+        Stream the rows as CSV lines, starting with the header.
+    """
+    writer = csv.writer(Echo())
+
+    def lines():
+        yield writer.writerow(EXPORT_FIELDS)
+        for row in rows:
+            yield writer.writerow(
+                value.isoformat() if hasattr(value, 'isoformat') else value for value in row
+            )
+
+    return _grouped(lines())
+
+
+async def iterate_in_sync_thread(chunks):
+    """
+        Stream a sync iterator as an async iterator. Every chunk is pulled in the thread of the
+        sync views, where the database cursor of the rows is opened and read, so the ASGI
+        handler sends the chunks as they are produced instead of reading the whole iterator
+        into memory first.
+    """
+    pull = sync_to_async(next, thread_sensitive=True)
+    done = object()
+    while True:
+        chunk = await pull(chunks, done)
+        if chunk is done:
+            return
+        yield chunk
+
+
+def is_asgi(request):
+    # The DRF request wraps the request of the Django handler
+    return isinstance(getattr(request, '_request', request), ASGIRequest)
+
+
+def accepts_gzip(request):
+    return bool(ACCEPTS_GZIP_RE.search(request.META.get('HTTP_ACCEPT_ENCODING', '')))
@@ -0,0 +1,39 @@
+import secrets
+import time
+
+
+# The alphabet of the task identifiers, in ASCII order so the identifiers sort like their values
+BASE62_ALPHABET = '0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz'
+
+# The length of a task identifier, 16 base62 characters hold the 95 bits below
+SLUG_LENGTH = 16
+
+# A 48-bit millisecond timestamp followed by 47 random bits
+TIMESTAMP_BITS = 48
+RANDOM_BITS = 47
+
+
+
+def encode_base62(value, length=SLUG_LENGTH):
+    """
+        Encode a non-negative integer as a fixed-width base62 string.
+    """
+    chars = []
+    for _ in range(length):
+        value, remainder = divmod(value, 62)
+        chars.append(BASE62_ALPHABET[remainder])
+    return ''.join(reversed(chars))
+
+
+def generate_task_slug():
+    """
+        Generate a compact, time-sortable identifier for a task.
+        The timestamp keeps new identifiers close together in the unique index, and the
+        47 random bits make a collision within the same millisecond negligible.
+    """
+    timestamp = time.time_ns() // 1_000_000 & ((1 << TIMESTAMP_BITS) - 1)
+    return encode_base62(timestamp << RANDOM_BITS | secrets.randbits(RANDOM_BITS))
+
+
+def is_compact_slug(slug):
+    return slug is not None and len(slug) == SLUG_LENGTH
@@ -0,0 +1,51 @@
+from itertools import islice
+
+from .models import Tasks
+from .serializers import TasksSerializer
+
+
+# The number of rows validated and inserted together
+IMPORT_CHUNK_SIZE = 1000
+
+# The maximum number of row errors kept in a report, the rest are only counted
+IMPORT_MAX_ERRORS = 100
+
+
+
+def import_tasks(user, rows, chunk_size=IMPORT_CHUNK_SIZE, progress=None):
+    """
+        Validate the rows in chunks and insert the valid ones with bulk_create.
+        params:
+            - user: The owner of the imported tasks.
+            - rows: An iterable of row dicts.
+            - chunk_size: The number of rows validated and inserted together.
+            - progress: An optional callable that is called with the report after every chunk.
+        return:
+            - dict: The number of imported and failed rows and the first row errors.
+    """
+    report = {'imported': 0, 'failed': 0, 'errors': []}
+    rows = enumerate(rows, start=1)
+
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            break
+
+        tasks = []
+        for number, row in chunk:
+            serializer = TasksSerializer(data=row) if isinstance(row, dict) else None
+            if serializer is None or not serializer.is_valid():
+                report['failed'] += 1
+                if len(report['errors']) < IMPORT_MAX_ERRORS:
+                    errors = serializer.errors if serializer is not None else {'row': ['Expected an object.']}
+                    report['errors'].append({'row': number, 'errors': errors})
+                continue
+            tasks.append(Tasks(**serializer.validated_data))
+
+        # Inserting the valid rows of the chunk in a single transaction
+        report['imported'] += len(Tasks.objects.bulk_create_for_user(user, tasks))
+
+        if progress is not None:
+            progress(report)
+
+    return report
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from Tasks.archive import archive_finished_tasks
+
+
+
+class Command(BaseCommand):
+    help = 'Move the completed and expired tasks that were finished long ago to the archive.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Archive tasks finished more than DAYS days ago instead of TASKS_ARCHIVE_AFTER.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of tasks moved by a single transaction.',
+        )
+
+    def handle(self, *args, **options):
+        age = timedelta(days=options['days']) if options['days'] else None
+        result = archive_finished_tasks(age=age, batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Archived {archived} tasks in {batches} batches in {elapsed:.3f}s'.format(**result)
+            )
+        )
@@ -0,0 +1,56 @@
+import time
+
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from Users.models import User
+from Tasks.models import Tasks
+from Tasks.serializers import TasksSerializer, TasksReadSerializer
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Compare the task list read path of TasksSerializer with TasksReadSerializer. '
+        'The benchmark data is created in a transaction that is rolled back.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, default=1000, help='Number of tasks in a single request.')
+        parser.add_argument('--repeat', type=int, default=5, help='Number of measured requests of each path.')
+
+    def handle(self, *args, **options):
+        rows = options['rows']
+        repeat = options['repeat']
+
+        with transaction.atomic():
+            user = User.objects.create(username='benchmark', email='benchmark@example.com', full_name='Benchmark')
+            Tasks.objects.bulk_create_for_user(
+                user,
+                [Tasks(title=f'Task {i}', description='Benchmark task', dead_line=timezone.now()) for i in range(rows)],
+                batch_size=500,
+            )
+            queryset = Tasks.objects.filter(user=user).order_by('dead_line', 'id')
+
+            def before():
+                return TasksSerializer(queryset.all(), many=True).data
+
+            def after():
+                serializer = TasksReadSerializer()
+                return serializer.serialize(serializer.get_queryset(queryset.all()))
+
+            for name, read in (('TasksSerializer', before), ('TasksReadSerializer', after)):
+                with CaptureQueriesContext(connection) as queries:
+                    read()
+                started = time.perf_counter()
+                for _ in range(repeat):
+                    read()
+                elapsed = time.perf_counter() - started
+                self.stdout.write(
+                    f'{name}: {rows * repeat / elapsed:,.0f} rows/sec, '
+                    f'{len(queries.captured_queries)} queries per request'
+                )
+
+            transaction.set_rollback(True)
@@ -0,0 +1,81 @@
+import time
+
+from django.db import transaction
+from django.db.models import Q
+from django.db.models.functions import Length
+from django.utils import timezone
+from django.core.management.base import BaseCommand
+
+from Tasks.models import Tasks, TaskChangeSequence, TaskSlugAlias, TaskTombstone
+from Tasks.identifiers import SLUG_LENGTH
+from Tasks import cache
+
+
+
+class Command(BaseCommand):
+    help = (
+        'Rewrite the task slugs to the compact form in batches, keeping the old slugs as aliases. '
+        'The old slugs are reported as deleted to the delta sync, which reports the tasks again by their new slugs. '
+        'The command is resumable, running it again continues with the tasks that are left.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Number of tasks rewritten in a single transaction.',
+        )
+        parser.add_argument(
+            '--start-id',
+            type=int,
+            default=0,
+            help='Only rewrite the tasks whose id is greater than START_ID.',
+        )
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        last_id = options['start_id']
+        started = time.monotonic()
+        rewritten = 0
+
+        # The tasks whose slug is missing or is not in the compact form
+        legacy = Tasks.objects.annotate(slug_length=Length('slug')).filter(
+            Q(slug__isnull=True) | ~Q(slug_length=SLUG_LENGTH)
+        ).order_by('id')
+
+        while True:
+            with transaction.atomic():
+                tasks = list(legacy.filter(id__gt=last_id).select_for_update()[:batch_size])
+                if not tasks:
+                    break
+                change_seq = TaskChangeSequence.next_value()
+                now = timezone.now()
+                aliases = []
+                tombstones = []
+                for task in tasks:
+                    if task.slug:
+                        # Keeping the old slug resolvable
+                        aliases.append(TaskSlugAlias(task=task, old_slug=task.slug))
+                        # The sync clients key the tasks by slug, so they drop the old one
+                        tombstones.append(TaskTombstone(user_id=task.user_id, slug=task.slug, change_seq=change_seq))
+                    task.slug = Tasks.generate_slug()
+                    # The clients of the delta sync pick up the new slugs with the next sync
+                    task.change_seq = change_seq
+                    # bulk_update skips auto_now, and the ETags of the list and of the task are built from it
+                    task.updated_at = now
+                TaskSlugAlias.objects.bulk_create(aliases, ignore_conflicts=True)
+                TaskTombstone.objects.bulk_create(tombstones)
+                Tasks.objects.bulk_update(tasks, ['slug', 'change_seq', 'updated_at'])
+
+            # bulk_update does not send the post_save signal, so invalidating the cached lists here
+            for user_id in {task.user_id for task in tasks}:
+                cache.bump_version(user_id)
+
+            rewritten += len(tasks)
+            last_id = tasks[-1].id
+            self.stdout.write(f'Rewrote {rewritten} slugs, last id {last_id}')
+
+        self.stdout.write(
+            self.style.SUCCESS(f'Rewrote {rewritten} slugs in {time.monotonic() - started:.3f}s')
+        )
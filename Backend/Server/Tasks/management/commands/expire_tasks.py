@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Tasks.sweeper import expire_overdue_tasks
+
+
+
+class Command(BaseCommand):
+    help = 'Expire the pending tasks that are past their dead line.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of tasks updated by a single statement.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Keep running and sweep every INTERVAL seconds.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Running a single sweep and reporting it
+            result = expire_overdue_tasks(batch_size=options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    'Expired {expired} tasks in {batches} batches in {elapsed:.3f}s'.format(**result)
+                )
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
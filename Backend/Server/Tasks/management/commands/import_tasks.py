@@ -0,0 +1,53 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from Users.models import User
+from Server.uploads import iter_csv_rows, iter_json_rows
+from Tasks.importer import import_tasks, IMPORT_CHUNK_SIZE
+
+
+
+class Command(BaseCommand):
+    help = 'Import the tasks of a user from a CSV or JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('username', help='The owner of the imported tasks.')
+        parser.add_argument('path', help='The CSV or JSON file to import.')
+        parser.add_argument(
+            '--type',
+            choices=['csv', 'json'],
+            default=None,
+            help='The type of the file, guessed from its extension by default.',
+        )
+        parser.add_argument(
+            '--chunk-size',
+            type=int,
+            default=IMPORT_CHUNK_SIZE,
+            help='Number of rows validated and inserted together.',
+        )
+
+    def handle(self, *args, **options):
+        try:
+            user = User.objects.get(username=options['username'])
+        except User.DoesNotExist:
+            raise CommandError(f'User "{options["username"]}" does not exist')
+
+        import_type = options['type'] or ('csv' if options['path'].lower().endswith('.csv') else 'json')
+        started = time.monotonic()
+
+        def progress(report):
+            self.stdout.write(f'Imported {report["imported"]} tasks, {report["failed"]} failed')
+
+        with open(options['path'], 'rb') as fileobj:
+            rows = iter_csv_rows(fileobj) if import_type == 'csv' else iter_json_rows(fileobj)
+            report = import_tasks(user, rows, chunk_size=options['chunk_size'], progress=progress)
+
+        for error in report['errors']:
+            self.stderr.write(f'Row {error["row"]}: {error["errors"]}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                f'Imported {report["imported"]} tasks, {report["failed"]} failed, '
+                f'in {time.monotonic() - started:.3f}s'
+            )
+        )
@@ -0,0 +1,33 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+
+from Tasks.sync import prune_tombstones
+
+
+
+class Command(BaseCommand):
+    help = 'Delete the task tombstones that are older than the longest allowed sync gap.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days',
+            type=int,
+            default=None,
+            help='Prune tombstones older than DAYS days instead of TASKS_SYNC_MAX_GAP.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of tombstones deleted by a single statement.',
+        )
+
+    def handle(self, *args, **options):
+        max_age = timedelta(days=options['days']) if options['days'] else None
+        result = prune_tombstones(max_age=max_age, batch_size=options['batch_size'])
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Pruned {pruned} tombstones in {batches} batches in {elapsed:.3f}s'.format(**result)
+            )
+        )
@@ -0,0 +1,17 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Tasks.stats import reconcile_stats
+
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the per user task counters from the tasks table.'
+
+    def handle(self, *args, **options):
+        started = time.monotonic()
+        users = reconcile_stats()
+        self.stdout.write(
+            self.style.SUCCESS(f'Rebuilt the task counters of {users} users in {time.monotonic() - started:.3f}s')
+        )
@@ -0,0 +1,37 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from Tasks.reminders import send_due_reminders
+
+
+
+class Command(BaseCommand):
+    help = 'Send the reminders of the pending tasks whose dead line is close.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Maximum number of reminders claimed by a single statement.',
+        )
+        parser.add_argument(
+            '--interval',
+            type=int,
+            default=None,
+            help='Keep running and send the due reminders every INTERVAL seconds.',
+        )
+
+    def handle(self, *args, **options):
+        while True:
+            # Sending the due reminders and reporting them
+            result = send_due_reminders(batch_size=options['batch_size'])
+            self.stdout.write(
+                self.style.SUCCESS(
+                    'Sent {sent} reminders in {batches} batches in {elapsed:.3f}s'.format(**result)
+                )
+            )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from Tasks import cache
+
+
+
+class Command(BaseCommand):
+    help = 'Show the hit and miss counters of the task list cache, summed over every server process.'
+
+    def handle(self, *args, **options):
+        stats = cache.get_stats()
+        if not stats['enabled']:
+            # The lists are only cached with a cache that every process shares
+            self.stdout.write(self.style.WARNING('The task list cache is off, SHARED_CACHE_ALIAS is not shared by the processes'))
+            return
+        self.stdout.write(
+            'hits={hits} misses={misses} hit_ratio={hit_ratio:.2%}'.format(**stats)
+        )
@@ -0,0 +1,51 @@
+from collections import Counter
+
+from django.db import models, transaction, IntegrityError
+
+
+class TasksManager(models.Manager):
+    # Method to insert many tasks of a single user at once
+    def bulk_create_for_user(self, user, tasks, batch_size=None):
+        """
+        Inserts the tasks of a user with bulk_create and does the bookkeeping that save() and
+        the Tasks signals would do otherwise: the slugs, the change sequence number, the list
+        cache version and the status counters.
+
+        Args:
+            user (User): The owner of the tasks.
+            tasks (list): The unsaved task instances.
+            batch_size (int, optional): The number of rows inserted by a single query. Defaults to None.
+
+        Returns:
+            list: The created tasks.
+        """
+        # Importing here because the models module imports this manager
+        from .models import TaskChangeSequence
+        from .stats import apply_status_deltas
+        from . import cache
+
+        if not tasks:
+            return []
+
+        for task in tasks:
+            task.user = user
+            task.slug = self.model.generate_slug()
+
+        with transaction.atomic(using=self.db):
+            # Stamping the whole batch with one sequence number
+            change_seq = TaskChangeSequence.next_value()
+            for task in tasks:
+                task.change_seq = change_seq
+            try:
+                with transaction.atomic(using=self.db):
+                    created = self.bulk_create(tasks, batch_size=batch_size)
+            except IntegrityError:
+                # A generated slug collided with an existing one, so retrying once with new slugs
+                for task in tasks:
+                    task.slug = self.model.generate_slug()
+                created = self.bulk_create(tasks, batch_size=batch_size)
+
+        # Invalidating the cached lists and counting the new tasks
+        cache.bump_version(user.pk)
+        apply_status_deltas(user.pk, Counter(task.status for task in created))
+        return created
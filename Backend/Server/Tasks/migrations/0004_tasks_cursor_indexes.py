@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:37
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0003_tasks_slug'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'dead_line', 'id'], name='tasks_user_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'created_at', 'id'], name='tasks_user_created_idx'),
+        ),
+    ]
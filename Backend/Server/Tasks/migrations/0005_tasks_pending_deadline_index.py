@@ -0,0 +1,19 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:38
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0004_tasks_cursor_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(condition=models.Q(('status', 'PEN')), fields=['dead_line'], name='tasks_pending_deadline_idx'),
+        ),
+    ]
@@ -0,0 +1,65 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:41
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+def create_change_sequence(apps, schema_editor):
+    TaskChangeSequence = apps.get_model('Tasks', 'TaskChangeSequence')
+    TaskChangeSequence.objects.get_or_create(pk=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0005_tasks_pending_deadline_index'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskChangeSequence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('value', models.BigIntegerField(default=0)),
+                ('pruned_value', models.BigIntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'Task Change Sequence',
+                'verbose_name_plural': 'Task Change Sequence',
+            },
+        ),
+        migrations.CreateModel(
+            name='TaskTombstone',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=255)),
+                ('change_seq', models.BigIntegerField()),
+                ('deleted_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+            options={
+                'verbose_name': 'Task Tombstone',
+                'verbose_name_plural': 'Task Tombstones',
+            },
+        ),
+        migrations.AddField(
+            model_name='tasks',
+            name='change_seq',
+            field=models.BigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'change_seq'], name='tasks_user_change_seq_idx'),
+        ),
+        migrations.AddField(
+            model_name='tasktombstone',
+            name='user',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name='tasktombstone',
+            index=models.Index(fields=['user', 'change_seq'], name='tombstones_user_seq_idx'),
+        ),
+        migrations.RunPython(create_change_sequence, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,57 @@
+from django.db import migrations
+
+
+# Statements that create the SQLite FTS5 index and the triggers that keep it in sync
+CREATE_SEARCH_INDEX = [
+    'CREATE VIRTUAL TABLE tasks_search USING fts5(title, description, owner)',
+    '''
+    INSERT INTO tasks_search(rowid, title, description, owner)
+    SELECT id, title, COALESCE(description, ''), 'u' || user_id FROM "Tasks_tasks"
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_insert AFTER INSERT ON "Tasks_tasks" BEGIN
+        INSERT INTO tasks_search(rowid, title, description, owner)
+        VALUES (new.id, new.title, COALESCE(new.description, ''), 'u' || new.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_update AFTER UPDATE OF title, description, user_id ON "Tasks_tasks" BEGIN
+        DELETE FROM tasks_search WHERE rowid = old.id;
+        INSERT INTO tasks_search(rowid, title, description, owner)
+        VALUES (new.id, new.title, COALESCE(new.description, ''), 'u' || new.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_delete AFTER DELETE ON "Tasks_tasks" BEGIN
+        DELETE FROM tasks_search WHERE rowid = old.id;
+    END
+    ''',
+]
+
+DROP_SEARCH_INDEX = [
+    'DROP TRIGGER IF EXISTS tasks_search_insert',
+    'DROP TRIGGER IF EXISTS tasks_search_update',
+    'DROP TRIGGER IF EXISTS tasks_search_delete',
+    'DROP TABLE IF EXISTS tasks_search',
+]
+
+
+def run_on_sqlite(statements):
+    # The index only exists on SQLite, the other databases use another search backend
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0006_tasks_delta_sync'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(CREATE_SEARCH_INDEX), run_on_sqlite(DROP_SEARCH_INDEX)),
+    ]
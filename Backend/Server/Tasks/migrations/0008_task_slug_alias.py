@@ -0,0 +1,26 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:43
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0007_tasks_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='TaskSlugAlias',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('old_slug', models.SlugField(max_length=255, unique=True)),
+                ('task', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='slug_aliases', to='Tasks.tasks')),
+            ],
+            options={
+                'verbose_name': 'Task Slug Alias',
+                'verbose_name_plural': 'Task Slug Aliases',
+            },
+        ),
+    ]
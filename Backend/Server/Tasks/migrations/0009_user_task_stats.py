@@ -0,0 +1,29 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:44
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0008_task_slug_alias'),
+        ('Users', '0003_user_updated_at'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserTaskStats',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='task_stats', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('pending', models.IntegerField(default=0)),
+                ('completed', models.IntegerField(default=0)),
+                ('expired', models.IntegerField(default=0)),
+            ],
+            options={
+                'verbose_name': 'User Task Stats',
+                'verbose_name_plural': 'User Task Stats',
+            },
+        ),
+    ]
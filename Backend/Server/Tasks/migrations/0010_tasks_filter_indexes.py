@@ -0,0 +1,31 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:49
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0009_user_task_stats'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'updated_at', 'id'], name='tasks_user_updated_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'status', 'dead_line', 'id'], name='tasks_user_status_deadline_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'status', 'created_at', 'id'], name='tasks_user_status_created_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'status', 'updated_at', 'id'], name='tasks_user_status_updated_idx'),
+        ),
+    ]
@@ -0,0 +1,44 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:50
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0010_tasks_filter_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasks',
+            name='occurrence_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.CreateModel(
+            name='TaskRecurrence',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('frequency', models.CharField(choices=[('DAY', 'Daily'), ('WEK', 'Weekly'), ('MON', 'Monthly')], max_length=3)),
+                ('interval', models.PositiveSmallIntegerField(default=1)),
+                ('until', models.DateTimeField(blank=True, null=True)),
+                ('task', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='recurrence_rule', to='Tasks.tasks')),
+            ],
+            options={
+                'verbose_name': 'Task Recurrence',
+                'verbose_name_plural': 'Task Recurrences',
+            },
+        ),
+        migrations.AddField(
+            model_name='tasks',
+            name='recurrence',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='occurrences', to='Tasks.taskrecurrence'),
+        ),
+        migrations.AddConstraint(
+            model_name='tasks',
+            constraint=models.UniqueConstraint(fields=('recurrence', 'occurrence_date'), name='tasks_unique_occurrence'),
+        ),
+    ]
@@ -0,0 +1,39 @@
+# Generated by Django 5.1.5 on 2026-10-18 08:54
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0011_task_recurrence'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ArchivedTask',
+            fields=[
+                ('id', models.BigIntegerField(primary_key=True, serialize=False)),
+                ('status', models.CharField(choices=[('PEN', 'Pending'), ('COM', 'Completed'), ('EXP', 'Expired')], max_length=3)),
+                ('title', models.CharField(max_length=255)),
+                ('slug', models.SlugField(blank=True, max_length=255, null=True)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField()),
+                ('updated_at', models.DateTimeField()),
+                ('dead_line', models.DateTimeField()),
+                ('change_seq', models.BigIntegerField(default=0)),
+                ('occurrence_date', models.DateTimeField(blank=True, null=True)),
+                ('archived_at', models.DateTimeField(auto_now_add=True)),
+                ('recurrence', models.ForeignKey(blank=True, db_constraint=False, null=True, on_delete=django.db.models.deletion.DO_NOTHING, related_name='+', to='Tasks.taskrecurrence')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='+', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Archived Task',
+                'verbose_name_plural': 'Archived Tasks',
+                'indexes': [models.Index(fields=['user', 'dead_line', 'id'], name='archive_user_deadline_idx'), models.Index(fields=['user', 'created_at', 'id'], name='archive_user_created_idx'), models.Index(fields=['user', 'updated_at', 'id'], name='archive_user_updated_idx'), models.Index(fields=['slug'], name='archive_slug_idx'), models.Index(fields=['recurrence', 'occurrence_date'], name='archive_occurrence_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:16
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0012_archived_task'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user', 'status', 'dead_line', 'id'], name='archive_user_status_dl_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user', 'status', 'created_at', 'id'], name='archive_user_status_cr_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='archivedtask',
+            index=models.Index(fields=['user', 'status', 'updated_at', 'id'], name='archive_user_status_up_idx'),
+        ),
+    ]
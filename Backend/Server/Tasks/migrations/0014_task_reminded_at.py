@@ -0,0 +1,24 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:18
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0013_archive_status_indexes'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='tasks',
+            name='reminded_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(condition=models.Q(('reminded_at__isnull', True), ('status', 'PEN')), fields=['dead_line', 'id'], name='tasks_unreminded_deadline_idx'),
+        ),
+    ]
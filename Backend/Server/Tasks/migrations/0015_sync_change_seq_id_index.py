@@ -0,0 +1,23 @@
+# Generated by Django 5.1.5 on 2026-10-18 09:19
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0014_task_reminded_at'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='tasks',
+            name='tasks_user_change_seq_idx',
+        ),
+        migrations.AddIndex(
+            model_name='tasks',
+            index=models.Index(fields=['user', 'change_seq', 'id'], name='tasks_user_change_seq_idx'),
+        ),
+    ]
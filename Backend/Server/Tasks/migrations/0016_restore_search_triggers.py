@@ -0,0 +1,54 @@
+from django.db import migrations
+
+
+# SQLite rebuilds "Tasks_tasks" to add the recurrence constraint of 0011, and the rebuild drops the
+# triggers of 0007 that keep the FTS5 index in sync, so creating them again and refilling the index
+RESTORE_SEARCH_TRIGGERS = [
+    'DROP TRIGGER IF EXISTS tasks_search_insert',
+    'DROP TRIGGER IF EXISTS tasks_search_update',
+    'DROP TRIGGER IF EXISTS tasks_search_delete',
+    'DELETE FROM tasks_search',
+    '''
+    INSERT INTO tasks_search(rowid, title, description, owner)
+    SELECT id, title, COALESCE(description, ''), 'u' || user_id FROM "Tasks_tasks"
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_insert AFTER INSERT ON "Tasks_tasks" BEGIN
+        INSERT INTO tasks_search(rowid, title, description, owner)
+        VALUES (new.id, new.title, COALESCE(new.description, ''), 'u' || new.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_update AFTER UPDATE OF title, description, user_id ON "Tasks_tasks" BEGIN
+        DELETE FROM tasks_search WHERE rowid = old.id;
+        INSERT INTO tasks_search(rowid, title, description, owner)
+        VALUES (new.id, new.title, COALESCE(new.description, ''), 'u' || new.user_id);
+    END
+    ''',
+    '''
+    CREATE TRIGGER tasks_search_delete AFTER DELETE ON "Tasks_tasks" BEGIN
+        DELETE FROM tasks_search WHERE rowid = old.id;
+    END
+    ''',
+]
+
+
+def run_on_sqlite(statements):
+    # The index only exists on SQLite, the other databases use another search backend
+    def run(apps, schema_editor):
+        if schema_editor.connection.vendor != 'sqlite':
+            return
+        for statement in statements:
+            schema_editor.execute(statement)
+    return run
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('Tasks', '0015_sync_change_seq_id_index'),
+    ]
+
+    operations = [
+        migrations.RunPython(run_on_sqlite(RESTORE_SEARCH_TRIGGERS), migrations.RunPython.noop),
+    ]
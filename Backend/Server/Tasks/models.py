@@ -1,6 +1,44 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
 from Users.models import User
 
+from .identifiers import generate_task_slug
+from .managers import TasksManager
+
+
+
+class TaskChangeSequence(models.Model):
+    """
+        Single row counter that stamps every task change with a monotonic sequence number.
+        Incrementing it locks the row until the changing transaction commits, so the
+        sequence numbers become visible to the sync readers in commit order.
+    """
+    # The last sequence number that was given to a change
+    value = models.BigIntegerField(default=0)
+    # Tombstones up to this sequence number have been pruned
+    pruned_value = models.BigIntegerField(default=0)
+
+
+    class Meta:
+        verbose_name = 'Task Change Sequence'
+        verbose_name_plural = 'Task Change Sequence'
+
+
+    # Getting the next sequence number, must be called inside the changing transaction
+    @classmethod
+    def next_value(cls):
+        if not cls.objects.filter(pk=1).update(value=F('value') + 1):
+            # The row is missing, such as after a flush of the database, so creating it on demand
+            cls.objects.get_or_create(pk=1)
+            cls.objects.filter(pk=1).update(value=F('value') + 1)
+        return cls.objects.values_list('value', flat=True).get(pk=1)
+
+    # Getting the last committed sequence number and the pruned sequence number
+    @classmethod
+    def current(cls):
+        # A missing row has given no sequence number yet
+        return cls.objects.values_list('value', 'pruned_value').filter(pk=1).first() or (0, 0)
+
 
 
 class Tasks(models.Model):
@@ -33,11 +71,270 @@ class Tasks(models.Model):
     updated_at = models.DateTimeField(auto_now=True)
     dead_line = models.DateTimeField()
 
+    # The sequence number of the last change of the task, used by the delta sync
+    change_seq = models.BigIntegerField(default=0)
+
+    # The recurrence rule that this task is a materialized occurrence of
+    recurrence = models.ForeignKey(
+        'TaskRecurrence',
+        on_delete=models.SET_NULL,
+        null=True,
+        blank=True,
+        related_name='occurrences'
+    )
+    # The slot of the rule that this task is an occurrence of
+    occurrence_date = models.DateTimeField(null=True, blank=True)
+
+    # The time that the reminder of the current dead line was claimed, cleared when the dead line changes
+    reminded_at = models.DateTimeField(null=True, blank=True)
+
+    # Set object manager to TasksManager
+    objects = TasksManager()
+
 
     class Meta:
         verbose_name = 'Task'
         verbose_name_plural = 'Tasks'
+        # Composite indexes that back the cursor pagination, the filters and the orderings
+        # of the user tasks, with and without the status filter
+        indexes = [
+            models.Index(fields=['user', 'dead_line', 'id'], name='tasks_user_deadline_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='tasks_user_created_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='tasks_user_updated_idx'),
+            models.Index(fields=['user', 'status', 'dead_line', 'id'], name='tasks_user_status_deadline_idx'),
+            models.Index(fields=['user', 'status', 'created_at', 'id'], name='tasks_user_status_created_idx'),
+            models.Index(fields=['user', 'status', 'updated_at', 'id'], name='tasks_user_status_updated_idx'),
+            # Composite index that backs the keyset pages of the delta sync
+            models.Index(fields=['user', 'change_seq', 'id'], name='tasks_user_change_seq_idx'),
+            # Partial index that backs the expiry sweeper
+            models.Index(
+                fields=['dead_line'],
+                condition=models.Q(status='PEN'),
+                name='tasks_pending_deadline_idx',
+            ),
+            # Partial index that backs the reminders, it only holds the tasks that are not reminded yet
+            models.Index(
+                fields=['dead_line', 'id'],
+                condition=models.Q(status='PEN', reminded_at__isnull=True),
+                name='tasks_unreminded_deadline_idx',
+            ),
+        ]
+        constraints = [
+            # A slot of a recurrence rule is materialized at most once
+            models.UniqueConstraint(
+                fields=['recurrence', 'occurrence_date'],
+                name='tasks_unique_occurrence',
+            ),
+        ]
     
 
     def __str__(self):
-        return self.title
\ No newline at end of file
+        return self.title
+
+    def save(self, *args, **kwargs):
+        # Stamping the change with the next sequence number in the same transaction
+        with transaction.atomic():
+            self.change_seq = TaskChangeSequence.next_value()
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'change_seq', 'updated_at'}
+            super().save(*args, **kwargs)
+
+    # Generating a new compact slug for a task
+    @staticmethod
+    def generate_slug():
+        return generate_task_slug()
+
+
+
+class TaskTombstone(models.Model):
+    """
+        A lightweight record of a deleted task, so the delta sync can report deletes.
+    """
+    # The owner of the deleted task, without a database constraint because the tombstones
+    # of a deleted user are written in the same transaction that deletes the user
+    user = models.ForeignKey(
+        User,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        related_name='+'
+    )
+
+    # The slug of the deleted task
+    slug = models.SlugField(max_length=255)
+
+    # The sequence number of the delete
+    change_seq = models.BigIntegerField()
+
+    deleted_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+
+    class Meta:
+        verbose_name = 'Task Tombstone'
+        verbose_name_plural = 'Task Tombstones'
+        indexes = [
+            models.Index(fields=['user', 'change_seq'], name='tombstones_user_seq_idx'),
+        ]
+
+
+    def __str__(self):
+        return self.slug
+
+
+
+class TaskSlugAlias(models.Model):
+    """
+        The old slug of a task whose slug was rewritten to the compact form,
+        so the old URLs stay resolvable during the transition.
+    """
+    task = models.ForeignKey(
+        Tasks,
+        on_delete=models.CASCADE,
+        related_name='slug_aliases'
+    )
+
+    # The old slug of the task
+    old_slug = models.SlugField(max_length=255, unique=True)
+
+
+    class Meta:
+        verbose_name = 'Task Slug Alias'
+        verbose_name_plural = 'Task Slug Aliases'
+
+
+    def __str__(self):
+        return self.old_slug
+
+
+
+class UserTaskStats(models.Model):
+    """
+        Per user counters of the tasks by their status, kept up to date by the Tasks signals
+        and rebuilt by the reconcile_task_stats command when they drift.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='task_stats'
+    )
+
+    pending = models.IntegerField(default=0)
+    completed = models.IntegerField(default=0)
+    expired = models.IntegerField(default=0)
+
+
+    class Meta:
+        verbose_name = 'User Task Stats'
+        verbose_name_plural = 'User Task Stats'
+
+
+    def __str__(self):
+        return f'{self.user_id}'
+
+    # The counter field of every task status
+    STATUS_FIELDS = {
+        Tasks.TaskStatus.PENDING: 'pending',
+        Tasks.TaskStatus.COMPLETED: 'completed',
+        Tasks.TaskStatus.EXPIRED: 'expired',
+    }
+
+
+
+class TaskRecurrence(models.Model):
+    """
+        The recurrence rule of a task. The task is the template and its dead line is the
+        first occurrence, the next occurrences are expanded lazily for the requested window,
+        and only the occurrences that the user changes become Tasks rows.
+    """
+
+    class Frequency(models.TextChoices):
+        DAILY = 'DAY'
+        WEEKLY = 'WEK'
+        MONTHLY = 'MON'
+
+
+    task = models.OneToOneField(
+        Tasks,
+        on_delete=models.CASCADE,
+        related_name='recurrence_rule'
+    )
+
+    frequency = models.CharField(max_length=3, choices=Frequency.choices)
+
+    # The number of frequency periods between two occurrences
+    interval = models.PositiveSmallIntegerField(default=1)
+
+    # The last time that an occurrence can fall on, or None for no end
+    until = models.DateTimeField(null=True, blank=True)
+
+
+    class Meta:
+        verbose_name = 'Task Recurrence'
+        verbose_name_plural = 'Task Recurrences'
+
+
+    def __str__(self):
+        return f'{self.task_id} {self.get_frequency_display()}'
+
+
+
+class ArchivedTask(models.Model):
+    """
+        The cold partition of the tasks: the completed and expired tasks that were finished
+        long ago are moved here by the archive job, so the hot Tasks table and its indexes
+        only hold the tasks that are still in use. The rows keep the id of the task.
+    """
+    id = models.BigIntegerField(primary_key=True)
+
+    status = models.CharField(max_length=3, choices=Tasks.TaskStatus.choices)
+
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='+'
+    )
+
+    title = models.CharField(max_length=255)
+    slug = models.SlugField(max_length=255, null=True, blank=True)
+
+    description = models.TextField(null=True, blank=True)
+
+    created_at = models.DateTimeField()
+    updated_at = models.DateTimeField()
+    dead_line = models.DateTimeField()
+
+    change_seq = models.BigIntegerField(default=0)
+
+    # The recurrence rule and the slot of an archived occurrence, the rule may be gone
+    recurrence = models.ForeignKey(
+        TaskRecurrence,
+        on_delete=models.DO_NOTHING,
+        db_constraint=False,
+        null=True,
+        blank=True,
+        related_name='+'
+    )
+    occurrence_date = models.DateTimeField(null=True, blank=True)
+
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+
+    class Meta:
+        verbose_name = 'Archived Task'
+        verbose_name_plural = 'Archived Tasks'
+        indexes = [
+            # The same keyset orderings as the hot table
+            models.Index(fields=['user', 'dead_line', 'id'], name='archive_user_deadline_idx'),
+            models.Index(fields=['user', 'created_at', 'id'], name='archive_user_created_idx'),
+            models.Index(fields=['user', 'updated_at', 'id'], name='archive_user_updated_idx'),
+            models.Index(fields=['user', 'status', 'dead_line', 'id'], name='archive_user_status_dl_idx'),
+            models.Index(fields=['user', 'status', 'created_at', 'id'], name='archive_user_status_cr_idx'),
+            models.Index(fields=['user', 'status', 'updated_at', 'id'], name='archive_user_status_up_idx'),
+            models.Index(fields=['slug'], name='archive_slug_idx'),
+            models.Index(fields=['recurrence', 'occurrence_date'], name='archive_occurrence_idx'),
+        ]
+
+
+    def __str__(self):
+        return self.title
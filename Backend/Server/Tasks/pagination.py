@@ -0,0 +1,203 @@
+import heapq
+import json
+from itertools import islice
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import CursorPagination, _reverse_ordering
+
+
+
+class MergedQuerySet:
+    """
+        The same values query on several tables, read as a single sorted queryset by the
+        cursor pagination, such as the hot and the archived tasks of the history.
+
+        The ordering and the filters of the cursor are applied to every queryset, and a slice
+        reads at most its stop rows from each of them with its own index range scan and merges
+        the sorted rows, so a page never reads more than a page from each table. The rows must
+        be unique across the querysets, and the ordering must end with a unique column.
+    """
+
+    def __init__(self, *querysets, ordering=()):
+        self.querysets = querysets
+        self.ordering = ordering
+
+    def order_by(self, *ordering):
+        return MergedQuerySet(*(queryset.order_by(*ordering) for queryset in self.querysets), ordering=ordering)
+
+    def filter(self, *args, **kwargs):
+        return MergedQuerySet(
+            *(queryset.filter(*args, **kwargs) for queryset in self.querysets), ordering=self.ordering
+        )
+
+    def __getitem__(self, index):
+        # The pagination only reads bounded slices of an ordered queryset
+        assert isinstance(index, slice) and index.stop is not None and self.ordering
+        columns = [field.lstrip('-') for field in self.ordering]
+        rows = heapq.merge(
+            *(queryset[:index.stop] for queryset in self.querysets),
+            key=lambda row: tuple(row[column] for column in columns),
+            # The orderings of the pagination have the same direction on every column
+            reverse=self.ordering[0].startswith('-'),
+        )
+        return list(islice(rows, index.start or 0, index.stop))
+
+
+
+class TasksCursorPagination(CursorPagination):
+    """
+        Keyset (cursor) pagination for the user tasks.
+
+        Every page is fetched with a range scan from the cursor position on the
+        (user, dead_line, id) or (user, created_at, id) indexes, with id breaking
+        the ties, so page N costs the same as page 1 and no OFFSET scans are needed.
+
+        The cursor of DRF only holds the first ordering column and skips the ties with
+        an offset, which reads the ties again and shifts the pages when a tied task is
+        added or removed. So the cursor here holds every column of the ordering.
+    """
+    # Define the number of tasks returned in each page
+    page_size = 50
+    # Let the client ask for a smaller or bigger page
+    page_size_query_param = 'page_size'
+    # Never allow a page bigger than this value
+    max_page_size = 500
+    # Define the query param that the client uses to pick the ordering
+    ordering_query_param = 'ordering'
+
+    # The supported orderings, each one is backed by a composite index on Tasks
+    orderings = {
+        'dead_line': ('dead_line', 'id'),
+        '-dead_line': ('-dead_line', '-id'),
+        'created_at': ('created_at', 'id'),
+        '-created_at': ('-created_at', '-id'),
+        'updated_at': ('updated_at', 'id'),
+        '-updated_at': ('-updated_at', '-id'),
+    }
+    # Define the default ordering of the tasks
+    ordering = orderings['dead_line']
+
+    # Getting the ordering that the client asked for
+    def get_ordering(self, request, queryset, view):
+        """
+            Return the ordering requested by the client.
+            params:
+                - request: The request object.
+                - queryset: The queryset that is going to be paginated.
+                - view: The view that is paginating the queryset.
+            return:
+                - tuple: The ordering fields, falling back to the default ordering.
+        """
+        # Getting the ordering picked by the filters of the view, or the requested one from the query params
+        requested = getattr(view, 'task_ordering', None) or request.query_params.get(self.ordering_query_param)
+        # Returning the ordering if it is supported, otherwise the default one
+        return self.orderings.get(requested, self.ordering)
+
+    # Paginating the queryset from the full keyset position of the cursor
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+            Return a page of the queryset that starts right after the cursor position.
+            params:
+                - queryset: The queryset that is going to be paginated.
+                - request: The request object.
+                - view: The view that is paginating the queryset.
+            return:
+                - list: The tasks of the page, or None when the pagination is off.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+
+        self.cursor = self.decode_cursor(request)
+        if self.cursor is None:
+            (offset, reverse, current_position) = (0, False, None)
+        else:
+            (offset, reverse, current_position) = self.cursor
+
+        # Cursor pagination always enforces an ordering
+        if reverse:
+            queryset = queryset.order_by(*_reverse_ordering(self.ordering))
+        else:
+            queryset = queryset.order_by(*self.ordering)
+
+        # Reading only the rows after the position, in the direction of the query
+        if current_position is not None:
+            descending = reverse != self.ordering[0].startswith('-')
+            queryset = queryset.filter(self._get_keyset_filter(self._decode_position(current_position), descending))
+
+        # Fetching an extra task to know if there is a page following this one, the positions
+        # are unique so the offset of the links is always zero
+        results = list(queryset[offset:offset + self.page_size + 1])
+        self.page = list(results[:self.page_size])
+
+        if len(results) > len(self.page):
+            has_following_position = True
+            following_position = self._get_position_from_instance(results[-1], self.ordering)
+        else:
+            has_following_position = False
+            following_position = None
+
+        if reverse:
+            # The query read the page backwards, so putting it back in the requested order
+            self.page = list(reversed(self.page))
+            self.has_next = (current_position is not None) or (offset > 0)
+            self.has_previous = has_following_position
+            if self.has_next:
+                self.next_position = current_position
+            if self.has_previous:
+                self.previous_position = following_position
+        else:
+            self.has_next = has_following_position
+            self.has_previous = (current_position is not None) or (offset > 0)
+            if self.has_next:
+                self.next_position = following_position
+            if self.has_previous:
+                self.previous_position = current_position
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    # Building the condition of the rows that come after the position
+    def _get_keyset_filter(self, position, descending):
+        """
+            Return the condition of the rows after the position on the whole ordering,
+            such as dead_line > d OR (dead_line = d AND id > i).
+            params:
+                - position: The values of the ordering columns at the cursor.
+                - descending: Whether the rows after the position have smaller values.
+            return:
+                - Q: The keyset condition.
+        """
+        columns = [field.lstrip('-') for field in self.ordering]
+        lookup = 'lt' if descending else 'gt'
+        condition = Q(**{f'{columns[-1]}__{lookup}': position[-1]})
+        for column, value in zip(reversed(columns[:-1]), reversed(position[:-1])):
+            condition = Q(**{f'{column}__{lookup}': value}) | (Q(**{column: value}) & condition)
+        # Bounding the first column as well, so the query stays a single range scan of the index
+        return Q(**{f'{columns[0]}__{lookup}e': position[0]}) & condition
+
+    # Getting the position of a task on every ordering column
+    def _get_position_from_instance(self, instance, ordering):
+        columns = [field.lstrip('-') for field in ordering]
+        if isinstance(instance, dict):
+            values = [instance[column] for column in columns]
+        else:
+            values = [getattr(instance, column) for column in columns]
+        return json.dumps([str(value) for value in values], separators=(',', ':'))
+
+    # Reading the position of a cursor back
+    def _decode_position(self, position):
+        try:
+            values = json.loads(position)
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if not isinstance(values, list) or len(values) != len(self.ordering):
+            raise NotFound(self.invalid_cursor_message)
+        return values
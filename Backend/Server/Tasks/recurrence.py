@@ -0,0 +1,177 @@
+import calendar
+import heapq
+from datetime import timedelta
+from itertools import islice
+
+from django.db import transaction, IntegrityError
+
+from .models import Tasks, TaskRecurrence, ArchivedTask
+
+
+# The fixed step of the daily and weekly rules
+STEPS = {
+    TaskRecurrence.Frequency.DAILY: timedelta(days=1),
+    TaskRecurrence.Frequency.WEEKLY: timedelta(weeks=1),
+}
+
+
+
+def add_months(value, months):
+    """
+        Move a datetime by a number of months, clamping the day to the end of the month.
+
+        Args:
+            value (datetime): The datetime.
+            months (int): The number of months.
+
+        Returns:
+            datetime: The moved datetime.
+    """
+    month = value.month - 1 + months
+    year = value.year + month // 12
+    month = month % 12 + 1
+    day = min(value.day, calendar.monthrange(year, month)[1])
+    return value.replace(year=year, month=month, day=day)
+
+
+def iter_slots(rule, first, start, end):
+    """
+        Yield the occurrence slots of a rule that fall in [start, end), in order.
+        The first slot in the window is computed directly, so a rule costs nothing for the
+        periods before the window no matter how old it is.
+
+        Args:
+            rule (TaskRecurrence): The recurrence rule.
+            first (datetime): The first occurrence, the dead line of the template task.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window, excluded.
+
+        Yields:
+            datetime: The slots.
+    """
+    if rule.until is not None and rule.until < end:
+        # Slots on the until bound are still part of the rule
+        end = rule.until + timedelta(microseconds=1)
+
+    interval = max(rule.interval, 1)
+    if rule.frequency in STEPS:
+        step = STEPS[rule.frequency] * interval
+        # The index of the first slot at or after the start of the window
+        index = max(0, -((first - start) // step))
+        slot = first + step * index
+        while slot < end:
+            yield slot
+            slot += step
+        return
+
+    # Monthly slots are always computed from the first occurrence so clamped days do not drift
+    months = (start.year - first.year) * 12 + start.month - first.month
+    index = max(0, months // interval - 1)
+    while True:
+        slot = add_months(first, index * interval)
+        if slot >= end:
+            return
+        if slot >= start:
+            yield slot
+        index += 1
+
+
+def expand_occurrences(user, start, end, limit):
+    """
+        Expand the virtual occurrences of the user recurring tasks in [start, end).
+        The slot of the template task itself and the slots that have been materialized
+        as Tasks rows are skipped, because those are read from the tasks table.
+
+        Args:
+            user (User): The owner of the tasks.
+            start (datetime): The start of the window.
+            end (datetime): The end of the window, excluded.
+            limit (int): The maximum number of occurrences.
+
+        Returns:
+            list: The (slot, rule) pairs ordered by slot, at most limit of them.
+    """
+    # The rules that can have a slot in the window, with their template in the same query
+    rules = list(
+        TaskRecurrence.objects
+        .filter(task__user=user, task__dead_line__lt=end)
+        .exclude(until__lt=start)
+        .select_related('task__user')
+    )
+    if not rules:
+        return []
+
+    # The slots that have their own row in the window, in the hot table or in the archive
+    materialized = set()
+    for model in (Tasks, ArchivedTask):
+        materialized.update(
+            model.objects
+            .filter(recurrence__in=rules, occurrence_date__gte=start, occurrence_date__lt=end)
+            .values_list('recurrence_id', 'occurrence_date')
+        )
+
+    def occurrences(rule):
+        for slot in iter_slots(rule, rule.task.dead_line, start, end):
+            if slot != rule.task.dead_line and (rule.pk, slot) not in materialized:
+                yield slot, rule.pk, rule
+
+    # Merging the sorted slots of every rule, so only the returned occurrences are built
+    merged = heapq.merge(*(occurrences(rule) for rule in rules), key=lambda item: item[:2])
+    return [(slot, rule) for slot, _, rule in islice(merged, limit)]
+
+
+def is_slot(rule, slot):
+    """
+        Check that a datetime is an occurrence slot of a rule.
+
+        Args:
+            rule (TaskRecurrence): The recurrence rule.
+            slot (datetime): The datetime.
+
+        Returns:
+            bool: True if the datetime is a slot of the rule.
+    """
+    return next(iter_slots(rule, rule.task.dead_line, slot, slot + timedelta(microseconds=1)), None) == slot
+
+
+def materialize_occurrence(rule, slot, changes, attempts=3):
+    """
+        Store an occurrence of a rule as a Tasks row, so it can be changed like any other task.
+        The row is saved through save() and the Tasks signals, like a task created by the API.
+
+        Args:
+            rule (TaskRecurrence): The recurrence rule, with its template task loaded.
+            slot (datetime): The occurrence date.
+            changes (dict): The fields that differ from the template task.
+            attempts (int, optional): The number of slugs tried. Defaults to 3.
+
+        Returns:
+            tuple: The task and True if it has been created, or False if it already existed.
+    """
+    existing = Tasks.objects.filter(recurrence=rule, occurrence_date=slot).first()
+    if existing is not None:
+        return existing, False
+
+    template = rule.task
+    task = Tasks(
+        user=template.user,
+        title=changes.get('title', template.title),
+        description=changes.get('description', template.description),
+        status=changes.get('status', Tasks.TaskStatus.PENDING),
+        dead_line=changes.get('dead_line', slot),
+        recurrence=rule,
+        occurrence_date=slot,
+    )
+    for attempt in range(attempts):
+        task.slug = Tasks.generate_slug()
+        try:
+            with transaction.atomic():
+                task.save(force_insert=True)
+            return task, True
+        except IntegrityError:
+            # Another request has materialized the same slot in the meantime
+            existing = Tasks.objects.filter(recurrence=rule, occurrence_date=slot).first()
+            if existing is not None:
+                return existing, False
+            if attempt == attempts - 1:
+                raise
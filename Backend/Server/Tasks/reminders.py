@@ -0,0 +1,138 @@
+import json
+import logging
+import sys
+import time
+from functools import lru_cache
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import Tasks
+
+
+logger = logging.getLogger(__name__)
+
+# The fields of a task that a reminder carries
+REMINDER_FIELDS = ('id', 'user_id', 'slug', 'title', 'dead_line')
+
+
+
+class BaseReminderBackend:
+    """
+        Base class of the reminder backends.
+    """
+
+    def send(self, reminders):
+        """
+            Deliver a batch of reminders.
+            params:
+                - reminders: The reminders, dicts with the REMINDER_FIELDS of the tasks.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def format(reminder):
+        return json.dumps(reminder, cls=DjangoJSONEncoder)
+
+
+
+class ConsoleReminderBackend(BaseReminderBackend):
+    """
+        Reminder backend that writes every reminder as a JSON line to the standard output.
+    """
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def send(self, reminders):
+        for reminder in reminders:
+            self.stream.write(self.format(reminder) + '\n')
+        self.stream.flush()
+
+
+
+class FileReminderBackend(BaseReminderBackend):
+    """
+        Reminder backend that appends every reminder as a JSON line to TASKS_REMINDER_FILE.
+    """
+
+    def __init__(self, path=None):
+        self.path = path or settings.TASKS_REMINDER_FILE
+
+    def send(self, reminders):
+        with open(self.path, 'a', encoding='utf-8') as file:
+            file.writelines(self.format(reminder) + '\n' for reminder in reminders)
+
+
+
+@lru_cache(maxsize=None)
+def get_reminder_backend():
+    return import_string(settings.TASKS_REMINDER_BACKEND)()
+
+
+
+def send_due_reminders(lead_time=None, batch_size=None, now=None, backend=None):
+    """
+        Send the reminders of the pending tasks whose dead line is at most lead_time away.
+
+        The due tasks are read from the partial (status='PEN', reminded_at IS NULL, dead_line)
+        index, so every run sees the dead lines changed by any process or by update(). Every
+        batch is claimed with a single "UPDATE ... WHERE reminded_at IS NULL" statement before
+        it is sent, so two runs never send the same reminder and a restart never sends it
+        again. A batch that the backend fails to deliver is released for the next run.
+        Changing the dead line of a task clears its reminded_at, so it is reminded again.
+        params:
+            - lead_time: How long before the dead line the reminder is sent, defaults to TASKS_REMINDER_LEAD_TIME.
+            - batch_size: The maximum number of reminders claimed by a single statement.
+            - now: The current time, defaults to the current time.
+            - backend: The reminder backend, defaults to TASKS_REMINDER_BACKEND.
+        return:
+            - dict: The number of sent reminders, the number of batches and the elapsed seconds.
+    """
+    lead_time = lead_time if lead_time is not None else settings.TASKS_REMINDER_LEAD_TIME
+    batch_size = batch_size or settings.TASKS_REMINDER_BATCH_SIZE
+    now = now or timezone.now()
+    backend = backend or get_reminder_backend()
+    started = time.monotonic()
+
+    # The pending tasks that are not reminded yet and are not past their dead line
+    due = Tasks.objects.filter(
+        status=Tasks.TaskStatus.PENDING,
+        reminded_at__isnull=True,
+        dead_line__gte=now,
+        dead_line__lte=now + lead_time,
+    )
+
+    sent = 0
+    batches = 0
+    while True:
+        ids = list(due.order_by('dead_line', 'id').values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        # Claiming the batch, the rows claimed by another run are skipped by the condition
+        claimed_at = timezone.now()
+        with transaction.atomic():
+            Tasks.objects.filter(
+                id__in=ids, status=Tasks.TaskStatus.PENDING, reminded_at__isnull=True
+            ).update(reminded_at=claimed_at)
+            reminders = list(Tasks.objects.filter(id__in=ids, reminded_at=claimed_at).values(*REMINDER_FIELDS))
+        if reminders:
+            try:
+                backend.send(reminders)
+            except Exception:
+                # Releasing the claim, so the reminders are sent by the next run
+                Tasks.objects.filter(
+                    id__in=[reminder['id'] for reminder in reminders], reminded_at=claimed_at
+                ).update(reminded_at=None)
+                raise
+        sent += len(reminders)
+        batches += 1
+        if len(ids) < batch_size:
+            break
+
+    elapsed = time.monotonic() - started
+    logger.info('Sent %d task reminders in %d batches in %.3fs', sent, batches, elapsed)
+    return {'sent': sent, 'batches': batches, 'elapsed': elapsed}
@@ -30,8 +30,40 @@ class UserTasksRouter(routers.DefaultRouter):
                 # Define a URL pattern for the create view
                 path('create/', UserTasksViewSet.as_view({'post': 'create'})),
 
+                # Define a URL pattern for the sync view
+                path('sync/', UserTasksViewSet.as_view({'get': 'sync'})),
+
+                # Define a URL pattern for the stats view
+                path('stats/', UserTasksViewSet.as_view({'get': 'stats'})),
+
+                # Define a URL pattern for the export view
+                path('export/', UserTasksViewSet.as_view({'get': 'export'})),
+
+                # Define a URL pattern for the import view
+                path('import/', UserTasksViewSet.as_view({'post': 'import_file'})),
+
+                # Define a URL pattern for the search view
+                path('search/', UserTasksViewSet.as_view({'get': 'search'})),
+
+                # Define a URL pattern for the occurrences view
+                path('occurrences/', UserTasksViewSet.as_view({'get': 'occurrences'})),
+
+                # Define the URL patterns for the bulk views
+                path('bulk/', include([
+
+                    # Define a URL pattern for the bulk create view
+                    path('create/', UserTasksViewSet.as_view({'post': 'bulk_create'})),
+
+                    # Define a URL pattern for the bulk update view
+                    path('update/', UserTasksViewSet.as_view({'put': 'bulk_update'})),
+
+                    # Define a URL pattern for the bulk delete view
+                    path('delete/', UserTasksViewSet.as_view({'post': 'bulk_delete'})),
+
+                ])),
+
                 # Define a URL pattern for the detail view
-                path('<str:user_username>/', include([
+                path('<str:slug>/', include([
 
                     # Define a URL pattern for the detail view
                     path('', UserTasksViewSet.as_view({'get': 'retrieve'})),
@@ -42,6 +74,14 @@ class UserTasksRouter(routers.DefaultRouter):
                     # Define a URL pattern for the delete view
                     path('delete/', UserTasksViewSet.as_view({'delete': 'destroy'})),
 
+                    # Define a URL pattern for the recurrence view
+                    path('recurrence/', UserTasksViewSet.as_view(
+                        {'get': 'recurrence', 'put': 'recurrence', 'delete': 'recurrence'}
+                    )),
+
+                    # Define a URL pattern for the materialize view
+                    path('materialize/', UserTasksViewSet.as_view({'post': 'materialize'})),
+
                 ])),
             ]))
         ]
@@ -0,0 +1,89 @@
+import re
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+from .models import Tasks
+
+
+# Name of the SQLite FTS5 table that indexes the tasks
+FTS_TABLE = 'tasks_search'
+
+# The words of a search query, everything else is dropped so it can not break the query syntax
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+
+class BaseSearchBackend:
+    """
+        Base class of the task search backends.
+    """
+
+    def search(self, user, query, limit):
+        """
+            Return the ids of the user tasks that match the query, the best matches first.
+            params:
+                - user: The owner of the tasks.
+                - query: The search query.
+                - limit: The maximum number of ids.
+            return:
+                - list: The ids of the matching tasks.
+        """
+        raise NotImplementedError
+
+    @staticmethod
+    def get_words(query):
+        return WORD_RE.findall(query)
+
+
+
+class SQLiteFTSBackend(BaseSearchBackend):
+    """
+        Search backend over the SQLite FTS5 inverted index of the task titles and descriptions.
+        The index is kept in sync by the triggers of the 0007 migration, created again by 0016
+        after the table rebuild of 0011, and is scoped to the owner through an indexed owner
+        token, so only the user postings are intersected.
+        Matches in the title weigh ten times more than matches in the description.
+    """
+
+    def search(self, user, query, limit):
+        words = self.get_words(query)
+        if not words:
+            return []
+        # Every word must match the title or the description, as a prefix of a term
+        terms = ' AND '.join('"{}"*'.format(word) for word in words)
+        match = 'owner:"u{}" AND {{title description}}: ({})'.format(user.pk, terms)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s '
+                f'ORDER BY bm25({FTS_TABLE}, 10.0, 1.0, 0.0) LIMIT %s',
+                [match, limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+
+class SimpleSearchBackend(BaseSearchBackend):
+    """
+        Search backend for the databases without an inverted index, it matches the words with
+        case-insensitive LIKE queries over the user tasks and puts the latest updates first.
+    """
+
+    def search(self, user, query, limit):
+        words = self.get_words(query)
+        if not words:
+            return []
+        queryset = Tasks.objects.filter(user=user)
+        for word in words:
+            queryset = queryset.filter(Q(title__icontains=word) | Q(description__icontains=word))
+        return list(queryset.order_by('-updated_at').values_list('id', flat=True)[:limit])
+
+
+
+# Getting the configured search backend
+@lru_cache(maxsize=None)
+def get_search_backend():
+    return import_string(settings.TASKS_SEARCH_BACKEND)()
@@ -1,11 +1,19 @@
+from django.db import transaction, IntegrityError
+from django.db.models import F
 from rest_framework import serializers
-from django.utils.crypto import get_random_string
 
-from .models import Tasks
+from Server.fieldsets import SparseFieldsetMixin
 
+from .models import Tasks, TaskRecurrence
+from .pagination import TasksCursorPagination
 
 
-class TasksSerializer(serializers.ModelSerializer):
+# The number of slugs tried before giving up on creating a task
+SLUG_ATTEMPTS = 3
+
+
+
+class TasksSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
 
     # Useing the method field to create a read-only field that returns the username
     user = serializers.SerializerMethodField()
@@ -13,39 +21,248 @@ class TasksSerializer(serializers.ModelSerializer):
     # Defining the fields that will be serialized
     class Meta:
         model = Tasks
-        fields = '__all__'
+        # The reminder claim is kept by the reminders job only
+        exclude = ['reminded_at']
+        # The slug, the change sequence and the recurrence slot are set by the server
+        read_only_fields = ['slug', 'change_seq', 'occurrence_date', 'recurrence']
+        # The user field reads the username of the related user
+        sparse_field_sources = {'user': ['user', 'user__username']}
 
     # Getting the username instead of user id
     def get_user(self, obj):
         return obj.user.username
-    
+
 
     def create(self, validated_data):
         # Geting the request object through the context
         request = self.context.get('request')
-        # Geting the user by request 
+        # Geting the user by request
         user = request.user
 
-        # Using random string func to generate a random string for slug field
-        slug = get_random_string(255)
-        
         # Creating the task query by validated data and other data that we got
-        task = Tasks.objects.create(
+        task = Tasks(
             user=user,
-            slug=slug,
             title=validated_data['title'],
-            description=validated_data['description'],
-            deadline=validated_data['deadline'],
+            description=validated_data.get('description'),
+            dead_line=validated_data['dead_line'],
         )
-        # Saving the query 
-        task.save()
+        # Generating a compact slug, and a new one if it collides with an existing slug
+        for attempt in range(SLUG_ATTEMPTS):
+            task.slug = Tasks.generate_slug()
+            try:
+                with transaction.atomic():
+                    task.save(force_insert=True)
+                break
+            except IntegrityError:
+                if attempt == SLUG_ATTEMPTS - 1:
+                    raise
         # Returning the query
         return task
-    
+
     def update(self, instance, validated_data):
-        instance.title = validated_data.get('title', instance.title)
-        instance.description = validated_data.get('description', instance.description)
-        instance.deadline = validated_data.get('deadline', instance.deadline)
-        instance.status = validated_data.get('status', instance.status)
-        instance.save()
-    
\ No newline at end of file
+        update_fields = [name for name in ('title', 'description', 'dead_line', 'status') if name in validated_data]
+        if 'dead_line' in validated_data and validated_data['dead_line'] != instance.dead_line:
+            # A moved dead line is reminded again
+            instance.reminded_at = None
+            update_fields.append('reminded_at')
+        for name in update_fields:
+            setattr(instance, name, validated_data.get(name))
+        # Saving only the changed columns, so the reminder claim of the reminders job is never written back
+        instance.save(update_fields=update_fields)
+        return instance
+
+
+
+class TasksReadSerializer:
+    """
+        Read-only serializer for the task list and detail reads that skips the DRF field machinery.
+        The rows are read with values() and the username is annotated in the same query,
+        so a page of N tasks costs a single query and every row is built as a plain dict
+        with the same shape as TasksSerializer.
+    """
+    # The output fields, in the same order as TasksSerializer
+    FIELDS = (
+        'id', 'user', 'status', 'title', 'slug', 'description',
+        'created_at', 'updated_at', 'dead_line', 'change_seq',
+        'occurrence_date', 'recurrence',
+    )
+    DATETIME_FIELDS = ('created_at', 'updated_at', 'dead_line', 'occurrence_date')
+
+    def __init__(self, fields=None):
+        # Keeping the requested fields in the output order
+        self.fields = [name for name in self.FIELDS if fields is None or name in fields]
+        self.datetime_fields = [name for name in self.DATETIME_FIELDS if name in self.fields]
+
+    def get_queryset(self, queryset, extra=()):
+        """
+            Return the queryset as dicts of the needed columns.
+            params:
+                - queryset: The tasks queryset.
+                - extra: Columns that are needed by the view itself, such as the ordering.
+            return:
+                - QuerySet: The values queryset.
+        """
+        columns = [name for name in self.fields if name != 'user']
+        columns.extend(column for column in extra if column not in columns)
+        if 'user' in self.fields:
+            return queryset.values(*columns, username=F('user__username'))
+        return queryset.values(*columns)
+
+    def to_representation(self, row):
+        # Building a new dict, the row itself is still read by the cursor pagination
+        data = {name: row['username'] if name == 'user' else row[name] for name in self.fields}
+        for name in self.datetime_fields:
+            value = data[name]
+            if value is not None:
+                # The same format as the DRF DateTimeField, the values are in UTC
+                value = value.isoformat()
+                data[name] = value[:-6] + 'Z' if value.endswith('+00:00') else value
+        return data
+
+    def serialize(self, rows):
+        return [self.to_representation(row) for row in rows]
+
+    def represent_occurrence(self, rule, slot):
+        """
+            Build a virtual occurrence of a recurring task, in the same shape as a task row.
+            A virtual occurrence has no id and no slug, it is addressed by the slug of its
+            template and its occurrence date until it is materialized.
+            params:
+                - rule: The recurrence rule, with its template task loaded.
+                - slot: The occurrence date.
+            return:
+                - dict: The occurrence.
+        """
+        template = rule.task
+        row = {
+            'id': None,
+            'username': template.user.username,
+            'status': Tasks.TaskStatus.PENDING,
+            'title': template.title,
+            'slug': None,
+            'description': template.description,
+            'created_at': template.created_at,
+            'updated_at': template.updated_at,
+            'dead_line': slot,
+            'change_seq': template.change_seq,
+            'occurrence_date': slot,
+            'recurrence': rule.pk,
+        }
+        data = self.to_representation(row)
+        data['template'] = template.slug
+        return data
+
+
+
+class TasksFilterSerializer(serializers.Serializer):
+    """
+        Serializer for the filter query params of the task list.
+        Every filter is evaluated in SQL on the composite indexes of Tasks.
+        A range is only a range scan of the (user, [status,] column, id) indexes when the
+        tasks are ordered by the same column, so the ranges are limited to a single column
+        and the ordering follows it.
+    """
+    status = serializers.ChoiceField(choices=Tasks.TaskStatus.choices, required=False)
+    ordering = serializers.CharField(required=False)
+    dead_line_after = serializers.DateTimeField(required=False)
+    dead_line_before = serializers.DateTimeField(required=False)
+    created_after = serializers.DateTimeField(required=False)
+    created_before = serializers.DateTimeField(required=False)
+    updated_after = serializers.DateTimeField(required=False)
+    updated_before = serializers.DateTimeField(required=False)
+
+    # The lookup of every filter, the ranges include the after bound and exclude the before bound
+    LOOKUPS = {
+        'status': 'status',
+        'dead_line_after': 'dead_line__gte',
+        'dead_line_before': 'dead_line__lt',
+        'created_after': 'created_at__gte',
+        'created_before': 'created_at__lt',
+        'updated_after': 'updated_at__gte',
+        'updated_before': 'updated_at__lt',
+    }
+
+    # The column of every range filter
+    RANGE_COLUMNS = {
+        'dead_line_after': 'dead_line',
+        'dead_line_before': 'dead_line',
+        'created_after': 'created_at',
+        'created_before': 'created_at',
+        'updated_after': 'updated_at',
+        'updated_before': 'updated_at',
+    }
+
+    def validate(self, data):
+        columns = {self.RANGE_COLUMNS[name] for name in data if name in self.RANGE_COLUMNS}
+        if len(columns) > 1:
+            raise serializers.ValidationError('The range filters must all be on the same column.')
+        # An unsupported ordering falls back to the default one, like the pagination does
+        ordering = data.get('ordering')
+        if ordering not in TasksCursorPagination.orderings:
+            ordering = None
+        if columns:
+            column = columns.pop()
+            if ordering is None:
+                # Ordering by the filtered column, so the range stays on the index
+                ordering = column
+            elif ordering.lstrip('-') != column:
+                raise serializers.ValidationError(
+                    {'ordering': f'Tasks filtered by a {column} range must be ordered by {column} or -{column}.'}
+                )
+        data['ordering'] = ordering
+        return data
+
+    def filter_queryset(self, queryset):
+        return queryset.filter(
+            **{self.LOOKUPS[name]: value for name, value in self.validated_data.items() if name in self.LOOKUPS}
+        )
+
+
+
+class TasksBulkUpdateSerializer(serializers.Serializer):
+    """
+        Serializer for a single item of a bulk update request.
+    """
+    # The slug of the task that is going to be updated
+    slug = serializers.SlugField(max_length=255)
+    # The fields that are going to be changed
+    patch = serializers.DictField()
+
+
+
+class TasksBulkDeleteSerializer(serializers.Serializer):
+    """
+        Serializer for a bulk delete request.
+    """
+    # The slugs of the tasks that are going to be deleted
+    slugs = serializers.ListField(
+        child=serializers.SlugField(max_length=255),
+        allow_empty=False,
+        max_length=500,
+    )
+
+
+
+class TaskRecurrenceSerializer(serializers.ModelSerializer):
+    """
+        Serializer for the recurrence rule of a task.
+    """
+    interval = serializers.IntegerField(min_value=1, max_value=366, default=1)
+
+    class Meta:
+        model = TaskRecurrence
+        fields = ['frequency', 'interval', 'until']
+
+
+
+class TaskOccurrenceSerializer(serializers.Serializer):
+    """
+        Serializer for a change to an occurrence of a recurring task.
+    """
+    # The slot of the rule that is changed
+    occurrence = serializers.DateTimeField()
+    # The changed fields, the rest are copied from the template task
+    title = serializers.CharField(max_length=255, required=False)
+    description = serializers.CharField(required=False, allow_null=True, allow_blank=True)
+    status = serializers.ChoiceField(choices=Tasks.TaskStatus.choices, required=False)
+    dead_line = serializers.DateTimeField(required=False)
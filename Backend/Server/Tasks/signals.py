@@ -0,0 +1,80 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from .models import Tasks, TaskChangeSequence, TaskTombstone
+from . import cache
+from .stats import apply_status_deltas, rebuild_user_stats
+
+
+
+# Set while a bulk delete does the bookkeeping of its deleted tasks once for the whole batch
+_bulk_delete = ContextVar('tasks_bulk_delete', default=False)
+
+
+@contextmanager
+def bulk_delete_bookkeeping():
+    """
+        Skip the per task bookkeeping of the deleted tasks: the cache version, the tombstone and
+        the counters. The caller does it for the whole batch instead.
+    """
+    reset = _bulk_delete.set(True)
+    try:
+        yield
+    finally:
+        _bulk_delete.reset(reset)
+
+
+# Invalidating the cached task lists of the owner when a task is saved or deleted
+@receiver(post_save, sender=Tasks)
+@receiver(post_delete, sender=Tasks)
+def invalidate_user_tasks_cache(sender, instance, **kwargs):
+    if _bulk_delete.get():
+        return
+    cache.bump_version(instance.user_id)
+
+
+# Leaving a tombstone for the delta sync when a task is deleted
+@receiver(post_delete, sender=Tasks)
+def create_task_tombstone(sender, instance, **kwargs):
+    if _bulk_delete.get():
+        return
+    if instance.slug:
+        TaskTombstone.objects.create(
+            user_id=instance.user_id,
+            slug=instance.slug,
+            change_seq=TaskChangeSequence.next_value(),
+        )
+
+
+# Remembering the stored status of a task, so a status change can be counted on save
+@receiver(post_init, sender=Tasks)
+def remember_task_status(sender, instance, **kwargs):
+    # Reading the status from __dict__, so a deferred status is not loaded with an extra query
+    instance._stored_status = instance.__dict__.get('status') if instance.pk is not None else None
+
+
+# Updating the task counters of the owner when a task is created or its status changes
+@receiver(post_save, sender=Tasks)
+def update_user_task_stats(sender, instance, created, **kwargs):
+    if created:
+        apply_status_deltas(instance.user_id, {instance.status: 1})
+    elif instance._stored_status is None:
+        # The stored status is unknown, so counting the tasks of the user again
+        rebuild_user_stats(instance.user_id)
+    elif instance._stored_status != instance.status:
+        apply_status_deltas(instance.user_id, {instance._stored_status: -1, instance.status: 1})
+    instance._stored_status = instance.status
+
+
+# Updating the task counters of the owner when a task is deleted
+@receiver(post_delete, sender=Tasks)
+def decrease_user_task_stats(sender, instance, **kwargs):
+    if _bulk_delete.get():
+        return
+    if instance._stored_status is None:
+        rebuild_user_stats(instance.user_id)
+    else:
+        apply_status_deltas(instance.user_id, {instance._stored_status: -1})
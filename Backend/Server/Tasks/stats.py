@@ -0,0 +1,85 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction, IntegrityError
+from django.db.models import Count, Exists, F, OuterRef
+
+from .models import Tasks, UserTaskStats, ArchivedTask
+
+
+
+def apply_status_deltas(user_id, deltas):
+    """
+        Add the deltas to the task counters of the user with a single atomic UPDATE.
+        params:
+            - user_id: The id of the owner of the tasks.
+            - deltas: A mapping of task status to the change of its counter.
+    """
+    fields = {
+        UserTaskStats.STATUS_FIELDS[task_status]: F(UserTaskStats.STATUS_FIELDS[task_status]) + delta
+        for task_status, delta in deltas.items() if delta
+    }
+    if not fields:
+        return
+    if not UserTaskStats.objects.filter(user_id=user_id).update(**fields):
+        # The user has no counters yet, so counting them from the tasks, which already include this change
+        rebuild_user_stats(user_id)
+
+
+def rebuild_user_stats(user_id):
+    """
+        Count the tasks of a single user by their status and store the counters.
+        The archived tasks are counted as well.
+    """
+    counts = Counter()
+    for model in (Tasks, ArchivedTask):
+        counts.update(dict(
+            model.objects.filter(user_id=user_id).values_list('status').annotate(count=Count('id')).order_by()
+        ))
+    values = {field: counts.get(task_status, 0) for task_status, field in UserTaskStats.STATUS_FIELDS.items()}
+    try:
+        with transaction.atomic():
+            UserTaskStats.objects.update_or_create(user_id=user_id, defaults=values)
+    except IntegrityError:
+        # Another request created the counters at the same time, so its counters are kept
+        pass
+
+
+def reconcile_stats():
+    """
+        Rebuild the task counters of every user with a single GROUP BY over the tasks
+        and another one over the archived tasks.
+        return:
+            - int: The number of users whose counters were rebuilt.
+    """
+    counts = defaultdict(Counter)
+    for model in (Tasks, ArchivedTask):
+        for user_id, task_status, count in model.objects.values_list('user_id', 'status').annotate(
+            count=Count('id')
+        ).order_by():
+            counts[user_id][task_status] += count
+
+    rows = [
+        UserTaskStats(
+            user_id=user_id,
+            **{field: statuses.get(task_status, 0) for task_status, field in UserTaskStats.STATUS_FIELDS.items()}
+        )
+        for user_id, statuses in counts.items()
+    ]
+    fields = list(UserTaskStats.STATUS_FIELDS.values())
+    with transaction.atomic():
+        # Zeroing the counters of the users that have no tasks anymore, with a subquery per table
+        # instead of a parameter per user
+        UserTaskStats.objects.filter(
+            ~Exists(Tasks.objects.filter(user_id=OuterRef('user_id'))),
+            ~Exists(ArchivedTask.objects.filter(user_id=OuterRef('user_id'))),
+        ).update(
+            **{field: 0 for field in fields}
+        )
+        UserTaskStats.objects.bulk_create(
+            rows,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['user'],
+            update_fields=fields,
+        )
+    return len(rows)
@@ -0,0 +1,98 @@
+import logging
+from collections import Counter
+import threading
+import time
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Tasks, TaskChangeSequence
+from . import cache
+from .stats import apply_status_deltas
+
+
+logger = logging.getLogger(__name__)
+
+
+
+def expire_overdue_tasks(batch_size=None, now=None):
+    """
+        Move the pending tasks that are past their dead line to the expired status.
+        Every batch is a single "UPDATE ... WHERE id IN (...)" statement over ids that are
+        read from the partial (status='PEN', dead_line) index, so the table is never full-scanned.
+        params:
+            - batch_size: The maximum number of tasks updated by a single statement.
+            - now: The time that the dead lines are compared with, defaults to the current time.
+        return:
+            - dict: The number of expired tasks, the number of batches and the elapsed seconds.
+    """
+    batch_size = batch_size or settings.TASKS_EXPIRY_BATCH_SIZE
+    now = now or timezone.now()
+    started = time.monotonic()
+
+    # The pending tasks that are past their dead line
+    overdue = Tasks.objects.filter(status=Tasks.TaskStatus.PENDING, dead_line__lt=now)
+
+    expired = 0
+    batches = 0
+    while True:
+        # Getting the ids of the next batch through the index
+        rows = list(overdue.values_list('id', 'user_id')[:batch_size])
+        if not rows:
+            break
+        with transaction.atomic():
+            # Locking the rows of the batch that are still pending, a task completed since they
+            # were read is left out, so the counters only move by the rows that are updated
+            updated = list(Tasks.objects.select_for_update().filter(
+                id__in=[task_id for task_id, _ in rows], status=Tasks.TaskStatus.PENDING
+            ).values_list('id', 'user_id'))
+            # Expiring the batch with a single statement, stamped with one change sequence number
+            if updated:
+                expired += Tasks.objects.filter(id__in=[task_id for task_id, _ in updated]).update(
+                    status=Tasks.TaskStatus.EXPIRED,
+                    updated_at=now,
+                    change_seq=TaskChangeSequence.next_value(),
+                )
+            # update() does not send the post_save signal, so moving the counters from pending
+            # to expired here, in the transaction of the update
+            users = Counter(user_id for _, user_id in updated)
+            for user_id, count in users.items():
+                apply_status_deltas(user_id, {Tasks.TaskStatus.PENDING: -count, Tasks.TaskStatus.EXPIRED: count})
+        batches += 1
+        # Invalidating the cached lists of the users
+        for user_id in users:
+            cache.bump_version(user_id)
+        if len(rows) < batch_size:
+            break
+
+    elapsed = time.monotonic() - started
+    logger.info('Expired %d tasks in %d batches in %.3fs', expired, batches, elapsed)
+    return {'expired': expired, 'batches': batches, 'elapsed': elapsed}
+
+
+
+class TasksExpirySweeper(threading.Thread):
+    """
+        In-process runner that calls expire_overdue_tasks every interval seconds.
+    """
+
+    def __init__(self, interval, batch_size=None):
+        super().__init__(name='tasks-expiry-sweeper', daemon=True)
+        self.interval = interval
+        self.batch_size = batch_size
+        self._stopped = threading.Event()
+
+    def run(self):
+        # Sweeping until the runner is stopped
+        while not self._stopped.wait(self.interval):
+            try:
+                expire_overdue_tasks(batch_size=self.batch_size)
+            except Exception:
+                logger.exception('Tasks expiry sweep failed')
+            finally:
+                # The thread owns its database connection, so closing it if it is unusable or too old
+                close_old_connections()
+
+    def stop(self):
+        self._stopped.set()
@@ -0,0 +1,120 @@
+import logging
+import time
+
+from django.conf import settings
+from django.core import signing
+from django.db import transaction
+from django.db.models import Max, Q
+from django.utils import timezone
+
+from .models import TaskChangeSequence, TaskTombstone
+
+
+logger = logging.getLogger(__name__)
+
+# The salt of the signed continuation cursors of the sync
+CURSOR_SALT = 'tasks.sync.cursor'
+
+# The phases of a sync, the changed tasks are walked before the tombstones
+CHANGED = 'c'
+DELETED = 'd'
+
+
+
+def prune_tombstones(max_age=None, batch_size=None, now=None):
+    """
+        Delete the tombstones that are older than the longest allowed sync gap.
+        The pruned sequence number is moved forward with every batch, so the clients whose
+        token is older than a pruned tombstone are asked to do a full sync.
+        params:
+            - max_age: The longest allowed sync gap, defaults to TASKS_SYNC_MAX_GAP.
+            - batch_size: The maximum number of tombstones deleted by a single statement.
+            - now: The time that the age is measured from, defaults to the current time.
+        return:
+            - dict: The number of pruned tombstones, the number of batches and the elapsed seconds.
+    """
+    max_age = max_age or settings.TASKS_SYNC_MAX_GAP
+    batch_size = batch_size or settings.TASKS_TOMBSTONE_PRUNE_BATCH_SIZE
+    cutoff = (now or timezone.now()) - max_age
+    started = time.monotonic()
+
+    # The tombstones that are older than the cutoff, read through the deleted_at index
+    stale = TaskTombstone.objects.filter(deleted_at__lt=cutoff)
+
+    pruned = 0
+    batches = 0
+    while True:
+        ids = list(stale.values_list('id', flat=True)[:batch_size])
+        if not ids:
+            break
+        with transaction.atomic():
+            batch = TaskTombstone.objects.filter(id__in=ids)
+            # Moving the pruned sequence number forward before the tombstones are gone
+            last_seq = batch.aggregate(last_seq=Max('change_seq'))['last_seq']
+            TaskChangeSequence.objects.filter(pk=1, pruned_value__lt=last_seq).update(pruned_value=last_seq)
+            pruned += batch.delete()[0]
+        batches += 1
+        if len(ids) < batch_size:
+            break
+
+    elapsed = time.monotonic() - started
+    logger.info('Pruned %d task tombstones in %d batches in %.3fs', pruned, batches, elapsed)
+    return {'pruned': pruned, 'batches': batches, 'elapsed': elapsed}
+
+
+
+def dump_cursor(state):
+    """
+        Sign the state of a sync walk as its continuation cursor.
+    """
+    return signing.dumps(state, salt=CURSOR_SALT, compress=True)
+
+
+def load_cursor(cursor):
+    """
+        Read the state of a sync walk from its continuation cursor.
+        raise:
+            - signing.BadSignature: If the cursor was not made by dump_cursor.
+    """
+    return signing.loads(cursor, salt=CURSOR_SALT)
+
+
+def _after(queryset, state):
+    # Continuing after the last returned row on the (change_seq, id) order
+    return queryset.filter(
+        Q(change_seq__gt=state['seq']) | Q(change_seq=state['seq'], id__gt=state['id'])
+    ).order_by('change_seq', 'id')
+
+
+def read_sync_page(tasks, tombstones, state, page_size):
+    """
+        Read a single page of a sync walk: the changed tasks in (change_seq, id) order, then
+        the tombstones of the deleted tasks in the same order, each with a keyset range scan
+        on its (user, change_seq) index, so no page reads more than page_size + 1 rows of each.
+        params:
+            - tasks: The changed tasks of the walk, bounded by its token.
+            - tombstones: The tombstones of the walk bounded by its token, or None for a full sync.
+            - state: The position of the walk: the phase and the (seq, id) of the last returned row.
+            - page_size: The maximum number of changed tasks and deleted slugs of the page.
+        return:
+            - tuple: The changed tasks, the deleted slugs and the state of the next page, or None on the last page.
+    """
+    changed = []
+    if state['phase'] == CHANGED:
+        changed = list(_after(tasks, state)[:page_size + 1])
+        if len(changed) > page_size:
+            changed = changed[:page_size]
+            return changed, [], {**state, 'seq': changed[-1].change_seq, 'id': changed[-1].pk}
+        if tombstones is None:
+            return changed, [], None
+        state = {**state, 'phase': DELETED, 'seq': 0, 'id': 0}
+
+    # Filling the rest of the page with the tombstones
+    remaining = page_size - len(changed)
+    rows = list(_after(tombstones, state).values_list('change_seq', 'id', 'slug')[:remaining + 1])
+    if len(rows) <= remaining:
+        return changed, [slug for _, _, slug in rows], None
+    rows = rows[:remaining]
+    if rows:
+        state = {**state, 'seq': rows[-1][0], 'id': rows[-1][1]}
+    return changed, [slug for _, _, slug in rows], state
@@ -1,3 +1,996 @@
-from django.test import TestCase
+import io
+import json
+from datetime import datetime, timedelta, timezone as dt_timezone
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db import DatabaseError, connection, transaction
+from django.test import AsyncClient, SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Authentication.tokens import RefreshToken
+from Server import uploads
+from Users.models import User
+from . import cache as task_cache
+from .archive import archive_finished_tasks
+from .models import Tasks, ArchivedTask, TaskChangeSequence, TaskRecurrence, TaskTombstone, UserTaskStats
+from .recurrence import add_months, expand_occurrences, is_slot, iter_slots, materialize_occurrence
+from .reminders import BaseReminderBackend, send_due_reminders
+from .search import SQLiteFTSBackend
+from .serializers import TasksReadSerializer, TasksSerializer
+from .stats import apply_status_deltas, reconcile_stats
+from .sweeper import expire_overdue_tasks
+
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The query plans are checked with SQLite EXPLAIN QUERY PLAN')
+class UserTasksListQueryPlanTests(TestCase):
+    """
+    Every supported filter and ordering of the task list must stay an index range scan.
+    """
+    # The range filters of every ordering column
+    RANGE_FILTERS = {
+        'dead_line': ('dead_line_after', 'dead_line_before'),
+        'created_at': ('created_after', 'created_before'),
+        'updated_at': ('updated_after', 'updated_before'),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('planner', 'planner@example.com', 'Query Planner', 'password123')
+        now = timezone.now()
+        Tasks.objects.bulk_create_for_user(
+            cls.user,
+            [Tasks(title=f'Task {i}', dead_line=now + timedelta(days=i)) for i in range(20)],
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_page_query_plan(self, params):
+        # Capturing the query of the page and explaining it
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/tasks/', params)
+        self.assertEqual(response.status_code, 200)
+        page_queries = [query['sql'] for query in queries.captured_queries if 'ORDER BY' in query['sql']]
+        self.assertEqual(len(page_queries), 1)
+        with connection.cursor() as cursor:
+            cursor.execute('EXPLAIN QUERY PLAN ' + page_queries[0])
+            return [row[-1] for row in cursor.fetchall()]
+
+    def assert_range_scan(self, params):
+        plan = self.get_page_query_plan(params)
+        tasks_plan = [line for line in plan if 'Tasks_tasks' in line]
+        self.assertTrue(tasks_plan, plan)
+        for line in tasks_plan:
+            self.assertTrue(line.startswith('SEARCH') and 'INDEX' in line, plan)
+        self.assertFalse(any('TEMP B-TREE' in line for line in plan), plan)
+
+    def test_filters_and_orderings_use_index_range_scans(self):
+        after = (timezone.now() - timedelta(days=1)).isoformat()
+        before = (timezone.now() + timedelta(days=30)).isoformat()
+        # Every range of every column, and no range at all
+        ranges = [{}]
+        for after_filter, before_filter in self.RANGE_FILTERS.values():
+            ranges += [{after_filter: after}, {before_filter: before}, {after_filter: after, before_filter: before}]
+        orderings = [None] + [ordering for column in self.RANGE_FILTERS for ordering in (column, f'-{column}')]
+        for ordering in orderings:
+            for range_filters in ranges:
+                for status_filter in ({}, {'status': 'PEN'}):
+                    params = {**range_filters, **status_filter}
+                    if ordering is not None:
+                        params['ordering'] = ordering
+                    columns = {column for column, names in self.RANGE_FILTERS.items() if set(names) & set(range_filters)}
+                    with self.subTest(**params):
+                        if ordering is not None and columns and ordering.lstrip('-') not in columns:
+                            # A range on another column than the ordering can not be a range scan
+                            self.assertEqual(self.client.get('/tasks/', params).status_code, 400)
+                        else:
+                            self.assert_range_scan(params)
+
+    def test_ranges_on_several_columns_are_rejected(self):
+        after = timezone.now().isoformat()
+        response = self.client.get('/tasks/', {'dead_line_after': after, 'created_after': after})
+        self.assertEqual(response.status_code, 400)
+
+    def test_filters_are_applied(self):
+        Tasks.objects.filter(title='Task 0').update(status=Tasks.TaskStatus.COMPLETED)
+        response = self.client.get('/tasks/', {'status': 'COM'})
+        self.assertEqual([task['title'] for task in response.data['results']], ['Task 0'])
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get('/tasks/', {'dead_line_after': 'tomorrow'})
+        self.assertEqual(response.status_code, 400)
+
+
+
+class HistoryListTests(TestCase):
+    """
+    The history list merges the hot and the archived tasks into a single cursor ordering.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('historian', 'historian@example.com', 'History Reader', 'password123')
+        now = timezone.now()
+        Tasks.objects.bulk_create_for_user(
+            cls.user,
+            [Tasks(title=f'Task {i}', dead_line=now + timedelta(days=i)) for i in range(12)],
+        )
+        # Archiving every other task
+        Tasks.objects.filter(user=cls.user, title__in=[f'Task {i}' for i in range(0, 12, 2)]).update(
+            status=Tasks.TaskStatus.COMPLETED
+        )
+        archive_finished_tasks(age=timedelta(days=1), now=now + timedelta(days=2))
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, params):
+        titles = []
+        response = self.client.get('/tasks/', params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            titles.extend(task['title'] for task in response.data['results'])
+            if not response.data['next']:
+                return titles
+            response = self.client.get(response.data['next'])
+
+    def test_history_merges_hot_and_archived_tasks(self):
+        self.assertEqual(ArchivedTask.objects.filter(user=self.user).count(), 6)
+        expected = [f'Task {i}' for i in range(12)]
+        self.assertEqual(self.walk({'history': 'true', 'page_size': 5}), expected)
+        self.assertEqual(self.walk({'history': 'true', 'page_size': 5, 'ordering': '-dead_line'}), expected[::-1])
+        self.assertEqual(
+            self.walk({'history': 'true', 'page_size': 2, 'status': 'COM'}), [f'Task {i}' for i in range(0, 12, 2)]
+        )
+
+    def test_list_without_history_reads_hot_tasks(self):
+        self.assertEqual(self.walk({'page_size': 5}), [f'Task {i}' for i in range(1, 12, 2)])
+
+    def test_reconcile_zeroes_users_without_tasks(self):
+        other = User.objects.create_user('idle', 'idle@example.com', 'Idle User', 'password123')
+        UserTaskStats.objects.create(user=other, pending=3)
+        reconcile_stats()
+        self.assertEqual(UserTaskStats.objects.get(user=other).pending, 0)
+        stats = UserTaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.pending, stats.completed), (6, 6))
+
+
+
+class CollectingReminderBackend(BaseReminderBackend):
+    def __init__(self, fail=False):
+        self.sent = []
+        self.fail = fail
+
+    def send(self, reminders):
+        if self.fail:
+            raise ConnectionError('The backend is down')
+        self.sent.extend(reminder['title'] for reminder in reminders)
+
+
+class SendDueRemindersTests(TestCase):
+    """
+    The reminders are claimed in the database, so every reminder is sent once across runs
+    and the dead lines changed without a signal are still reminded.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reminded', 'reminded@example.com', 'Reminded User', 'password123')
+
+    def setUp(self):
+        self.now = timezone.now()
+        self.soon, self.later = Tasks.objects.bulk_create_for_user(self.user, [
+            Tasks(title='Soon', dead_line=self.now + timedelta(minutes=5)),
+            Tasks(title='Later', dead_line=self.now + timedelta(days=1)),
+        ])
+
+    def send(self, backend):
+        return send_due_reminders(lead_time=timedelta(minutes=15), now=self.now, backend=backend)
+
+    def test_reminder_is_sent_once(self):
+        backend = CollectingReminderBackend()
+        self.assertEqual(self.send(backend)['sent'], 1)
+        # A second run, or a restarted process, finds the claim in the database
+        self.assertEqual(self.send(backend)['sent'], 0)
+        self.assertEqual(backend.sent, ['Soon'])
+
+    def test_dead_line_moved_by_update_is_reminded(self):
+        Tasks.objects.filter(pk=self.later.pk).update(dead_line=self.now + timedelta(minutes=10))
+        backend = CollectingReminderBackend()
+        self.send(backend)
+        self.assertEqual(sorted(backend.sent), ['Later', 'Soon'])
+
+    def test_moved_dead_line_is_reminded_again(self):
+        backend = CollectingReminderBackend()
+        self.send(backend)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.put(f'/tasks/user-tasks/{self.soon.slug}/update/', {
+            'title': 'Soon', 'dead_line': (self.now + timedelta(minutes=10)).isoformat(),
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.send(backend)
+        self.assertEqual(backend.sent, ['Soon', 'Soon'])
+
+    def test_failed_delivery_releases_the_claim(self):
+        with self.assertRaises(ConnectionError):
+            self.send(CollectingReminderBackend(fail=True))
+        backend = CollectingReminderBackend()
+        self.send(backend)
+        self.assertEqual(backend.sent, ['Soon'])
+
+
+
+@override_settings(TASKS_SYNC_PAGE_SIZE=3)
+class SyncPaginationTests(TestCase):
+    """
+    The sync is returned in bounded pages that are walked with a continuation cursor.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('syncer', 'syncer@example.com', 'Sync Client', 'password123')
+        now = timezone.now()
+        cls.tasks = Tasks.objects.bulk_create_for_user(
+            cls.user, [Tasks(title=f'Task {i}', dead_line=now + timedelta(days=i)) for i in range(7)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, params):
+        changed, deleted, pages = [], [], 0
+        while True:
+            response = self.client.get('/tasks/user-tasks/sync/', params)
+            self.assertEqual(response.status_code, 200)
+            self.assertLessEqual(len(response.data['changed']) + len(response.data['deleted']), 3)
+            changed += [task['title'] for task in response.data['changed']]
+            deleted += response.data['deleted']
+            pages += 1
+            if response.data['next'] is None:
+                return response.data['token'], changed, deleted, pages
+            params = {'cursor': response.data['next']}
+
+    def test_full_sync_is_paginated(self):
+        token, changed, deleted, pages = self.walk({})
+        self.assertEqual(sorted(changed), sorted(task.title for task in self.tasks))
+        self.assertEqual((deleted, pages), ([], 3))
+
+    def test_delta_sync_pages_changes_and_tombstones(self):
+        token = self.walk({})[0]
+        for task in self.tasks[:2]:
+            task.title += ' changed'
+            task.save()
+        response = self.client.post(
+            '/tasks/user-tasks/bulk/delete/', {'slugs': [task.slug for task in self.tasks[2:6]]}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        new_token, changed, deleted, pages = self.walk({'since': token})
+        self.assertEqual(sorted(changed), ['Task 0 changed', 'Task 1 changed'])
+        self.assertEqual(sorted(deleted), sorted(task.slug for task in self.tasks[2:6]))
+        self.assertEqual(pages, 2)
+        self.assertEqual(self.walk({'since': new_token})[1:3], ([], []))
+
+    def test_changes_during_a_walk_are_returned_by_the_next_sync(self):
+        first = self.client.get('/tasks/user-tasks/sync/').data
+        self.tasks[6].title = 'Task 6 changed'
+        self.tasks[6].save()
+        token, changed, _, _ = self.walk({'cursor': first['next']})
+        self.assertEqual(token, first['token'])
+        self.assertNotIn('Task 6 changed', changed)
+        self.assertEqual(self.walk({'since': token})[1], ['Task 6 changed'])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get('/tasks/user-tasks/sync/', {'cursor': 'forged'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_delete_bookkeeping_is_batched(self):
+        slugs = [task.slug for task in self.tasks]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/tasks/user-tasks/bulk/delete/', {'slugs': slugs}, format='json')
+        self.assertEqual(response.status_code, 200)
+        tombstone_inserts = [query for query in queries.captured_queries if query['sql'].startswith('INSERT')]
+        self.assertEqual(len(tombstone_inserts), 1)
+        self.assertLess(len(queries.captured_queries), 20)
+        self.assertEqual(TaskTombstone.objects.filter(user=self.user).values('change_seq').distinct().count(), 1)
+        self.assertEqual(UserTaskStats.objects.get(user=self.user).pending, 0)
+
+
+
+class ExportStreamTests(TestCase):
+    """
+    The export is streamed chunk by chunk under WSGI and under ASGI.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('exporter', 'exporter@example.com', 'Task Exporter', 'password123')
+        now = timezone.now()
+        Tasks.objects.bulk_create_for_user(
+            cls.user, [Tasks(title=f'Task {i}', dead_line=now + timedelta(days=i)) for i in range(450)]
+        )
+        cls.authorization = f'Bearer {RefreshToken.for_user(cls.user).access_token}'
+
+    def test_wsgi_export_is_a_sync_stream(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/tasks/user-tasks/export/')
+        self.assertFalse(response.is_async)
+        self.assertEqual(b''.join(response.streaming_content).count(b'\n'), 450)
+
+    async def test_asgi_export_is_an_async_stream(self):
+        response = await AsyncClient().get('/tasks/user-tasks/export/', headers={'Authorization': self.authorization})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_async)
+        chunks = [chunk async for chunk in response.streaming_content]
+        # The rows are sent in groups of ROWS_PER_WRITE, not as a single body
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual(b''.join(chunks).count(b'\n'), 450)
+
+
+
+class CompactTaskSlugsTests(TestCase):
+    """
+    The rewritten slugs reach the sync clients as a delete of the old slug and a change of the task.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('compactor', 'compactor@example.com', 'Slug Compactor', 'password123')
+        now = timezone.now()
+        tasks = Tasks.objects.bulk_create_for_user(
+            cls.user, [Tasks(title=f'Task {i}', dead_line=now + timedelta(days=i)) for i in range(3)]
+        )
+        for task in tasks:
+            Tasks.objects.filter(pk=task.pk).update(slug=f'legacy-task-slug-{task.pk}')
+        cls.old_slugs = sorted(f'legacy-task-slug-{task.pk}' for task in tasks)
+
+    def test_old_slugs_are_reported_as_deleted(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        token = client.get('/tasks/user-tasks/sync/').data['token']
+        etag = client.get('/tasks/')['ETag']
+
+        call_command('compact_task_slugs', batch_size=2, stdout=io.StringIO())
+
+        # The polling clients of the list get the new slugs instead of a 304
+        self.assertEqual(client.get('/tasks/', HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        response = client.get('/tasks/user-tasks/sync/', {'since': token})
+        self.assertEqual(sorted(response.data['deleted']), self.old_slugs)
+        new_slugs = sorted(task['slug'] for task in response.data['changed'])
+        self.assertEqual(new_slugs, sorted(Tasks.objects.filter(user=self.user).values_list('slug', flat=True)))
+        self.assertFalse(set(new_slugs) & set(self.old_slugs))
+
+
+
+@skipUnless(connection.vendor == 'sqlite', 'The FTS5 search index only exists on SQLite')
+class SearchIndexTests(TestCase):
+    """
+    The FTS5 index of the tasks is kept in sync by triggers on the fully migrated table.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('searcher', 'searcher@example.com', 'Task Searcher', 'password123')
+
+    def test_triggers_survive_the_table_rebuilds(self):
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'trigger' AND tbl_name = 'Tasks_tasks'")
+            triggers = sorted(row[0] for row in cursor.fetchall())
+        self.assertEqual(triggers, ['tasks_search_delete', 'tasks_search_insert', 'tasks_search_update'])
+
+        Tasks.objects.create(user=self.user, title='Buy milk', dead_line=timezone.now() + timedelta(days=1))
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get('/tasks/user-tasks/search/', {'q': 'milk'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task['title'] for task in response.data], ['Buy milk'])
+
+    def test_backend_returns_ranked_ids_of_the_user(self):
+        backend = SQLiteFTSBackend()
+        other = User.objects.create_user('neighbour', 'neighbour@example.com', 'Neighbour', 'password123')
+        dead_line = timezone.now() + timedelta(days=1)
+        in_description = Tasks.objects.create(
+            user=self.user, title='Groceries', description='milk and bread', dead_line=dead_line
+        )
+        in_title = Tasks.objects.create(user=self.user, title='Milk the cow', dead_line=dead_line)
+        Tasks.objects.create(user=other, title='Milk for the neighbour', dead_line=dead_line)
+
+        # The title matches weigh more, and the tasks of the other user are never returned
+        self.assertEqual(backend.search(self.user, 'milk', 10), [in_title.id, in_description.id])
+        self.assertEqual(backend.search(self.user, 'mil', 1), [in_title.id])
+
+        # An update moves the task in and out of the results
+        in_title.title = 'Feed the cow'
+        in_title.save()
+        self.assertEqual(backend.search(self.user, 'milk', 10), [in_description.id])
+        self.assertEqual(backend.search(self.user, 'cow', 10), [in_title.id])
+
+        # A deleted task is dropped from the index
+        in_description.delete()
+        self.assertEqual(backend.search(self.user, 'milk', 10), [])
+        self.assertEqual(backend.search(self.user, '"*', 10), [])
+
+
+
+@override_settings(SHARED_CACHE_SINGLE_PROCESS=True)
+class TaskListCacheTests(TestCase):
+    """
+    The versions and the counters of the task list cache live in the cache shared by every process.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('cacher', 'cacher@example.com', 'List Cacher', 'password123')
+        Tasks.objects.create(user=cls.user, title='Cached task', dead_line=timezone.now() + timedelta(days=1))
+
+    def setUp(self):
+        cache.clear()
+        caches['shared'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def test_write_of_another_process_invalidates_the_list(self):
+        self.assertEqual(self.client.get('/tasks/')['X-Cache'], 'MISS')
+        self.assertEqual(self.client.get('/tasks/')['X-Cache'], 'HIT')
+        # Another process only shares the version with this one
+        caches['shared'].incr(task_cache.VERSION_KEY.format(user_id=self.user.pk))
+        self.assertEqual(self.client.get('/tasks/')['X-Cache'], 'MISS')
+
+        stdout = io.StringIO()
+        call_command('tasks_cache_stats', stdout=stdout)
+        self.assertIn('hits=1 misses=2', stdout.getvalue())
+
+    def test_lists_are_not_cached_without_a_shared_cache(self):
+        with self.settings(SHARED_CACHE_SINGLE_PROCESS=False):
+            for _ in range(2):
+                self.assertEqual(self.client.get('/tasks/')['X-Cache'], 'MISS')
+            stdout = io.StringIO()
+            call_command('tasks_cache_stats', stdout=stdout)
+        self.assertIn('cache is off', stdout.getvalue())
+
+
+
+class JSONRowsReaderTests(SimpleTestCase):
+    """
+    The JSON reader completes the objects cut by its reads, and fails at once on a malformed one.
+    """
+
+    def read(self, text, read_size=7):
+        fileobj = io.BytesIO(text.encode())
+        with mock.patch.object(uploads, 'READ_SIZE', read_size):
+            return list(uploads.iter_json_rows(fileobj)), fileobj.tell()
+
+    def test_objects_cut_by_the_reads_are_completed(self):
+        rows = [
+            {'title': 'Task "quoted"', 'done': True, 'parent': None, 'weight': -12.5e-3, 'tags': ['a', 'b']},
+            {'title': 'Ünïcode', 'done': False, 'weight': 12345678901234567890},
+        ]
+        for read_size in (1, 3, 7, 64):
+            with self.subTest(read_size=read_size):
+                self.assertEqual(self.read(json.dumps(rows), read_size)[0], rows)
+                self.assertEqual(self.read('\n'.join(json.dumps(row) for row in rows), read_size)[0], rows)
+
+    def test_malformed_object_fails_before_the_rest_of_the_file(self):
+        text = '[{"title": "ok"}, {"title": oops}, ' + ', '.join(['{"title": "filler"}'] * 50000) + ']'
+        fileobj = io.BytesIO(text.encode())
+        with self.assertRaises(ValueError):
+            list(uploads.iter_json_rows(fileobj))
+        self.assertLessEqual(fileobj.tell(), uploads.READ_SIZE)
+
+    def test_oversized_object_is_rejected(self):
+        text = '[{"title": "' + 'x' * (2 * uploads.MAX_OBJECT_SIZE) + '"}]'
+        fileobj = io.BytesIO(text.encode())
+        with self.assertRaisesMessage(ValueError, 'larger than'):
+            list(uploads.iter_json_rows(fileobj))
+        # The object is not buffered to its end
+        self.assertLess(fileobj.tell(), len(text))
+        # A complete object that is too large is rejected too
+        with self.assertRaisesMessage(ValueError, 'larger than'):
+            self.read(text[:uploads.MAX_OBJECT_SIZE + 20] + '"}]', read_size=2 * uploads.MAX_OBJECT_SIZE)
+
+
+
+class ExpireOverdueTasksTests(TestCase):
+    """
+    The expiry moves the counters by the tasks that it actually updates.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('sweeper', 'sweeper@example.com', 'Task Sweeper', 'password123')
+        now = timezone.now()
+        cls.tasks = Tasks.objects.bulk_create_for_user(
+            cls.user, [Tasks(title=f'Task {i}', dead_line=now + timedelta(days=1)) for i in range(3)]
+        )
+
+    def test_task_completed_during_the_sweep_is_not_counted(self):
+        real_atomic = transaction.atomic
+
+        def complete_then_atomic(*args, **kwargs):
+            # Another request completes a task between the read of the batch and its update
+            Tasks.objects.filter(pk=self.tasks[0].pk).update(status=Tasks.TaskStatus.COMPLETED)
+            apply_status_deltas(self.user.pk, {Tasks.TaskStatus.PENDING: -1, Tasks.TaskStatus.COMPLETED: 1})
+            return real_atomic(*args, **kwargs)
+
+        with mock.patch('Tasks.sweeper.transaction.atomic', side_effect=complete_then_atomic):
+            result = expire_overdue_tasks(now=timezone.now() + timedelta(days=2))
+
+        self.assertEqual(result['expired'], 2)
+        stats = UserTaskStats.objects.get(user=self.user)
+        self.assertEqual((stats.pending, stats.completed, stats.expired), (0, 1, 2))
+
+
+
+class TaskChangeSequenceTests(TransactionTestCase):
+    """
+    The sequence row is created on demand, so the tasks can be saved after a flush of the database.
+    """
+
+    def test_sequence_row_is_created_on_demand(self):
+        TaskChangeSequence.objects.all().delete()
+        self.assertEqual(TaskChangeSequence.current(), (0, 0))
+        user = User.objects.create_user('flushed', 'flushed@example.com', 'Flushed', 'password123')
+        task = Tasks.objects.create(user=user, title='After the flush', dead_line=timezone.now() + timedelta(days=1))
+        self.assertEqual(task.change_seq, 1)
+        self.assertEqual(TaskChangeSequence.current(), (1, 0))
+
+
+
+@override_settings(SHARED_CACHE_SINGLE_PROCESS=True)
+class BulkEndpointsTests(TestCase):
+    """
+    The bulk endpoints report the errors per item, write in a single transaction with a statement
+    per table, and keep the counters, the cached lists and the tombstones of the delta sync.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('bulker', 'bulker@example.com', 'Bulk Client', 'password123')
+        cls.dead_line = timezone.now() + timedelta(days=1)
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def create_tasks(self, count):
+        return Tasks.objects.bulk_create_for_user(
+            self.user, [Tasks(title=f'Task {i}', dead_line=self.dead_line) for i in range(count)]
+        )
+
+    def counters(self):
+        stats = UserTaskStats.objects.get(user=self.user)
+        return stats.pending, stats.completed, stats.expired
+
+    def statements(self, queries, prefix):
+        return [query['sql'] for query in queries.captured_queries if query['sql'].startswith(prefix)]
+
+    def test_bulk_create(self):
+        version = task_cache.get_version(self.user.pk)
+        items = [
+            {'title': 'First', 'dead_line': self.dead_line.isoformat()},
+            {'dead_line': self.dead_line.isoformat()},
+            {'title': 'Third', 'dead_line': self.dead_line.isoformat()},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post('/tasks/user-tasks/bulk/create/', items, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual([task['title'] for task in response.data['created']], ['First', 'Third'])
+        self.assertEqual([error['index'] for error in response.data['errors']], [1])
+        self.assertIn('title', response.data['errors'][0]['errors'])
+        self.assertEqual(len(self.statements(queries, 'INSERT INTO "Tasks_tasks"')), 1)
+        self.assertEqual(self.counters(), (2, 0, 0))
+        self.assertNotEqual(task_cache.get_version(self.user.pk), version)
+
+        # A request without a valid item creates nothing
+        response = self.client.post('/tasks/user-tasks/bulk/create/', [{'title': 'No dead line'}], format='json')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Tasks.objects.filter(user=self.user).count(), 2)
+
+    def test_bulk_update(self):
+        tasks = self.create_tasks(3)
+        version = task_cache.get_version(self.user.pk)
+        items = [
+            {'slug': tasks[0].slug, 'patch': {'status': Tasks.TaskStatus.COMPLETED}},
+            {'slug': 'missing-task', 'patch': {'title': 'Nobody'}},
+            {'slug': tasks[1].slug, 'patch': {'dead_line': 'not a date'}},
+            {'slug': tasks[2].slug, 'patch': {'title': 'Renamed'}},
+            {'patch': {}},
+        ]
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.put('/tasks/user-tasks/bulk/update/', items, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(task['slug'] for task in response.data['updated']), sorted([tasks[0].slug, tasks[2].slug]))
+        self.assertEqual([error['index'] for error in response.data['errors']], [1, 2, 4])
+        self.assertEqual(len(self.statements(queries, 'UPDATE "Tasks_tasks"')), 1)
+
+        updated = Tasks.objects.in_bulk([tasks[0].pk, tasks[1].pk, tasks[2].pk])
+        self.assertEqual(updated[tasks[0].pk].status, Tasks.TaskStatus.COMPLETED)
+        self.assertEqual(updated[tasks[2].pk].title, 'Renamed')
+        self.assertEqual(updated[tasks[1].pk].dead_line, tasks[1].dead_line)
+        # The whole batch is stamped with one change sequence number
+        self.assertEqual(updated[tasks[0].pk].change_seq, updated[tasks[2].pk].change_seq)
+        self.assertGreater(updated[tasks[0].pk].change_seq, tasks[1].change_seq)
+        self.assertEqual(self.counters(), (2, 1, 0))
+        self.assertNotEqual(task_cache.get_version(self.user.pk), version)
+
+    def test_bulk_delete(self):
+        tasks = self.create_tasks(3)
+        Tasks.objects.filter(pk=tasks[0].pk).update(status=Tasks.TaskStatus.COMPLETED)
+        apply_status_deltas(self.user.pk, {Tasks.TaskStatus.PENDING: -1, Tasks.TaskStatus.COMPLETED: 1})
+        version = task_cache.get_version(self.user.pk)
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(
+                '/tasks/user-tasks/bulk/delete/', {'slugs': [tasks[0].slug, tasks[1].slug, 'missing-task']}, format='json'
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['deleted'], sorted([tasks[0].slug, tasks[1].slug]))
+        self.assertEqual(response.data['not_found'], ['missing-task'])
+        self.assertEqual(len(self.statements(queries, 'INSERT INTO "Tasks_tasktombstone"')), 1)
+
+        self.assertEqual(list(Tasks.objects.filter(user=self.user).values_list('pk', flat=True)), [tasks[2].pk])
+        tombstones = TaskTombstone.objects.filter(user=self.user)
+        self.assertEqual(sorted(tombstones.values_list('slug', flat=True)), sorted([tasks[0].slug, tasks[1].slug]))
+        self.assertEqual(len({tombstone.change_seq for tombstone in tombstones}), 1)
+        self.assertEqual(self.counters(), (1, 0, 0))
+        self.assertNotEqual(task_cache.get_version(self.user.pk), version)
+
+    def test_bulk_delete_is_a_single_transaction(self):
+        tasks = self.create_tasks(2)
+        with mock.patch.object(TaskTombstone.objects, 'bulk_create', side_effect=DatabaseError('tombstones failed')):
+            with self.assertRaises(DatabaseError):
+                self.client.post('/tasks/user-tasks/bulk/delete/', {'slugs': [task.slug for task in tasks]}, format='json')
+        # The tasks are kept with their tombstones
+        self.assertEqual(Tasks.objects.filter(user=self.user).count(), 2)
+        self.assertEqual(self.counters(), (2, 0, 0))
+
+    def test_bulk_update_is_a_single_transaction(self):
+        tasks = self.create_tasks(2)
+        items = [{'slug': task.slug, 'patch': {'title': 'Renamed'}} for task in tasks]
+        with mock.patch.object(Tasks.objects, 'bulk_update', side_effect=DatabaseError('update failed')):
+            with self.assertRaises(DatabaseError):
+                self.client.put('/tasks/user-tasks/bulk/update/', items, format='json')
+        # The change sequence taken by the failed batch is rolled back with it
+        self.assertEqual(TaskChangeSequence.current()[0], max(task.change_seq for task in tasks))
+
+
+
+class RecurrenceSlotsTests(SimpleTestCase):
+    """
+    The date arithmetic of the recurrence rules.
+    """
+
+    def at(self, *args):
+        return datetime(*args, 9, 30, tzinfo=dt_timezone.utc)
+
+    def slots(self, frequency, first, start, end, interval=1, until=None):
+        rule = TaskRecurrence(frequency=frequency, interval=interval, until=until)
+        return list(iter_slots(rule, first, start, end))
+
+    def test_add_months_clamps_the_day(self):
+        self.assertEqual(add_months(self.at(2027, 1, 31), 1), self.at(2027, 2, 28))
+        self.assertEqual(add_months(self.at(2028, 1, 31), 1), self.at(2028, 2, 29))
+        self.assertEqual(add_months(self.at(2027, 12, 15), 1), self.at(2028, 1, 15))
+        self.assertEqual(add_months(self.at(2027, 3, 31), 13), self.at(2028, 4, 30))
+
+    def test_monthly_slots_do_not_drift(self):
+        slots = self.slots(TaskRecurrence.Frequency.MONTHLY, self.at(2027, 1, 31), self.at(2027, 1, 1), self.at(2027, 6, 1))
+        self.assertEqual(slots, [self.at(2027, 1, 31), self.at(2027, 2, 28), self.at(2027, 3, 31), self.at(2027, 4, 30), self.at(2027, 5, 31)])
+
+    def test_first_slot_of_a_late_window_is_computed_from_the_interval(self):
+        daily = self.slots(TaskRecurrence.Frequency.DAILY, self.at(2027, 1, 1), self.at(2027, 1, 8), self.at(2027, 1, 17), interval=3)
+        self.assertEqual(daily, [self.at(2027, 1, 10), self.at(2027, 1, 13), self.at(2027, 1, 16)])
+        weekly = self.slots(TaskRecurrence.Frequency.WEEKLY, self.at(2027, 1, 1), self.at(2027, 2, 1), self.at(2027, 3, 1), interval=2)
+        self.assertEqual(weekly, [self.at(2027, 2, 12), self.at(2027, 2, 26)])
+        monthly = self.slots(TaskRecurrence.Frequency.MONTHLY, self.at(2027, 1, 31), self.at(2027, 6, 15), self.at(2027, 10, 1), interval=2)
+        self.assertEqual(monthly, [self.at(2027, 7, 31), self.at(2027, 9, 30)])
+        # A window before the first occurrence starts at the first occurrence
+        self.assertEqual(
+            self.slots(TaskRecurrence.Frequency.DAILY, self.at(2027, 1, 5), self.at(2027, 1, 1), self.at(2027, 1, 7)),
+            [self.at(2027, 1, 5), self.at(2027, 1, 6)],
+        )
+
+    def test_until_is_inclusive(self):
+        slots = self.slots(
+            TaskRecurrence.Frequency.DAILY, self.at(2027, 1, 1), self.at(2027, 1, 1), self.at(2027, 2, 1),
+            until=self.at(2027, 1, 3),
+        )
+        self.assertEqual(slots, [self.at(2027, 1, 1), self.at(2027, 1, 2), self.at(2027, 1, 3)])
+
+
+
+class ExpandOccurrencesTests(TestCase):
+    """
+    The expansion skips the template and the materialized slots, and merges the rules up to the limit.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('recurrer', 'recurrer@example.com', 'Recurring Tasks', 'password123')
+        cls.first = datetime(2027, 1, 1, 9, 30, tzinfo=dt_timezone.utc)
+        cls.daily = TaskRecurrence.objects.create(
+            task=Tasks.objects.create(user=cls.user, title='Daily', dead_line=cls.first),
+            frequency=TaskRecurrence.Frequency.DAILY,
+        )
+        cls.weekly = TaskRecurrence.objects.create(
+            task=Tasks.objects.create(user=cls.user, title='Weekly', dead_line=cls.first + timedelta(hours=1)),
+            frequency=TaskRecurrence.Frequency.WEEKLY,
+        )
+
+    def test_expansion(self):
+        materialized, created = materialize_occurrence(self.daily, self.first + timedelta(days=2), {'title': 'Moved'})
+        self.assertTrue(created)
+        self.assertTrue(is_slot(self.daily, self.first + timedelta(days=3)))
+        self.assertFalse(is_slot(self.daily, self.first + timedelta(days=3, hours=1)))
+
+        occurrences = expand_occurrences(self.user, self.first, self.first + timedelta(days=9), limit=100)
+        expected = [
+            (self.first + timedelta(days=day), self.daily.pk) for day in (1, 3, 4, 5, 6, 7, 8)
+        ] + [(self.first + timedelta(days=7, hours=1), self.weekly.pk)]
+        self.assertEqual([(slot, rule.pk) for slot, rule in occurrences], sorted(expected))
+
+        # The limit keeps the earliest occurrences of every rule
+        truncated = expand_occurrences(self.user, self.first, self.first + timedelta(days=9), limit=3)
+        self.assertEqual([(slot, rule.pk) for slot, rule in truncated], sorted(expected)[:3])
+        # Materializing the same slot again returns the existing row
+        self.assertEqual(materialize_occurrence(self.daily, self.first + timedelta(days=2), {}), (materialized, False))
+
+
+
+class UserTaskStatsTests(TestCase):
+    """
+    The counters move with atomic F() deltas on every create, status change and delete,
+    and reconcile_stats repairs the counters that drifted.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('counter', 'counter@example.com', 'Task Counter', 'password123')
+
+    def counters(self):
+        stats = UserTaskStats.objects.get(user=self.user)
+        return stats.pending, stats.completed, stats.expired
+
+    def create(self, title, **kwargs):
+        kwargs.setdefault('dead_line', timezone.now() + timedelta(days=3))
+        return Tasks.objects.create(user=self.user, title=title, **kwargs)
+
+    def test_deltas_follow_the_task_changes(self):
+        tasks = [self.create(f'Task {i}') for i in range(3)]
+        self.assertEqual(self.counters(), (3, 0, 0))
+
+        # Two copies of the same counters row, each change is added to the stored value
+        first, second = Tasks.objects.get(pk=tasks[0].pk), Tasks.objects.get(pk=tasks[1].pk)
+        first.status = Tasks.TaskStatus.COMPLETED
+        second.status = Tasks.TaskStatus.EXPIRED
+        with CaptureQueriesContext(connection) as queries:
+            first.save()
+            second.save()
+        updates = [query['sql'] for query in queries.captured_queries if query['sql'].startswith('UPDATE "Tasks_usertaskstats"')]
+        self.assertEqual(len(updates), 2)
+        # The deltas are added by the database, never written from a value read before
+        self.assertTrue(all('"pending" = ("Tasks_usertaskstats"."pending" + -1)' in sql for sql in updates))
+        self.assertEqual(self.counters(), (1, 1, 1))
+
+        # Saving without a status change moves nothing
+        first.title = 'Renamed'
+        first.save()
+        self.assertEqual(self.counters(), (1, 1, 1))
+
+        first.delete()
+        tasks[2].delete()
+        self.assertEqual(self.counters(), (0, 0, 1))
+
+    def test_stats_view(self):
+        self.create('Overdue', dead_line=timezone.now() - timedelta(days=1))
+        self.create('This week')
+        self.create('Later', dead_line=timezone.now() + timedelta(days=30))
+        self.create('Done', status=Tasks.TaskStatus.COMPLETED)
+        UserTaskStats.objects.filter(user=self.user).delete()
+
+        client = APIClient()
+        client.force_authenticate(self.user)
+        # The missing counters are built from the tasks on the first read
+        response = client.get('/tasks/user-tasks/stats/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            {key: response.data[key] for key in ('pending', 'completed', 'expired', 'overdue', 'due_this_week')},
+            {'pending': 3, 'completed': 1, 'expired': 0, 'overdue': 1, 'due_this_week': 1},
+        )
+
+    def test_reconcile_repairs_drift(self):
+        self.create('Pending')
+        self.create('Done', status=Tasks.TaskStatus.COMPLETED)
+        other = User.objects.create_user('drifted', 'drifted@example.com', 'Drifted', 'password123')
+        Tasks.objects.create(user=other, title='No counters', dead_line=timezone.now() + timedelta(days=1))
+        UserTaskStats.objects.filter(user=other).delete()
+        # Writes that skipped the signals
+        UserTaskStats.objects.filter(user=self.user).update(pending=40, expired=2)
+
+        self.assertEqual(reconcile_stats(), 2)
+        self.assertEqual(self.counters(), (1, 1, 0))
+        stats = UserTaskStats.objects.get(user=other)
+        self.assertEqual((stats.pending, stats.completed, stats.expired), (1, 0, 0))
+
+
+
+class TasksCursorPaginationTests(TestCase):
+    """
+    The cursor pages are complete and stable when many tasks share a dead line, because the
+    id breaks the ties of every ordering.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('paginator', 'paginator@example.com', 'Page Reader', 'password123')
+        now = timezone.now().replace(microsecond=0)
+        # Three dead lines shared by seven tasks each
+        cls.tasks = Tasks.objects.bulk_create_for_user(
+            cls.user, [Tasks(title=f'Task {i}', dead_line=now + timedelta(days=i % 3)) for i in range(21)]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def walk(self, params, direction='next'):
+        slugs, pages = [], []
+        response = self.client.get('/tasks/', params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            pages.append([task['slug'] for task in response.data['results']])
+            slugs.extend(pages[-1])
+            if not response.data[direction]:
+                return slugs, pages, response
+            response = self.client.get(response.data[direction])
+
+    def expected(self, reverse=False):
+        ordered = sorted(self.tasks, key=lambda task: (task.dead_line, task.id), reverse=reverse)
+        return [task.slug for task in ordered]
+
+    def test_pages_are_complete_across_ties(self):
+        for page_size in (1, 4, 7, 20):
+            with self.subTest(page_size=page_size):
+                slugs, pages, _ = self.walk({'page_size': page_size})
+                self.assertEqual(slugs, self.expected())
+                self.assertTrue(all(len(page) <= page_size for page in pages))
+                descending = self.walk({'page_size': page_size, 'ordering': '-dead_line'})[0]
+                self.assertEqual(descending, self.expected(reverse=True))
+
+    def test_previous_pages_walk_back_every_task(self):
+        forward, pages, last = self.walk({'page_size': 4})
+        back = [pages[-1]]
+        response = last
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            back.append([task['slug'] for task in response.data['results']])
+        # The previous pages end right before the current one, so every task is read once again
+        self.assertEqual([slug for page in back[::-1] for slug in page], forward)
+
+    def test_task_added_during_a_walk_does_not_shift_the_pages(self):
+        first = self.client.get('/tasks/', {'page_size': 5, 'ordering': '-dead_line'})
+        # A task that ties with the tasks of the first page sorts before them by its id
+        added, = Tasks.objects.bulk_create_for_user(self.user, [Tasks(title='Added', dead_line=self.tasks[2].dead_line)])
+        response = first
+        seen = []
+        while True:
+            seen.extend(task['slug'] for task in response.data['results'])
+            if not response.data['next']:
+                break
+            response = self.client.get(response.data['next'])
+        # No task of the first page is read again and none is skipped
+        self.assertEqual(seen, self.expected(reverse=True))
+        self.assertNotIn(added.slug, seen)
+
+
+
+class TasksSparseFieldsTests(TestCase):
+    """
+    The ?fields= param trims the output of the task list and the columns that its query selects.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('sparse', 'sparse@example.com', 'Sparse Reader', 'password123')
+        Tasks.objects.bulk_create_for_user(
+            cls.user, [Tasks(title='Sparse', description='Not asked for', dead_line=timezone.now())]
+        )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get_tasks(self, fields):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/tasks/', {'fields': fields})
+        # The page query, the ETag of the list reads an aggregate of the tasks as well
+        pages = [query['sql'] for query in queries if '"Tasks_tasks"' in query['sql'] and 'LIMIT' in query['sql']]
+        self.assertEqual(len(pages), 1)
+        return response, pages[0]
+
+    def test_fields_trim_the_output_and_the_columns(self):
+        response, sql = self.get_tasks('title,slug')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([list(task) for task in response.data['results']], [['title', 'slug']])
+        self.assertIn('"Tasks_tasks"."title"', sql)
+        self.assertNotIn('"Tasks_tasks"."description"', sql)
+        # The owner is only joined when the user field is asked for
+        self.assertNotIn('"Users_user"', sql)
+
+    def test_user_field_reads_the_username_in_the_same_query(self):
+        response, sql = self.get_tasks('user')
+        self.assertEqual(response.data['results'], [{'user': 'sparse'}])
+        self.assertIn('"Users_user"."username"', sql)
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get('/tasks/', {'fields': 'title,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
+
+
+
+class TasksReadSerializerTests(TestCase):
+    """
+    The read serializer builds the same output as TasksSerializer, with a single query per page.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('reader', 'reader@example.com', 'Fast Reader', 'password123')
+        now = timezone.now()
+        cls.tasks = Tasks.objects.bulk_create_for_user(cls.user, [
+            Tasks(title=f'Task {i}', description=None if i % 2 else f'About {i}', dead_line=now + timedelta(days=i))
+            for i in range(10)
+        ])
+        # A completed task and a materialized occurrence of a recurring task
+        Tasks.objects.filter(pk=cls.tasks[1].pk).update(status=Tasks.TaskStatus.COMPLETED)
+        rule = TaskRecurrence.objects.create(task=cls.tasks[0], frequency=TaskRecurrence.Frequency.DAILY)
+        Tasks.objects.filter(pk=cls.tasks[2].pk).update(recurrence=rule, occurrence_date=cls.tasks[2].dead_line)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def expected(self, queryset):
+        # The output of the DRF serializer, with its field order
+        return [list(data.items()) for data in TasksSerializer(queryset, many=True).data]
+
+    def test_list_matches_the_model_serializer(self):
+        response = self.client.get('/tasks/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [list(data.items()) for data in response.data['results']],
+            self.expected(Tasks.objects.filter(user=self.user).order_by('dead_line', 'id')),
+        )
+
+    def test_detail_matches_the_model_serializer(self):
+        for task in self.tasks[:3]:
+            with self.subTest(task=task.title):
+                response = self.client.get(f'/tasks/user-tasks/{task.slug}/')
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual([list(response.data.items())], self.expected(Tasks.objects.filter(pk=task.pk)))
+
+    def test_page_is_a_single_query(self):
+        serializer = TasksReadSerializer()
+        with self.assertNumQueries(1):
+            data = serializer.serialize(serializer.get_queryset(Tasks.objects.filter(user=self.user)))
+        self.assertEqual(len(data), 10)
+        self.assertTrue(all(row['user'] == 'reader' for row in data))
+
+        # The list view reads the ETag aggregate and the page, no query per task
+        with CaptureQueriesContext(connection) as queries:
+            self.assertEqual(self.client.get('/tasks/').status_code, 200)
+        self.assertEqual(len(queries), 2)
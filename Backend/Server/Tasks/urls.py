@@ -0,0 +1,14 @@
+# Import the necessary modules
+from django.urls import path, include
+from .routers import UserTasksRouter
+
+app_name = "Tasks"
+
+# Create an instance of the custom router
+router = UserTasksRouter()
+
+# Define the URL patterns for the application
+urlpatterns = [
+    # Include the custom router URLs
+    path('', include(router.urls)),
+]
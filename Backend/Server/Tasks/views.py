@@ -1,14 +1,94 @@
+import csv
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core import signing
 from django.shortcuts import get_object_or_404
+from django.http import StreamingHttpResponse
+from django.utils.text import compress_sequence
+from django.db import transaction
+from django.db.models import Max, Count, Q
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 
 from rest_framework.views import APIView, Response
 from rest_framework import status
 from rest_framework.viewsets import ModelViewSet
 from rest_framework.permissions import IsAuthenticated
 
-from .models import Tasks
-from .serializers import TasksSerializer
+from Server import uploads
+from Server.fieldsets import get_sparse_fields
+
+from .models import Tasks, TaskChangeSequence, TaskTombstone, UserTaskStats, TaskRecurrence, ArchivedTask
+from .serializers import TasksSerializer, TasksReadSerializer, TasksFilterSerializer, TasksBulkUpdateSerializer, TasksBulkDeleteSerializer
+from .serializers import TaskRecurrenceSerializer, TaskOccurrenceSerializer
 from .permissions import IsTheTaksOwner
+from .pagination import TasksCursorPagination, MergedQuerySet
+from .search import get_search_backend
+from .identifiers import is_compact_slug
+from .stats import apply_status_deltas, rebuild_user_stats
+from .recurrence import expand_occurrences, is_slot, materialize_occurrence
+from .signals import bulk_delete_bookkeeping
+from . import export
+from . import sync
+from . import importer
+from . import cache
+
+
+# The maximum number of tasks that can be sent in a single bulk request
+BULK_MAX_ITEMS = 500
+
+# The default and the maximum number of tasks returned by a search
+SEARCH_DEFAULT_LIMIT = 20
+SEARCH_MAX_LIMIT = 100
+
+# The widest window of the occurrences view, and the default and the maximum number of occurrences
+OCCURRENCES_MAX_WINDOW = timedelta(days=366)
+OCCURRENCES_DEFAULT_LIMIT = 1000
+OCCURRENCES_MAX_LIMIT = 5000
+
+
+
+def wants_history(request):
+    """
+        Check if the client asked for the archived tasks with ?history=true.
+    """
+    return request.query_params.get('history', '').lower() in ('1', 'true', 'yes')
+
 
+def task_slug_q(slug):
+    """
+        Build the lookup of a task by its slug. A slug that is not in the compact form may be
+        an old slug that was rewritten, so it is also looked up in the slug aliases.
+    """
+    if is_compact_slug(slug):
+        return Q(slug=slug)
+    return Q(slug=slug) | Q(slug_aliases__old_slug=slug)
+
+
+def tasks_list_etag(request, *args, **kwargs):
+    """
+        Build the ETag of the user tasks list from (max(updated_at), count) and the query params,
+        so an unchanged list is answered with 304 without serializing anything.
+    """
+    validator = Tasks.objects.filter(user=request.user).aggregate(
+        last_update=Max('updated_at'), count=Count('id')
+    )
+    last_update = validator['last_update'].timestamp() if validator['last_update'] else 0
+    return f"{validator['count']}-{last_update}-{cache.get_params_digest(request.query_params)}"
+
+
+def task_etag(request, slug, *args, **kwargs):
+    """
+        Build the ETag of a single user task from its updated_at field.
+    """
+    validator = Tasks.objects.filter(task_slug_q(slug), user=request.user).values_list('pk', 'updated_at').first()
+    if validator is None:
+        return None
+    pk, last_update = validator
+    return f'{pk}-{last_update.timestamp()}'
 
 
 class UserTasksViewSet(ModelViewSet):
@@ -23,27 +103,69 @@ class UserTasksViewSet(ModelViewSet):
     permission_classes = [IsAuthenticated, IsTheTaksOwner]
     # Define the lookup_field for the viewset
     lookup_field = 'slug'
+    # Define the pagination class for the viewset
+    pagination_class = TasksCursorPagination
+
+    # Getting the task of the detail routes by its slug or one of its old slugs
+    def get_object(self):
+        instance = get_object_or_404(self.get_queryset(), task_slug_q(self.kwargs['slug']), user=self.request.user)
+        self.check_object_permissions(self.request, instance)
+        return instance
 
     # Define the list method for the viewset
+    @method_decorator(condition(etag_func=tasks_list_etag))
     def list(self, request):
         """
             Handel a get request for the list of the user tasks.
             params:
                 - request: The request object.
             return:
-                - Response: The response object with the list of the user tasks.
+                - Response: The response object with a page of the user tasks.
         """
-        queryset = self.get_queryset()
+        # Returning the cached page if the user tasks have not changed since it was built
+        cache_key = cache.get_list_key(request.user.pk, request.query_params)
+        data = cache.get_list(cache_key)
+        if data is not None:
+            return Response(data, status=status.HTTP_200_OK, headers={'X-Cache': 'HIT'})
+
+        # Getting the fields that the client asked for with ?fields=
+        fields = get_sparse_fields(request, self.serializer_class)
 
-        instance = queryset.filter(user=request.user)
+        # Validating the filters that the client asked for
+        filters = TasksFilterSerializer(data=request.query_params)
+        filters.is_valid(raise_exception=True)
+        # The filters keep the ordering on the column of their range
+        self.task_ordering = filters.validated_data['ordering']
 
-        serializer = self.serializer_class(instance, many=True)
+        # Reading only the columns of those fields, and the columns of the cursor, as dicts
+        serializer = TasksReadSerializer(fields)
+        tables = [self.get_queryset()]
+        if wants_history(request):
+            # Merging the archived tasks into the hot ones only when the client asks for the history
+            tables.append(ArchivedTask.objects.all())
+        querysets = [
+            serializer.get_queryset(
+                filters.filter_queryset(queryset.filter(user=request.user)),
+                extra=('id', 'dead_line', 'created_at', 'updated_at')
+            )
+            for queryset in tables
+        ]
+        instance = MergedQuerySet(*querysets) if len(querysets) > 1 else querysets[0]
+
+        # Getting a single page of the tasks by the cursor
+        page = self.paginate_queryset(instance)
         
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        # Returning the page with the next and previous cursors
+        response = self.get_paginated_response(serializer.serialize(page))
+        # Caching the page under the current version of the user tasks
+        cache.set_list(cache_key, response.data)
+        response['X-Cache'] = 'MISS'
+        return response
     
 
     # Define the retrieve method for the viewset
-    def retrive(self, request, slug):
+    @method_decorator(condition(etag_func=task_etag))
+    def retrieve(self, request, slug):
         """
             Handel the get request for a single user task.
             params:
@@ -52,12 +174,16 @@ class UserTasksViewSet(ModelViewSet):
             return:
                 - Response: The response object with the single user task.
         """
-        # The get_object method will return the object that matches the lookup value
-        instance = get_object_or_404(Tasks, slug=slug)
-        # The serializer will serialize the instance
-        serializer = self.serializer_class(instance, many=False)
+        serializer = TasksReadSerializer()
+        # Reading the task and the username of its owner with a single query
+        instance = serializer.get_queryset(Tasks.objects.filter(task_slug_q(slug), user=request.user)).first()
+        if instance is None and wants_history(request):
+            # Falling back to the archive when the client asks for the history
+            instance = serializer.get_queryset(ArchivedTask.objects.filter(slug=slug, user=request.user)).first()
+        if instance is None:
+            return Response({'error': 'Task not found.'}, status=status.HTTP_404_NOT_FOUND)
         # Returning the task data witch is serialized by serializer
-        return Response(serializer.data, status=status.HTTP_200_OK)
+        return Response(serializer.to_representation(instance), status=status.HTTP_200_OK)
     
 
     # defining the create method for the viewset
@@ -94,7 +220,7 @@ class UserTasksViewSet(ModelViewSet):
         # The queryset is already defined in the viewset
         queryset = self.get_queryset()
         # The get_object method will return the object that matches the lookup value
-        instance = get_object_or_404(Tasks, slug=slug, user=request.user)
+        instance = get_object_or_404(Tasks, task_slug_q(slug), user=request.user)
         # The serializer will serialize the instance
         serializer = TasksSerializer(instance, data=request.data)
         # If the serializer is valid, saving the task
@@ -118,8 +244,513 @@ class UserTasksViewSet(ModelViewSet):
                 - Response: The response object with the message of the task deletion.
         """
         # The get_object method will return the object that matches the lookup value
-        instance = get_object_or_404(Tasks, slug=slug, user=request.user)
+        instance = get_object_or_404(Tasks, task_slug_q(slug), user=request.user)
         # Deleting the instance
         self.perform_destroy(instance)
         # Returning the message of the task deletion
-        return Response({'Message':'Task has been deleted.'}, status=status.HTTP_204_NO_CONTENT)
\ No newline at end of file
+        return Response({'Message':'Task has been deleted.'}, status=status.HTTP_204_NO_CONTENT)
+    
+
+    # Define the bulk create method for the viewset
+    def bulk_create(self, request):
+        """
+            Handle the post request for creating a list of tasks at once.
+            params:
+                - request: The request object, the data is a list of tasks.
+            return:
+                - Response: The response object with the created tasks and the errors of the invalid items.
+        """
+        # Checking the shape of the request data
+        error = self._validate_bulk_payload(request.data)
+        if error:
+            return error
+
+        tasks = []
+        errors = []
+        # Validating every item and building the task instances in memory
+        for index, item in enumerate(request.data):
+            serializer = self.serializer_class(data=item)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            tasks.append(Tasks(**serializer.validated_data))
+
+        # Inserting all of the valid tasks with a single query
+        created = Tasks.objects.bulk_create_for_user(request.user, tasks)
+
+        # Returning the created tasks and the errors of the invalid items
+        return Response(
+            {
+                'created': self.serializer_class(created, many=True).data,
+                'errors': errors,
+            },
+            status=status.HTTP_201_CREATED if created else status.HTTP_400_BAD_REQUEST
+        )
+    
+
+    # Define the bulk update method for the viewset
+    def bulk_update(self, request):
+        """
+            Handle the put request for updating a list of tasks at once.
+            params:
+                - request: The request object, the data is a list of {"slug": ..., "patch": {...}} items.
+            return:
+                - Response: The response object with the updated tasks and the errors of the invalid items.
+        """
+        # Checking the shape of the request data
+        error = self._validate_bulk_payload(request.data)
+        if error:
+            return error
+
+        items = []
+        errors = []
+        # Validating the shape of every item
+        for index, item in enumerate(request.data):
+            serializer = TasksBulkUpdateSerializer(data=item)
+            if not serializer.is_valid():
+                errors.append({'index': index, 'errors': serializer.errors})
+                continue
+            items.append((index, serializer.validated_data))
+
+        with transaction.atomic():
+            # Getting all of the user tasks that are going to be updated with a single query
+            instances = self.get_queryset().filter(user=request.user).select_for_update().in_bulk(
+                [item['slug'] for _, item in items], field_name='slug'
+            )
+
+            updated = {}
+            fields = {'updated_at'}
+            now = timezone.now()
+            # Applying the patches to the instances in memory
+            for index, item in items:
+                instance = instances.get(item['slug'])
+                if instance is None:
+                    errors.append({'index': index, 'errors': {'slug': ['Task not found.']}})
+                    continue
+                serializer = self.serializer_class(instance, data=item['patch'], partial=True)
+                if not serializer.is_valid():
+                    errors.append({'index': index, 'errors': serializer.errors})
+                    continue
+                for field, value in serializer.validated_data.items():
+                    if field == 'dead_line' and value != instance.dead_line:
+                        # A moved dead line is reminded again
+                        instance.reminded_at = None
+                        fields.add('reminded_at')
+                    setattr(instance, field, value)
+                    fields.add(field)
+                # bulk_update does not touch the auto_now fields by itself
+                instance.updated_at = now
+                updated[instance.slug] = instance
+
+            # Updating all of the valid tasks with a single query
+            if updated:
+                # bulk_update does not call save(), so stamping the whole batch with one sequence number here
+                change_seq = TaskChangeSequence.next_value()
+                for instance in updated.values():
+                    instance.change_seq = change_seq
+                fields.add('change_seq')
+                Tasks.objects.bulk_update(updated.values(), sorted(fields))
+
+        # bulk_update does not send the post_save signal, so invalidating the cached lists,
+        # and counting the status changes here
+        if updated:
+            cache.bump_version(request.user.pk)
+            deltas = Counter()
+            for instance in updated.values():
+                if instance._stored_status != instance.status:
+                    deltas[instance._stored_status] -= 1
+                    deltas[instance.status] += 1
+                    instance._stored_status = instance.status
+            apply_status_deltas(request.user.pk, deltas)
+
+        # Returning the updated tasks and the errors of the invalid items
+        return Response(
+            {
+                'updated': self.serializer_class(updated.values(), many=True).data,
+                'errors': sorted(errors, key=lambda error: error['index']),
+            },
+            status=status.HTTP_200_OK if updated else status.HTTP_400_BAD_REQUEST
+        )
+    
+
+    # Define the bulk delete method for the viewset
+    def bulk_delete(self, request):
+        """
+            Handle the post request for deleting a list of tasks at once.
+            params:
+                - request: The request object, the data is {"slugs": [...]}.
+            return:
+                - Response: The response object with the deleted slugs and the slugs that were not found.
+        """
+        serializer = TasksBulkDeleteSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        slugs = set(serializer.validated_data['slugs'])
+
+        with transaction.atomic():
+            # Filtering the user tasks by the requested slugs
+            queryset = self.get_queryset().filter(user=request.user, slug__in=slugs)
+            rows = list(queryset.values_list('slug', 'status'))
+            deleted = {slug for slug, _ in rows}
+            # Deleting all of the tasks with a single query, the bookkeeping is done once below
+            with bulk_delete_bookkeeping():
+                queryset.delete()
+            # Leaving the tombstones of the whole batch with one sequence number and a single insert
+            if rows:
+                change_seq = TaskChangeSequence.next_value()
+                TaskTombstone.objects.bulk_create([
+                    TaskTombstone(user=request.user, slug=slug, change_seq=change_seq) for slug, _ in rows
+                ])
+
+        # Invalidating the cached lists and counting the deleted tasks
+        if rows:
+            cache.bump_version(request.user.pk)
+            apply_status_deltas(request.user.pk, {
+                task_status: -count for task_status, count in Counter(task_status for _, task_status in rows).items()
+            })
+
+        # Returning the deleted slugs and the slugs that were not found
+        return Response(
+            {
+                'deleted': sorted(deleted),
+                'not_found': sorted(slugs - deleted),
+            },
+            status=status.HTTP_200_OK
+        )
+    
+
+    # Define the sync method for the viewset
+    def sync(self, request):
+        """
+            Handle the get request for the changes of the user tasks since a sync token.
+            The changes are returned in pages of TASKS_SYNC_PAGE_SIZE: while "next" is set, the
+            client asks for it with ?cursor=, and it stores the token only after the last page.
+            Every page of a walk is bounded by the token of its first page, so the changes
+            made during the walk are returned by the next sync.
+            params:
+                - request: The request object, with the "since" token of the last sync, or the "cursor" of the next page.
+            return:
+                - Response: The response object with a page of the changed tasks and the deleted slugs, the token and the next cursor.
+        """
+        cursor = request.query_params.get('cursor')
+        if cursor is not None:
+            # Continuing a walk from its cursor
+            try:
+                state = sync.load_cursor(cursor)
+            except signing.BadSignature:
+                return Response({'error': 'The sync cursor is not valid.'}, status=status.HTTP_400_BAD_REQUEST)
+            pruned_token = TaskChangeSequence.current()[1]
+        else:
+            # Getting the token of the last sync, a missing token asks for a full sync
+            since = request.query_params.get('since')
+            if since is not None:
+                try:
+                    since = int(since)
+                except ValueError:
+                    return Response({'error': 'The sync token must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+            # Every change up to the last committed sequence number is visible at this point
+            token, pruned_token = TaskChangeSequence.current()
+            state = {'since': since, 'token': token, 'phase': sync.CHANGED, 'seq': 0, 'id': 0}
+
+        since, token = state['since'], state['token']
+        # The tombstones that the client needs have been pruned, so it must do a full sync
+        if since is not None and since < pruned_token:
+            return Response(
+                {'error': 'The sync token is too old, a full sync is required.'},
+                status=status.HTTP_410_GONE
+            )
+
+        changed = self.get_queryset().filter(user=request.user, change_seq__lte=token)
+        deleted = None
+        if since is not None:
+            changed = changed.filter(change_seq__gt=since)
+            deleted = TaskTombstone.objects.filter(user=request.user, change_seq__gt=since, change_seq__lte=token)
+
+        # Reading a single page of the walk
+        changed, deleted, state = sync.read_sync_page(
+            changed.select_related('user'), deleted, state, settings.TASKS_SYNC_PAGE_SIZE
+        )
+
+        # Returning the page, the token of the next sync and the cursor of the next page
+        return Response(
+            {
+                'token': token,
+                'changed': self.serializer_class(changed, many=True).data,
+                'deleted': deleted,
+                'next': sync.dump_cursor(state) if state is not None else None,
+            },
+            status=status.HTTP_200_OK
+        )
+    
+
+    # Define the stats method for the viewset
+    def stats(self, request):
+        """
+            Handle the get request for the task statistics of the user.
+            params:
+                - request: The request object.
+            return:
+                - Response: The response object with the task counters of the user.
+        """
+        # Reading the status counters with a single primary key lookup
+        counters = UserTaskStats.objects.filter(user=request.user).values(
+            *UserTaskStats.STATUS_FIELDS.values()
+        ).first()
+        if counters is None:
+            # The counters have not been built for this user yet
+            rebuild_user_stats(request.user.pk)
+            counters = UserTaskStats.objects.filter(user=request.user).values(
+                *UserTaskStats.STATUS_FIELDS.values()
+            ).first()
+
+        # The dead line buckets depend on the current time, so they are counted with a single
+        # range scan over the pending tasks of the user on the (user, dead_line, id) index
+        now = timezone.now()
+        week_end = now + timedelta(days=7)
+        counters.update(
+            self.get_queryset().filter(
+                user=request.user, status=Tasks.TaskStatus.PENDING, dead_line__lt=week_end
+            ).aggregate(
+                overdue=Count('id', filter=Q(dead_line__lt=now)),
+                due_this_week=Count('id', filter=Q(dead_line__gte=now)),
+            )
+        )
+
+        return Response(counters, status=status.HTTP_200_OK)
+    
+
+    # Define the occurrences method for the viewset
+    def occurrences(self, request):
+        """
+            Handle the get request for the tasks and the occurrences of the recurring tasks in a window.
+            The occurrences are expanded only for the requested window and are not stored,
+            the tasks and the materialized occurrences are read from the tasks table.
+            params:
+                - request: The request object, with the "start" and "end" query params and an optional "limit".
+            return:
+                - Response: The response object with the tasks ordered by dead line.
+        """
+        serializer = TasksFilterSerializer(data={
+            'dead_line_after': request.query_params.get('start'),
+            'dead_line_before': request.query_params.get('end'),
+        })
+        serializer.is_valid(raise_exception=True)
+        start = serializer.validated_data['dead_line_after']
+        end = serializer.validated_data['dead_line_before']
+        if not start < end <= start + OCCURRENCES_MAX_WINDOW:
+            return Response(
+                {'error': f'The window must end after its start and span at most {OCCURRENCES_MAX_WINDOW.days} days.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        try:
+            limit = min(int(request.query_params.get('limit', OCCURRENCES_DEFAULT_LIMIT)), OCCURRENCES_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'The limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        reader = TasksReadSerializer()
+        # The stored tasks of the window, with a range scan on the (user, dead_line, id) index
+        rows = reader.get_queryset(
+            serializer.filter_queryset(self.get_queryset().filter(user=request.user)).order_by('dead_line', 'id')
+        )[:limit + 1]
+        tasks = [(row['dead_line'], reader.to_representation(row)) for row in rows]
+        # The virtual occurrences of the window
+        tasks.extend(
+            (slot, reader.represent_occurrence(rule, slot))
+            for slot, rule in expand_occurrences(request.user, start, end, limit + 1)
+        )
+        tasks.sort(key=lambda item: item[0])
+
+        return Response(
+            {
+                'truncated': len(tasks) > limit,
+                'results': [data for _, data in tasks[:limit]],
+            },
+            status=status.HTTP_200_OK
+        )
+
+
+    # Define the recurrence method for the viewset
+    def recurrence(self, request, slug):
+        """
+            Handle the get, put and delete requests for the recurrence rule of a task.
+            params:
+                - request: The request object.
+                - slug: The slug of the template task.
+            return:
+                - Response: The response object with the recurrence rule.
+        """
+        task = self.get_object()
+        if task.recurrence_id is not None:
+            return Response(
+                {'error': 'An occurrence of a recurring task can not have its own recurrence.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        rule = TaskRecurrence.objects.filter(task=task).first()
+
+        if request.method == 'GET':
+            if rule is None:
+                return Response({'error': 'The task does not recur.'}, status=status.HTTP_404_NOT_FOUND)
+            return Response(TaskRecurrenceSerializer(rule).data, status=status.HTTP_200_OK)
+
+        if request.method == 'DELETE':
+            if rule is not None:
+                rule.delete()
+            cache.bump_version(request.user.pk)
+            return Response({'message': 'The recurrence has been removed.'}, status=status.HTTP_204_NO_CONTENT)
+
+        serializer = TaskRecurrenceSerializer(rule, data=request.data)
+        serializer.is_valid(raise_exception=True)
+        serializer.save(task=task)
+        cache.bump_version(request.user.pk)
+        return Response(serializer.data, status=status.HTTP_200_OK)
+
+
+    # Define the materialize method for the viewset
+    def materialize(self, request, slug):
+        """
+            Handle the post request for a change to an occurrence of a recurring task.
+            The occurrence is stored as a task, with the changes applied, and is then read
+            and changed through the other task views by its own slug.
+            params:
+                - request: The request object.
+                - slug: The slug of the template task.
+            return:
+                - Response: The response object with the stored occurrence.
+        """
+        task = self.get_object()
+        rule = TaskRecurrence.objects.filter(task=task).select_related('task__user').first()
+        if rule is None:
+            return Response({'error': 'The task does not recur.'}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = TaskOccurrenceSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        changes = dict(serializer.validated_data)
+        slot = changes.pop('occurrence')
+        # The first slot is the template task itself
+        if slot == task.dead_line or not is_slot(rule, slot):
+            return Response(
+                {'error': 'The date is not an occurrence of the task.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        if ArchivedTask.objects.filter(recurrence=rule, occurrence_date=slot).exists():
+            return Response(
+                {'error': 'The occurrence has been archived.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        occurrence, created = materialize_occurrence(rule, slot, changes)
+        return Response(
+            self.serializer_class(occurrence).data,
+            status=status.HTTP_201_CREATED if created else status.HTTP_200_OK
+        )
+
+
+    # Define the export method for the viewset
+    def export(self, request):
+        """
+            Handle the get request for exporting all of the user tasks as a stream.
+            params:
+                - request: The request object, the "type" query param is "ndjson" (default) or "csv".
+            return:
+                - StreamingHttpResponse: The response that streams the tasks, gzipped if the client accepts it.
+        """
+        export_type = request.query_params.get('type', 'ndjson')
+        if export_type not in export.EXPORT_CONTENT_TYPES:
+            return Response(
+                {'error': f'The export type must be one of {", ".join(export.EXPORT_CONTENT_TYPES)}.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Reading the tasks as tuples through a server side cursor, so the memory use stays flat
+        rows = self.get_queryset().filter(user=request.user).order_by('id').values_list(
+            *export.EXPORT_FIELDS
+        ).iterator(chunk_size=export.EXPORT_CHUNK_SIZE)
+        stream = export.ndjson_stream(rows) if export_type == 'ndjson' else export.csv_stream(rows)
+
+        response = StreamingHttpResponse(content_type=export.EXPORT_CONTENT_TYPES[export_type])
+        if export.accepts_gzip(request):
+            # The gzip header is sent right away and every chunk is compressed as it is produced
+            stream = compress_sequence(stream)
+            response['Content-Encoding'] = 'gzip'
+        if export.is_asgi(request):
+            # The ASGI handler reads a sync iterator into memory before sending it
+            stream = export.iterate_in_sync_thread(stream)
+        response.streaming_content = stream
+        response['Vary'] = 'Accept-Encoding'
+        response['Content-Disposition'] = f'attachment; filename="tasks.{export_type}"'
+        return response
+    
+
+    # Define the import method for the viewset
+    def import_file(self, request):
+        """
+            Handle the post request for importing tasks from an uploaded CSV or JSON file.
+            params:
+                - request: The request object, the "file" field is the upload and the optional
+                  "type" field is "csv" or "json", guessed from the file name by default.
+            return:
+                - Response: The response object with the number of imported and failed rows and the row errors.
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({'error': 'The file is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        import_type = request.data.get('type') or ('csv' if upload.name.lower().endswith('.csv') else 'json')
+        if import_type not in ('csv', 'json'):
+            return Response({'error': 'The import type must be csv or json.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Parsing the upload as a stream and inserting it chunk by chunk
+        rows = uploads.iter_csv_rows(upload) if import_type == 'csv' else uploads.iter_json_rows(upload)
+        try:
+            report = importer.import_tasks(request.user, rows)
+        except (ValueError, csv.Error) as e:
+            # The chunks before the malformed part of the file have already been imported
+            return Response({'error': f'The file is malformed: {e}'}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response(report, status=status.HTTP_200_OK)
+    
+
+    # Define the search method for the viewset
+    def search(self, request):
+        """
+            Handle the get request for searching the user tasks by their title and description.
+            params:
+                - request: The request object, the "q" query param is the search query.
+            return:
+                - Response: The response object with the matching tasks, the best matches first.
+        """
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({'error': 'The search query is required.'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            limit = min(int(request.query_params.get('limit', SEARCH_DEFAULT_LIMIT)), SEARCH_MAX_LIMIT)
+        except ValueError:
+            return Response({'error': 'The limit must be an integer.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        # Getting the ids of the matching tasks from the search index
+        ids = get_search_backend().search(request.user, query, max(limit, 1))
+        # Getting the tasks by their primary keys and keeping the rank order
+        tasks = self.get_queryset().filter(user=request.user).select_related('user').in_bulk(ids)
+        results = [tasks[task_id] for task_id in ids if task_id in tasks]
+
+        return Response(self.serializer_class(results, many=True).data, status=status.HTTP_200_OK)
+    
+
+    # Checking the shape of a bulk request data
+    def _validate_bulk_payload(self, data):
+        """
+            Validate that the data of a bulk request is a non-empty list with a bounded size.
+            params:
+                - data: The request data.
+            return:
+                - Response: The error response, or None if the data is valid.
+        """
+        if not isinstance(data, list) or not data:
+            return Response({'error': 'Expected a non-empty list of tasks.'}, status=status.HTTP_400_BAD_REQUEST)
+        if len(data) > BULK_MAX_ITEMS:
+            return Response(
+                {'error': f'A bulk request can not contain more than {BULK_MAX_ITEMS} tasks.'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        return None
\ No newline at end of file
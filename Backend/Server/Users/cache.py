@@ -0,0 +1,200 @@
+import time
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.cache import cache
+
+from Profiles.models import Profile
+from Server.caches import get_shared_cache
+
+from .models import User
+
+
+# Cache keys used by the username lookup cache
+USER_KEY = 'users:user:{username}'
+PROFILE_KEY = 'users:profile:{username}'
+HITS_KEY = 'users:lookup:hits'
+AUTH_VERSION_KEY = 'users:auth:version:{user_id}'
+AUTH_USER_KEY = 'users:auth:user:{user_id}:{version}'
+MISSES_KEY = 'users:lookup:misses'
+
+
+def _key(template, username):
+    # Quoting the username, so the key is valid for every cache backend
+    return template.format(username=quote(username, safe=''))
+
+
+def get_user(username):
+    """
+    Return the user with the given username, reading it from the database on a miss.
+    The users are kept in the cache shared by every process, so the invalidation of a write
+    reaches every process, and they are always read from the database without one.
+
+    Args:
+        username (str): The username of the user.
+
+    Returns:
+        User: The user, or None if there is no such user.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return User.objects.filter(username=username).first()
+    key = _key(USER_KEY, username)
+    user = shared_cache.get(key)
+    _count(HITS_KEY if user is not None else MISSES_KEY)
+    if user is None:
+        user = User.objects.filter(username=username).first()
+        if user is not None:
+            shared_cache.set(key, user, timeout=settings.USERS_LOOKUP_CACHE_TIMEOUT)
+    return user
+
+
+def get_profile(username):
+    """
+    Return the profile of the user with the given username, with its user, reading both
+    from the database with a single query on a miss, through the shared cache like get_user.
+
+    Args:
+        username (str): The username of the user.
+
+    Returns:
+        Profile: The profile, or None if there is no such profile.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return Profile.objects.select_related('user').filter(user__username=username).first()
+    key = _key(PROFILE_KEY, username)
+    profile = shared_cache.get(key)
+    _count(HITS_KEY if profile is not None else MISSES_KEY)
+    if profile is None:
+        profile = Profile.objects.select_related('user').filter(user__username=username).first()
+        if profile is not None:
+            shared_cache.set(key, profile, timeout=settings.USERS_LOOKUP_CACHE_TIMEOUT)
+    return profile
+
+
+def invalidate(*usernames):
+    """
+    Drop the cached user and profile of the given usernames.
+
+    Args:
+        usernames (str): The usernames, None values are skipped.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return
+    shared_cache.delete_many([
+        _key(template, username)
+        for username in usernames if username
+        for template in (USER_KEY, PROFILE_KEY)
+    ])
+
+
+def get_auth_version(user_id):
+    """
+    Return the current auth version of a user from the cache shared by every process, so a
+    user changed by any process is loaded again by every other one.
+    A missing version is initialized with the current time, so a version that was
+    evicted never falls back to a value that older cache entries were stored under.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        int: The version, or None if there is no shared cache and the users are not cached.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return None
+    key = AUTH_VERSION_KEY.format(user_id=user_id)
+    version = shared_cache.get(key)
+    if version is None:
+        shared_cache.add(key, time.time_ns(), timeout=None)
+        version = shared_cache.get(key)
+    return version
+
+
+def bump_auth_version(user_id):
+    """
+    Invalidate the cached user of the JWT authentication by moving to a new auth version.
+    Call it after changing users with update(), which sends no signal.
+
+    Args:
+        user_id (int): The id of the user.
+    """
+    shared_cache = get_shared_cache()
+    if shared_cache is None:
+        return
+    key = AUTH_VERSION_KEY.format(user_id=user_id)
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        shared_cache.add(key, time.time_ns(), timeout=None)
+
+
+def get_auth_user(user_id):
+    """
+    Return the cached user of the JWT authentication.
+
+    Args:
+        user_id (int): The id of the user.
+
+    Returns:
+        tuple: The auth version, which a user loaded on a miss is stored under, and the user or None.
+            The version is None if there is no shared cache.
+    """
+    version = get_auth_version(user_id)
+    if version is None:
+        return None, None
+    return version, cache.get(AUTH_USER_KEY.format(user_id=user_id, version=version))
+
+
+def set_auth_user(user_id, version, user):
+    """
+    Cache the user of the JWT authentication under the auth version read before it was loaded,
+    so a user that changed in the meantime is stored under a version that is never read again.
+
+    Args:
+        user_id (int): The id of the user.
+        version (int): The auth version returned by get_auth_user.
+        user (User): The user.
+    """
+    if version is None:
+        # Without a shared version a change in another process could not invalidate the user
+        return
+    cache.set(
+        AUTH_USER_KEY.format(user_id=user_id, version=version),
+        user,
+        timeout=settings.USERS_AUTH_CACHE_TIMEOUT,
+    )
+
+
+def get_stats():
+    """
+    Return the hit and miss counters of the username lookup cache, summed over every process
+    in the shared cache, so they can be read from outside the server.
+
+    Returns:
+        dict: Whether the cache is on, the hits, the misses and the hit ratio.
+    """
+    shared_cache = get_shared_cache()
+    hits = shared_cache.get(HITS_KEY, 0) if shared_cache is not None else 0
+    misses = shared_cache.get(MISSES_KEY, 0) if shared_cache is not None else 0
+    total = hits + misses
+    return {
+        'enabled': shared_cache is not None,
+        'hits': hits,
+        'misses': misses,
+        'hit_ratio': hits / total if total else 0.0,
+    }
+
+
+def _count(key):
+    # The counters are only kept while the lookups are cached, so there is always a shared cache
+    shared_cache = get_shared_cache()
+    try:
+        shared_cache.incr(key)
+    except ValueError:
+        # The counter is missing, so starting it from one
+        if not shared_cache.add(key, 1, timeout=None):
+            shared_cache.incr(key)
@@ -0,0 +1,47 @@
+from django.core.management.base import BaseCommand
+
+from Server.uploads import iter_csv_rows, iter_json_rows
+from Users.provisioning import provision_users
+
+
+
+class Command(BaseCommand):
+    help = 'Create many users and their profiles from a CSV or JSON file.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='The CSV or JSON file with the username, email, full_name and password of every user.')
+        parser.add_argument(
+            '--type',
+            choices=['csv', 'json'],
+            default=None,
+            help='The type of the file, guessed from its extension by default.',
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=None,
+            help='Number of users inserted by a single transaction.',
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=None,
+            help='Number of password hashing processes.',
+        )
+
+    def handle(self, *args, **options):
+        file_type = options['type'] or ('csv' if options['path'].lower().endswith('.csv') else 'json')
+
+        with open(options['path'], 'rb') as fileobj:
+            # The rows are streamed from the file, a batch at a time
+            rows = iter_csv_rows(fileobj) if file_type == 'csv' else iter_json_rows(fileobj)
+            result = provision_users(rows, batch_size=options['batch_size'], workers=options['workers'])
+
+        for error in result['skipped']:
+            self.stderr.write(f'Row {error["index"]}: {error["error"]}')
+        self.stdout.write(
+            self.style.SUCCESS(
+                'Created {created} users in {elapsed:.3f}s ({users_per_second:.1f} users/s), '
+                '{skipped} skipped'.format(**dict(result, skipped=len(result['skipped'])))
+            )
+        )
@@ -1,10 +1,58 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, contextmanager
+from itertools import islice
+
+from django.db import transaction
 from django.db.models import Manager
+from django.db.models.functions import Lower
+from django.contrib.auth.hashers import make_password
 from django.contrib.auth.models import BaseUserManager
 
 from Profiles.models import Profile
 
 
+@contextmanager
+def process_hashing(workers=None):
+    """
+    Start a process pool that hashes passwords, for the commands that create many users.
+
+    Args:
+        workers (int, optional): The number of hashing processes, the number of CPUs by default.
+
+    Yields:
+        callable: Hashes a list of raw passwords and returns an iterator of their hashes in the same order.
+    """
+    workers = workers or os.cpu_count() or 1
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        yield lambda passwords: executor.map(
+            make_password, passwords, chunksize=max(1, len(passwords) // (4 * workers))
+        )
+
+
+
 class UserManager(BaseUserManager):
+    # Method to look users up by their email, ignoring its case
+    def filter_by_email(self, email):
+        """
+        Returns the users whose email matches the given one, ignoring the case.
+
+        The lookup is written as LOWER(email) = lower(value), so it is answered by the
+        functional unique index of users_email_lower_uniq, and it matches at most one user.
+
+        Args:
+            email (str): The email address.
+
+        Returns:
+            QuerySet: The matching users.
+        """
+        return self.alias(email_lower=Lower('email')).filter(email_lower=email.lower())
+
+    # Method used by the authentication backends to find a user by the USERNAME_FIELD,
+    # users_email_lower_uniq makes the case-insensitive email a natural key
+    def get_by_natural_key(self, username):
+        return self.filter_by_email(username).get()
+
     # Method to create user with provided credentials
     def create_user(self, username, email, full_name, password=None, password_conf=None):
         """
@@ -54,6 +102,50 @@ class UserManager(BaseUserManager):
 
         return user
 
+    # Method to create many users at once
+    def bulk_create_users(self, users, batch_size=500, workers=None, hash_passwords=None):
+        """
+        Creates many users and their profiles with bulk_create.
+
+        The passwords are hashed in parallel, and the users are inserted while the next
+        passwords are still being hashed: every batch of users and their profiles is
+        inserted by two queries in its own transaction.
+
+        Args:
+            users (list): The users, dicts with the username, email, full_name and password keys.
+            batch_size (int, optional): The number of users inserted by a single transaction. Defaults to 500.
+            workers (int, optional): The number of hashing processes, the number of CPUs by default.
+            hash_passwords (callable, optional): Hashes a list of raw passwords and returns an iterable
+                of their hashes in the same order. Defaults to a process pool of its own.
+
+        Returns:
+            list: The created users.
+        """
+        created = []
+        with ExitStack() as stack:
+            if hash_passwords is None:
+                hash_passwords = stack.enter_context(process_hashing(workers))
+            # The hashes are yielded in the order of the users as soon as they are ready
+            hashes = hash_passwords([user['password'] for user in users])
+            rows = iter(users)
+            while True:
+                batch = [
+                    self.model(
+                        username=row['username'],
+                        email=row['email'].lower(),
+                        full_name=row['full_name'],
+                        password=password,
+                    )
+                    for row, password in islice(zip(rows, hashes), batch_size)
+                ]
+                if not batch:
+                    break
+                with transaction.atomic(using=self._db):
+                    batch = self.bulk_create(batch)
+                    Profile.objects.using(self._db).bulk_create([Profile(user=user) for user in batch])
+                created.extend(batch)
+        return created
+
     # Method to create superuser with provided credentials
     def create_superuser(self, username, email, full_name, password=None):
         """
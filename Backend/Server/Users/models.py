@@ -1,4 +1,5 @@
 from django.db import models
+from django.db.models.functions import Lower
 from django.contrib.auth.models import AbstractUser 
 
 from .managers import UserManager
@@ -30,6 +31,9 @@ class User(AbstractUser ):
     # Joined date field with auto_now_add
     joined_date = models.DateField(auto_now_add=True)
 
+    # Last update field with auto_now, used as the validator of conditional requests
+    updated_at = models.DateTimeField(auto_now=True)
+
     # Set USERNAME_FIELD to email
     USERNAME_FIELD = "email"
 
@@ -52,6 +56,19 @@ class User(AbstractUser ):
         # Set ordering to joined_date
         ordering = ['joined_date']
 
+        # Indexes of the filters of the staff user list
+        indexes = [
+            models.Index(fields=['joined_date', 'id'], name='users_joined_idx'),
+            models.Index(fields=['is_active', 'id'], name='users_active_idx'),
+            models.Index(fields=['is_verified', 'id'], name='users_verified_idx'),
+        ]
+
+        constraints = [
+            # An email is taken by a single user whatever its case, the index also answers
+            # the case-insensitive email lookup of the login
+            models.UniqueConstraint(Lower('email'), name='users_email_lower_uniq'),
+        ]
+
     def __str__(self):
         """
         Returns a string representation of the User object.
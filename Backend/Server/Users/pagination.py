@@ -0,0 +1,66 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.http import urlencode
+from rest_framework.pagination import CursorPagination
+from rest_framework.response import Response
+
+
+# Cache key of the total count of a filtered user list
+COUNT_KEY = 'users:count:{params}'
+
+
+
+class UsersCursorPagination(CursorPagination):
+    """
+    Keyset (cursor) pagination for the staff user list.
+
+    Every page is fetched with a range scan on the primary key from the cursor position,
+    and the total count of the list is cached for USERS_COUNT_CACHE_TIMEOUT seconds per
+    set of filters, so paging through the list does not run a COUNT(*) for every page.
+    """
+    # Define the number of users returned in each page
+    page_size = 50
+    # Let the client ask for a smaller or bigger page
+    page_size_query_param = 'page_size'
+    # Never allow a page bigger than this value
+    max_page_size = 500
+    # The users are listed in the order that they joined
+    ordering = ('id',)
+
+    # The query params that do not change the count of the list
+    page_query_params = ('cursor', 'page_size', 'fields')
+
+    def paginate_queryset(self, queryset, request, view=None):
+        """
+        Return a single page of the users and remember the total count of the list.
+        """
+        self.count = self.get_count(queryset, request)
+        return super().paginate_queryset(queryset, request, view)
+
+    def get_count(self, queryset, request):
+        """
+        Return the cached total count of the filtered users, counting them on a miss.
+        """
+        params = urlencode(
+            sorted((key, value) for key, value in request.query_params.lists() if key not in self.page_query_params),
+            doseq=True,
+        )
+        key = COUNT_KEY.format(params=hashlib.md5(params.encode(), usedforsecurity=False).hexdigest())
+        count = cache.get(key)
+        if count is None:
+            count = queryset.count()
+            cache.set(key, count, timeout=settings.USERS_COUNT_CACHE_TIMEOUT)
+        return count
+
+    def get_paginated_response(self, data):
+        """
+        Return the page with the total count and the next and previous cursors.
+        """
+        return Response({
+            'count': self.count,
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
@@ -0,0 +1,103 @@
+import time
+from contextlib import ExitStack
+from itertools import islice
+
+from django.conf import settings
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from .managers import process_hashing
+from .models import User
+
+
+# The columns that every user row must have
+REQUIRED_FIELDS = ('username', 'email', 'full_name', 'password')
+
+# The number of usernames and emails checked against the database by a single query
+LOOKUP_CHUNK_SIZE = 500
+
+
+
+def provision_users(rows, batch_size=None, workers=None, hash_passwords=None):
+    """
+    Create many users and their profiles, skipping the rows whose username or email is taken.
+
+    The rows are read a batch at a time, so a file of any size is created with the memory of
+    a single batch. A row that repeats the username or the email of an earlier batch is found
+    taken, because the earlier batches are already inserted.
+
+    Args:
+        rows (iterable): The users, dicts with the username, email, full_name and password keys.
+        batch_size (int, optional): The number of users inserted by a single transaction,
+            defaults to USERS_PROVISION_BATCH_SIZE.
+        workers (int, optional): The number of hashing processes, defaults to USERS_PROVISION_WORKERS.
+        hash_passwords (callable, optional): Hashes a list of raw passwords, such as the
+            make_passwords of the shared hashing pool. Defaults to a process pool of workers processes.
+
+    Returns:
+        dict: The number of created users, the skipped rows, the elapsed seconds and the users per second.
+    """
+    batch_size = batch_size or settings.USERS_PROVISION_BATCH_SIZE
+    started = time.monotonic()
+    created = 0
+    skipped = []
+
+    with ExitStack() as stack:
+        rows = enumerate(rows)
+        while batch := list(islice(rows, batch_size)):
+            valid = _valid_rows(batch, skipped)
+            if not valid:
+                continue
+            if hash_passwords is None:
+                # Starting the processes once, for the first batch that has users to create
+                hash_passwords = stack.enter_context(
+                    process_hashing(workers or settings.USERS_PROVISION_WORKERS)
+                )
+            created += len(User.objects.bulk_create_users(valid, batch_size=batch_size, hash_passwords=hash_passwords))
+
+    elapsed = time.monotonic() - started
+    return {
+        'created': created,
+        'skipped': sorted(skipped, key=lambda error: error['index']),
+        'elapsed': elapsed,
+        'users_per_second': created / elapsed if elapsed else 0.0,
+    }
+
+
+def _valid_rows(batch, skipped):
+    # Skipping the rows that miss a column or repeat a username or an email of an earlier row
+    usernames = set()
+    emails = set()
+    unique = []
+    for index, row in batch:
+        missing = [field for field in REQUIRED_FIELDS if not isinstance(row, dict) or not row.get(field)]
+        if missing:
+            skipped.append({'index': index, 'error': f'Missing {", ".join(missing)}.'})
+            continue
+        email = row['email'].lower()
+        if row['username'] in usernames or email in emails:
+            skipped.append({'index': index, 'error': 'Duplicate username or email in the request.'})
+            continue
+        usernames.add(row['username'])
+        emails.add(email)
+        unique.append((index, row))
+
+    # Skipping the rows whose username or email is already taken, a chunk of rows per query
+    taken_usernames = set()
+    taken_emails = set()
+    chunks = iter(unique)
+    while chunk := list(islice(chunks, LOOKUP_CHUNK_SIZE)):
+        # The emails are compared by the case-insensitive unique index of the users
+        for username, email in User.objects.alias(email_lower=Lower('email')).filter(
+            Q(username__in=[row['username'] for _, row in chunk])
+            | Q(email_lower__in=[row['email'].lower() for _, row in chunk])
+        ).values_list('username', 'email'):
+            taken_usernames.add(username)
+            taken_emails.add(email.lower())
+    valid = []
+    for index, row in unique:
+        if row['username'] in taken_usernames or row['email'].lower() in taken_emails:
+            skipped.append({'index': index, 'error': 'The username or the email is already taken.'})
+        else:
+            valid.append(row)
+    return valid
@@ -17,6 +17,11 @@ class UserRouter(routers.DefaultRouter):
     def get_urls(self):
         # Get the URLs from the parent class
         urls = super().get_urls()
+        # Define the URL patterns that are matched before the detail route of the parent class
+        priority_urls = [
+            # Define a URL pattern for the provision view
+            path('provision/', UserViewSet.as_view({'post': 'provision'})),
+        ]
         # Define custom URLs for the UserViewSet
         custom_urls = [
             # Define a URL pattern for the list view
@@ -35,4 +40,4 @@ class UserRouter(routers.DefaultRouter):
             ])),
         ]
         # Return the custom URLs
-        return urls + custom_urls
\ No newline at end of file
+        return priority_urls + urls + custom_urls
\ No newline at end of file
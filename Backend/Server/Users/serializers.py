@@ -3,16 +3,17 @@ from rest_framework.validators import UniqueValidator
 from django.contrib.auth.password_validation import validate_password
 
 from .models import User
+from Server.fieldsets import SparseFieldsetMixin
 
 
-class UserSerializer(serializers.ModelSerializer):
+class UserSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     """
     Serializer for the User model.
     """
     # Define the fields to be serialized
     email = serializers.EmailField(
         required=True,
-        validators=[UniqueValidator(queryset=User.objects.all())]
+        validators=[UniqueValidator(queryset=User.objects.all(), lookup='iexact')]
     )
     username = serializers.CharField(
         required=True,
@@ -65,8 +66,49 @@ class UserSerializer(serializers.ModelSerializer):
         """
         Update an existing user instance.
         """
-        instance.username = validated_data.get('username', instance.username)
-        instance.full_name = validated_data.get('full_name', instance.full_name)
-        instance.save()
+        # Saving only the changed columns, so the other columns of the row are never written back
+        update_fields = [name for name in ('username', 'full_name') if name in validated_data]
+        for name in update_fields:
+            setattr(instance, name, validated_data[name])
+        instance.save(update_fields=update_fields + ['updated_at'])
+
+        return instance
+
+
+
+class UsersFilterSerializer(serializers.Serializer):
+    """
+    Serializer for the filter query params of the staff user list.
+    """
+    is_active = serializers.BooleanField(required=False, allow_null=True, default=None)
+    is_verified = serializers.BooleanField(required=False, allow_null=True, default=None)
+    joined_after = serializers.DateField(required=False)
+    joined_before = serializers.DateField(required=False)
+
+    # The lookup of every filter, the dates are inclusive on both sides
+    LOOKUPS = {
+        'is_active': 'is_active',
+        'is_verified': 'is_verified',
+        'joined_after': 'joined_date__gte',
+        'joined_before': 'joined_date__lte',
+    }
+
+    def filter_queryset(self, queryset):
+        """
+        Filter the users by the validated filters.
+        """
+        return queryset.filter(**{
+            self.LOOKUPS[name]: value for name, value in self.validated_data.items() if value is not None
+        })
+
 
-        return instance
\ No newline at end of file
+
+
+class UserProvisionSerializer(serializers.Serializer):
+    """
+    Serializer for a single user of a bulk provisioning request.
+    """
+    username = serializers.CharField(max_length=12)
+    email = serializers.EmailField(max_length=255)
+    full_name = serializers.CharField(max_length=255)
+    password = serializers.CharField(write_only=True, validators=[validate_password])
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_init, post_save, post_delete
+from django.dispatch import receiver
+
+from Profiles.models import Profile
+
+from .models import User
+from . import cache
+
+
+
+# Remembering the stored username of a user, so a renamed user is dropped from the cache by its old username
+@receiver(post_init, sender=User)
+def remember_username(sender, instance, **kwargs):
+    # Reading the username from __dict__, so a deferred username is not loaded with an extra query
+    instance._stored_username = instance.__dict__.get('username') if instance.pk is not None else None
+
+
+# Dropping the cached user and profile when a user is saved or deleted
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_cache(sender, instance, **kwargs):
+    cache.invalidate(instance._stored_username, instance.__dict__.get('username'))
+    instance._stored_username = instance.__dict__.get('username')
+    # The user of the JWT authentication is stored under the auth version
+    cache.bump_auth_version(instance.pk)
+
+
+# Dropping the cached profile when a profile is saved or deleted
+@receiver(post_save, sender=Profile)
+@receiver(post_delete, sender=Profile)
+def invalidate_profile_cache(sender, instance, **kwargs):
+    # The user of the profile is usually loaded already, otherwise reading only its username
+    if Profile.user.is_cached(instance):
+        username = instance.user.username
+    else:
+        username = User.objects.filter(pk=instance.user_id).values_list('username', flat=True).first()
+    cache.invalidate(username)
@@ -1,3 +1,346 @@
-from django.test import TestCase
+import io
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache as django_cache, caches
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from Profiles.models import Profile
+
+from . import cache
+from .models import User
+from .provisioning import provision_users
+
+
+@override_settings(SHARED_CACHE_SINGLE_PROCESS=True)
+class CachedUpdateTests(TestCase):
+    """
+    The updates read the row from the database, so a stale copy in the lookup cache
+    never writes its columns back.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('admin', 'admin@example.com', 'Admin', 'pass12345')
+        cls.user = User.objects.create_user('alice', 'alice@example.com', 'Alice', 'pass12345')
+
+    def setUp(self):
+        django_cache.clear()
+        caches['shared'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_user_update_keeps_columns_changed_behind_the_cache(self):
+        # Filling the lookup cache, then changing the row without any signal
+        self.assertEqual(self.client.get('/users/alice/').status_code, 200)
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        response = self.client.put('/users/alice/update/', {'full_name': 'Alice B'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.is_active)
+        self.assertEqual(self.user.full_name, 'Alice B')
+
+    def test_profile_update_keeps_columns_changed_behind_the_cache(self):
+        Profile.objects.get_or_create(user=self.user)
+        self.assertEqual(self.client.get('/profiles/alice/').status_code, 200)
+        Profile.objects.filter(user=self.user).update(bio='changed elsewhere')
+
+        response = self.client.put('/profiles/alice/update/', {'location': 'Berlin'}, format='json')
+        self.assertEqual(response.status_code, 202)
+        profile = Profile.objects.get(user=self.user)
+        self.assertEqual(profile.bio, 'changed elsewhere')
+        self.assertEqual(profile.location, 'Berlin')
+
+
+
+class ProvisionTests(TestCase):
+    """
+    The API hashes on the shared pool of the server, and the command streams its file.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('admin', 'admin@example.com', 'Admin', 'pass12345')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def _rows(self, count, start=0):
+        return [
+            {'username': f'user{i}', 'email': f'user{i}@example.com', 'full_name': f'User {i}', 'password': 'pass12345'}
+            for i in range(start, start + count)
+        ]
+
+    def test_api_hashes_on_the_shared_pool(self):
+        with mock.patch('Users.managers.ProcessPoolExecutor', side_effect=AssertionError('process pool started')):
+            response = self.client.post('/users/provision/', self._rows(3), format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['created'], 3)
+        self.assertTrue(User.objects.get(username='user1').check_password('pass12345'))
+
+    def test_api_conflict_of_a_concurrent_request_is_409(self):
+        # Another request creates the user after the lookup of the taken usernames
+        User.objects.create_user('user1', 'user1@example.com', 'User 1', 'pass12345')
+        with mock.patch('Users.provisioning._valid_rows', side_effect=lambda batch, skipped: [row for _, row in batch]):
+            response = self.client.post('/users/provision/', self._rows(3), format='json')
+        self.assertEqual(response.status_code, 409)
+        # Nothing of the request is kept
+        self.assertFalse(User.objects.filter(username__in=['user0', 'user2']).exists())
+
+    def test_command_streams_the_file_in_batches(self):
+        rows = self._rows(5)
+        del rows[2]['password']
+        with tempfile.NamedTemporaryFile('w', suffix='.json', delete=False) as fileobj:
+            json.dump(rows, fileobj)
+        self.addCleanup(os.remove, fileobj.name)
+
+        stdout, stderr = io.StringIO(), io.StringIO()
+        call_command('provision_users', fileobj.name, batch_size=2, workers=1, stdout=stdout, stderr=stderr)
+
+        self.assertIn('Created 4 users', stdout.getvalue())
+        self.assertIn('Row 2: Missing password.', stderr.getvalue())
+        self.assertEqual(User.objects.filter(username__startswith='user').count(), 4)
+
+    def test_rows_are_read_a_batch_at_a_time(self):
+        read = []
+
+        def rows():
+            for row in self._rows(6):
+                read.append(row['username'])
+                yield row
+
+        batches = []
+
+        def bulk_create_users(users, **kwargs):
+            # Recording how many rows were read when each batch is created
+            batches.append(len(read))
+            return users
+
+        with mock.patch.object(User.objects, 'bulk_create_users', side_effect=bulk_create_users):
+            result = provision_users(rows(), batch_size=2, hash_passwords=lambda passwords: passwords)
+        self.assertEqual(result['created'], 6)
+        self.assertEqual(batches, [2, 4, 6])
+
+
+
+class EmailUniquenessTests(TestCase):
+    """
+    An email is taken by a single user whatever its case.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('carol', 'carol@example.com', 'Carol', 'pass12345')
+
+    def test_email_in_another_case_is_rejected_by_the_database(self):
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            User.objects.create(username='carol2', email='Carol@Example.com', full_name='Carol 2')
+
+    def test_natural_key_ignores_the_case(self):
+        self.assertEqual(User.objects.get_by_natural_key('CAROL@example.com'), self.user)
+
+    def test_provision_skips_an_email_taken_in_another_case(self):
+        client = APIClient()
+        client.force_authenticate(User.objects.create_superuser('admin', 'admin@example.com', 'Admin', 'pass12345'))
+        response = client.post(
+            '/users/provision/',
+            [{'username': 'carol2', 'email': 'CAROL@example.com', 'full_name': 'Carol 2', 'password': 'pass12345'}],
+            format='json',
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['errors'][0]['index'], 0)
+
+
+
+@override_settings(SHARED_CACHE_SINGLE_PROCESS=True)
+class LookupCacheTests(TestCase):
+    """
+    The username lookup cache and its counters live in the cache shared by every process.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('dave', 'dave@example.com', 'Dave', 'pass12345')
+
+    def setUp(self):
+        caches['shared'].clear()
+
+    def test_save_invalidates_the_shared_entry(self):
+        self.assertEqual(cache.get_user('dave').full_name, 'Dave')
+        with self.assertNumQueries(0):
+            cache.get_user('dave')
+        # Any process that saves the user drops the entry that every process reads
+        self.user.full_name = 'Dave B'
+        self.user.save()
+        self.assertEqual(cache.get_user('dave').full_name, 'Dave B')
+
+        stdout = io.StringIO()
+        call_command('users_cache_stats', stdout=stdout)
+        self.assertIn('hits=1 misses=2', stdout.getvalue())
+
+    def test_lookups_read_the_database_without_a_shared_cache(self):
+        with self.settings(SHARED_CACHE_SINGLE_PROCESS=False):
+            for _ in range(2):
+                with self.assertNumQueries(1):
+                    cache.get_user('dave')
+            stdout = io.StringIO()
+            call_command('users_cache_stats', stdout=stdout)
+        self.assertIn('cache is off', stdout.getvalue())
+
+
+
+@override_settings(SHARED_CACHE_SINGLE_PROCESS=True)
+class ConditionalGetTests(TestCase):
+    """
+    The ETags are read from the database, so a row changed behind the lookup cache is never answered with 304.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user('erin', 'erin@example.com', 'Erin', 'pass12345')
+        Profile.objects.get_or_create(user=cls.user)
+
+    def setUp(self):
+        caches['shared'].clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def assert_etag_changes(self, path, change):
+        etag = self.client.get(path)['ETag']
+        self.assertEqual(self.client.get(path, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        # A write that sends no signal, like the write of another process that only reached its own cache
+        change()
+        response = self.client.get(path, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_user_etag(self):
+        self.assert_etag_changes(
+            '/users/erin/', lambda: User.objects.filter(pk=self.user.pk).update(updated_at=timezone.now())
+        )
+
+    def test_profile_etag(self):
+        self.assert_etag_changes(
+            '/profiles/erin/', lambda: Profile.objects.filter(user=self.user).update(updated_at=timezone.now())
+        )
+
+
+
+class UsersListTests(TestCase):
+    """
+    The staff user list pages by the id cursor, caches its count per set of filters
+    and filters the users by the query params.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('admin', 'admin@example.com', 'Admin', 'pass12345')
+        cls.users = [
+            User.objects.create_user(f'member{i}', f'member{i}@example.com', f'Member {i}', 'pass12345')
+            for i in range(6)
+        ]
+        # Spreading the members over the days and the flags
+        for i, user in enumerate(cls.users):
+            User.objects.filter(pk=user.pk).update(
+                joined_date=date(2026, 1, 1) + timedelta(days=i),
+                is_active=i % 2 == 0,
+                is_verified=i < 3,
+            )
+        User.objects.filter(pk=cls.staff.pk).update(joined_date=date(2025, 12, 1))
+
+    def setUp(self):
+        django_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def usernames(self, params):
+        response = self.client.get('/users/', params)
+        self.assertEqual(response.status_code, 200)
+        return [user['username'] for user in response.data['results']]
+
+    def test_cursor_pages_walk_every_user_both_ways(self):
+        expected = [user.username for user in User.objects.order_by('id')]
+        response = self.client.get('/users/', {'page_size': 2})
+        pages = [[user['username'] for user in response.data['results']]]
+        while response.data['next']:
+            response = self.client.get(response.data['next'])
+            pages.append([user['username'] for user in response.data['results']])
+        self.assertEqual([username for page in pages for username in page], expected)
+        self.assertTrue(all(len(page) == 2 for page in pages[:-1]))
+
+        back = [pages[-1]]
+        while response.data['previous']:
+            response = self.client.get(response.data['previous'])
+            back.append([user['username'] for user in response.data['results']])
+        self.assertEqual(back[::-1], pages)
+
+    def test_count_is_cached_per_filters(self):
+        self.assertEqual(self.client.get('/users/', {'page_size': 2}).data['count'], 7)
+        User.objects.create_user('late', 'late@example.com', 'Late', 'pass12345')
+        # The cursor and the page size do not change the cached count, and no COUNT(*) is run
+        response = self.client.get('/users/', {'page_size': 2})
+        with self.assertNumQueries(1):
+            page = self.client.get(response.data['next'])
+        self.assertEqual(page.data['count'], 7)
+        self.assertEqual(self.client.get('/users/', {'page_size': 3}).data['count'], 7)
+        # Other filters are counted on their own
+        self.assertEqual(self.client.get('/users/', {'is_active': 'true'}).data['count'], 5)
+        django_cache.clear()
+        self.assertEqual(self.client.get('/users/').data['count'], 8)
+
+    def test_flag_filters(self):
+        self.assertEqual(self.usernames({'is_active': 'false'}), ['member1', 'member3', 'member5'])
+        self.assertEqual(self.usernames({'is_verified': 'true', 'is_active': 'true'}), ['member0', 'member2'])
+
+    def test_joined_filters_are_inclusive(self):
+        self.assertEqual(
+            self.usernames({'joined_after': '2026-01-02', 'joined_before': '2026-01-04'}),
+            ['member1', 'member2', 'member3'],
+        )
+        self.assertEqual(self.usernames({'joined_before': '2025-12-31'}), ['admin'])
+
+    def test_invalid_filter_is_rejected(self):
+        response = self.client.get('/users/', {'joined_after': 'yesterday'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('joined_after', response.data)
+
+
+
+class UsersSparseFieldsTests(TestCase):
+    """
+    The ?fields= param trims the output of the user list and the columns that its page query selects.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.staff = User.objects.create_superuser('admin', 'admin@example.com', 'Admin', 'pass12345')
+
+    def setUp(self):
+        django_cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def test_fields_trim_the_output_and_the_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/users/', {'fields': 'username,email'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'], [{'username': 'admin', 'email': 'admin@example.com'}])
+        page, = [query['sql'] for query in queries if '"Users_user"' in query['sql'] and 'LIMIT' in query['sql']]
+        self.assertIn('"Users_user"."email"', page)
+        self.assertNotIn('"Users_user"."password"', page)
+        self.assertNotIn('"Users_user"."full_name"', page)
+
+    def test_unknown_or_write_only_field_is_rejected(self):
+        response = self.client.get('/users/', {'fields': 'username,password'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('fields', response.data)
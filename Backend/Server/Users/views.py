@@ -1,14 +1,39 @@
-from django.shortcuts import get_object_or_404
+from django.db import IntegrityError, transaction
+from django.utils.decorators import method_decorator
+from django.views.decorators.http import condition
 from rest_framework import viewsets
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.exceptions import ValidationError
+from django.conf import settings
+
+from Authentication.hashing import get_hashing_pool
+from Server.fieldsets import get_sparse_fields, only_fields
 
 from .models import User
-from .serializers import UserSerializer
+from .serializers import UserSerializer, UsersFilterSerializer, UserProvisionSerializer
+from .provisioning import provision_users
+from .pagination import UsersCursorPagination
+from . import cache
 from .permissions import IsStaffOrSelf
 
 
+def user_etag(request, username, *args, **kwargs):
+    """
+    Build the ETag of a user from its updated_at and last_login fields.
+    """
+    # Only the staff or the user themselves can validate the user
+    if not (request.user.is_staff or request.user.username == username):
+        return None
+    # Reading only the validators from the database, a cached user may be stale behind a write
+    validator = User.objects.filter(username=username).values_list('pk', 'updated_at', 'last_login').first()
+    if validator is None:
+        return None
+    pk, updated_at, last_login = validator
+    return f'{pk}-{updated_at.timestamp()}-{last_login.timestamp() if last_login else 0}'
+
+
 # Define a viewset for the User model
 class UserViewSet(viewsets.ModelViewSet):
     """
@@ -22,29 +47,44 @@ class UserViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated, IsStaffOrSelf]
     # Defines the required field for retrive methods
     lookup_field = 'username'
+    # Define the pagination class for the viewset
+    pagination_class = UsersCursorPagination
 
     # Define the list method for the viewset
     def list(self, request, *args, **kwargs):
         """
-        Handle GET requests to retrieve a list of users.
+        Handle GET requests to retrieve a page of users.
         """
         try:
             # Check if the user is staff
             if request.user.is_staff:
-                # Retrieve the queryset
-                queryset = self.get_queryset()
-                # Serialize the queryset
-                serializer = self.get_serializer(queryset, many=True)
-                # Return the serialized data
-                return Response(serializer.data)
+                # Get the fields asked for with ?fields=
+                fields = get_sparse_fields(request, self.serializer_class)
+                # Validate the filters asked for with the query params
+                filters = UsersFilterSerializer(data=request.query_params)
+                filters.is_valid(raise_exception=True)
+                # Retrieve the queryset with only the columns of those fields, and the id of the cursor
+                queryset = only_fields(
+                    filters.filter_queryset(self.get_queryset()), self.serializer_class, fields, extra=('id',)
+                )
+                # Get a single page of the users by the cursor
+                page = self.paginate_queryset(queryset)
+                # Serialize the page
+                serializer = self.get_serializer(page, many=True, fields=fields)
+                # Return the page with the total count and the cursors
+                return self.get_paginated_response(serializer.data)
             else:
                 # Return a 403 Forbidden response if the user is not staff
                 return Response({"error": "You do not have permission to view this content"}, status=status.HTTP_403_FORBIDDEN)
+        except ValidationError as e:
+            # Return a 400 Bad Request response if the fields are not valid
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             # Return a 500 Internal Server Error response if an exception occurs
             return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
     # Define the retrieve method for the viewset
+    @method_decorator(condition(etag_func=user_etag))
     def retrieve(self, request, username, *args, **kwargs):
         """
         Handle GET requests to retrieve a single user.
@@ -52,8 +92,10 @@ class UserViewSet(viewsets.ModelViewSet):
         try:
             # Check if the user is staff or the user themselves
             if request.user.is_staff or request.user.username == username:
-                # Retrieve the user instance
-                queryset = get_object_or_404(User, username=username)
+                # Retrieve the user instance through the lookup cache
+                queryset = cache.get_user(username)
+                if queryset is None:
+                    raise User.DoesNotExist
                 # Serialize the user instance
                 serializer = self.get_serializer(queryset)
                 # Return the serialized data
@@ -76,19 +118,82 @@ class UserViewSet(viewsets.ModelViewSet):
         try:
             # Check if the user is staff or the user themselves
             if request.user.username == username or request.user.is_staff:
-                # Retrieve the user instance
-                instance = get_object_or_404(User, username=username)
-                # Serialize the user instance
-                serializer = self.get_serializer(instance, data=request.data, partial=True)
-                # Validate the serializer
-                serializer.is_valid(raise_exception=True)
-                # Update the user instance
-                self.perform_update(serializer)
+                with transaction.atomic():
+                    # Retrieve and lock the user row, the cached copy may be stale and is only read by the GETs
+                    instance = User.objects.select_for_update().get(username=username)
+                    # Serialize the user instance
+                    serializer = self.get_serializer(instance, data=request.data, partial=True)
+                    # Validate the serializer
+                    serializer.is_valid(raise_exception=True)
+                    # Update the user instance
+                    self.perform_update(serializer)
                 # Return the serialized data
                 return Response(serializer.data, status.HTTP_202_ACCEPTED)
             else:
                 # Return a 403 Forbidden response if the user is not staff or the user themselves
                 return Response({"error": "You do not have permission to update this content"}, status=status.HTTP_403_FORBIDDEN)
+        except User.DoesNotExist:
+            # Return a 404 Not Found response if the user does not exist
+            return Response({"error": "User not found"}, status=status.HTTP_404_NOT_FOUND)
+        except ValidationError as e:
+            # Return a 400 Bad Request response if the data is not valid
+            return Response(e.detail, status=status.HTTP_400_BAD_REQUEST)
         except Exception as e:
             # Return a 500 Internal Server Error response if an exception occurs
-            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
\ No newline at end of file
+            return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+    # Define the provision method for the viewset
+    def provision(self, request, *args, **kwargs):
+        """
+        Handle POST requests to create many users at once.
+        """
+        # Check if the user is staff
+        if not request.user.is_staff:
+            # Return a 403 Forbidden response if the user is not staff
+            return Response({"error": "You do not have permission to create users"}, status=status.HTTP_403_FORBIDDEN)
+        # Check the shape of the request data
+        if not isinstance(request.data, list) or not request.data:
+            return Response({"error": "Expected a non-empty list of users"}, status=status.HTTP_400_BAD_REQUEST)
+        if len(request.data) > settings.USERS_PROVISION_MAX_ITEMS:
+            return Response(
+                {"error": f"At most {settings.USERS_PROVISION_MAX_ITEMS} users can be created by a single request"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Validate every user of the request
+        rows = []
+        indexes = []
+        errors = []
+        for index, item in enumerate(request.data):
+            serializer = UserProvisionSerializer(data=item)
+            if serializer.is_valid():
+                rows.append(serializer.validated_data)
+                indexes.append(index)
+            else:
+                errors.append({'index': index, 'errors': serializer.errors})
+
+        try:
+            # Create the valid users in a single transaction, hashing the passwords on the bounded shared
+            # pool of the server, the skipped rows are reported by their index in the request
+            with transaction.atomic():
+                result = provision_users(rows, hash_passwords=get_hashing_pool().make_passwords)
+        except IntegrityError:
+            # Return a 409 Conflict response if another request took a username or an email in the meantime
+            return Response(
+                {"error": "A username or an email was taken by another request, no user was created"},
+                status=status.HTTP_409_CONFLICT
+            )
+        errors.extend(
+            {'index': indexes[error['index']], 'errors': {'non_field_errors': [error['error']]}}
+            for error in result['skipped']
+        )
+
+        # Return the number of created users and the errors of the other ones
+        return Response(
+            {
+                'created': result['created'],
+                'users_per_second': result['users_per_second'],
+                'errors': sorted(errors, key=lambda error: error['index']),
+            },
+            status=status.HTTP_201_CREATED if result['created'] else status.HTTP_400_BAD_REQUEST
+        )